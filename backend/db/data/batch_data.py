@@ -0,0 +1,63 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class Batch(BaseModel):
+    id: Optional[str] = Field(
+        default=None,
+        alias="_id",
+        description="Unique identifier of the batch (auto-generated by MongoDB); pass it again to resume",
+        examples=["64a123456789abcdef123456"]
+    )
+    user_id: Optional[str] = Field(
+        default=None,
+        description="User who uploaded the batch",
+        examples=["62c123456789abcdef123456"]
+    )
+    kind: str = Field(
+        ...,
+        description="What the batch runs for every record (optimization, evaluation)",
+        examples=["optimization", "evaluation"]
+    )
+    state: str = Field(
+        default="running",
+        description="Batch state (running, interrupted, completed)",
+        examples=["running", "interrupted", "completed"]
+    )
+    succeeded: int = Field(
+        default=0,
+        description="Records stored so far, over all runs of the batch"
+    )
+    failed: int = Field(
+        default=0,
+        description="Records that failed in the last run (retried when the batch is resumed)"
+    )
+    skipped: int = Field(
+        default=0,
+        description="Records skipped in the last run because an earlier run already stored them"
+    )
+    runs: int = Field(
+        default=1,
+        description="How many times the batch was uploaded (1 + number of resumes)"
+    )
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        description="Timestamp when the batch was created"
+    )
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        description="Timestamp when the batch was last updated"
+    )
+    lease_expires_at: Optional[datetime] = Field(
+        default=None,
+        description="Until when the running upload holds the batch; after that it can be resumed"
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None,
+        description="Timestamp when the last run finished or was interrupted"
+    )
+
+    class Config:
+        populate_by_name = True
+        from_attributes = True
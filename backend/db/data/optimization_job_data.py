@@ -0,0 +1,81 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+
+class OptimizationJob(BaseModel):
+    id: Optional[str] = Field(
+        default=None,
+        alias="_id",
+        description="Unique identifier of the job (auto-generated by MongoDB)",
+        examples=["64a123456789abcdef123456"]
+    )
+    user_id: Optional[str] = Field(
+        default=None,
+        description="User who submitted the job",
+        examples=["62c123456789abcdef123456"]
+    )
+    state: str = Field(
+        default="queued",
+        description="Job state (queued, running, succeeded, failed)",
+        examples=["queued", "running", "succeeded", "failed"]
+    )
+    stage: Optional[str] = Field(
+        default="queued",
+        description="Current step of the optimization pipeline",
+        examples=["queued", "optimizing", "saving", "done"]
+    )
+    progress: int = Field(
+        default=0,
+        description="Progress of the job in percent",
+        examples=[0, 10, 90, 100]
+    )
+    request: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="The optimization request body as submitted",
+    )
+    result_id: Optional[str] = Field(
+        default=None,
+        description="Reference to the created 'OptimizedPrompt' document ID",
+        examples=["64a123456789abcdef123456"]
+    )
+    result: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="The created optimized prompt document once the job succeeded"
+    )
+    error: Optional[str] = Field(
+        default=None,
+        description="Error message of the last failed attempt"
+    )
+    attempts: int = Field(
+        default=0,
+        description="How many times a worker has picked up the job"
+    )
+    worker_id: Optional[str] = Field(
+        default=None,
+        description="Worker currently holding the job lease"
+    )
+    lease_expires_at: Optional[datetime] = Field(
+        default=None,
+        description="Until when the current worker holds the job; expired leases are picked up again"
+    )
+    not_before: Optional[datetime] = Field(
+        default=None,
+        description="A retried job is not picked up again before this time"
+    )
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        description="Timestamp when the job was enqueued"
+    )
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        description="Timestamp when the job was last updated"
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None,
+        description="Timestamp when the job succeeded or failed"
+    )
+
+    class Config:
+        populate_by_name = True
+        from_attributes = True
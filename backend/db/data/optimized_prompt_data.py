@@ -13,6 +13,12 @@ class OptimizedPrompt(BaseModel):
         examples=["64a123456789abcdef123456"]
     )
 
+    user_id: Optional[str] = Field(
+        default=None,
+        description="User who requested the optimization",
+        examples=["62c123456789abcdef123456"]
+    )
+
     user_query: str = Field(
         ...,
         description="The original user query",
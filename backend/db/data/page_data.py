@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+
+
+class Page(BaseModel):
+    items: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Documents of this page, reduced to the requested fields"
+    )
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Opaque cursor for the next page; null on the last page",
+        examples=["eyJjcmVhdGVkX2F0IjogIjIwMjUtMDEtMDFUMDA6MDA6MDAiLCAiaWQiOiAiNjRhMTIzNDU2Nzg5YWJjZGVmMTIzNDU2In0="]
+    )
+
+    class Config:
+        populate_by_name = True
+        from_attributes = True
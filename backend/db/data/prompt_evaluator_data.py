@@ -11,6 +11,11 @@ class PromptEvaluator(BaseModel):
         description="Unique identifier for the evaluation (auto-generated by MongoDB)",
         examples=["62c123456789abcdef123456"]
     )
+    user_id: Optional[str] = Field(
+        default=None,
+        description="User who requested the evaluation",
+        examples=["62c123456789abcdef123456"]
+    )
     user_query: str = Field(
         description="The user query for evaluation",
         examples=["Create a snake game in Python."]
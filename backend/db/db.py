@@ -1,6 +1,6 @@
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from backend.db.settings import MONGO_URI, DB_NAME
+from backend.db.settings import MONGO_URI, DB_NAME, MONGO_CLIENT_OPTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -9,14 +9,14 @@ database: AsyncIOMotorDatabase = None
 
 def init_db() -> None:
     """
-    Initializes a singleton Motor client and database.
-    This function should be called on application startup.
+    Initializes a singleton Motor client and database with the pool options from config.yaml.
+    This function should be called on application startup; every service shares this client.
     """
     global client, database
     if client is None:
-        client = AsyncIOMotorClient(MONGO_URI)
+        client = AsyncIOMotorClient(MONGO_URI, **MONGO_CLIENT_OPTIONS)
         database = client[DB_NAME]
-        logger.info("Connected to MongoDB at %s, using DB: %s", MONGO_URI, DB_NAME)
+        logger.info("Connected to MongoDB at %s, using DB: %s (options: %s)", MONGO_URI, DB_NAME, MONGO_CLIENT_OPTIONS)
 
 def get_database() -> AsyncIOMotorDatabase:
     """
@@ -27,12 +27,20 @@ def get_database() -> AsyncIOMotorDatabase:
         init_db()
     return database
 
+async def ping_db() -> None:
+    """
+    Round-trips a ping to the server; raises if MongoDB is unreachable.
+    """
+    await get_database().command("ping")
+
 def close_db() -> None:
     """
     Closes the Motor client.
     This function should be called on application shutdown.
     """
-    global client
+    global client, database
     if client is not None:
         client.close()
+        client = None
+        database = None
         logger.info("MongoDB client closed.")
@@ -0,0 +1,62 @@
+import logging
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Indexes backing the service queries, per collection. Names are fixed so that
+# re-creating them on every startup is a no-op.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel(
+            [("email", ASCENDING)],
+            name="email_active_unique",
+            unique=True,
+            partialFilterExpression={"is_deleted": False}
+        ),
+    ],
+    "optimized_prompts": [
+        IndexModel([("is_deleted", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="is_deleted_created_at_id"),
+        IndexModel([("is_deleted", ASCENDING), ("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="is_deleted_user_id_created_at_id"),
+    ],
+    "prompt_evaluator": [
+        IndexModel([("is_deleted", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="is_deleted_created_at_id"),
+        IndexModel([("is_deleted", ASCENDING), ("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="is_deleted_user_id_created_at_id"),
+    ],
+    "jobs": [
+        IndexModel([("state", ASCENDING), ("created_at", ASCENDING)], name="state_created_at"),
+    ],
+    "batches": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+    ],
+    "batch_items": [
+        IndexModel([("batch_id", ASCENDING), ("key", ASCENDING)], name="batch_id_key_unique", unique=True),
+        IndexModel([("batch_id", ASCENDING), ("status", ASCENDING)], name="batch_id_status"),
+    ],
+    "usage_ledger": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Creates the declared indexes. Existing indexes with the same definition are left untouched.
+    A collection whose indexes cannot be built (e.g. duplicate emails blocking the unique
+    index) is logged and skipped so the application still starts.
+    This function should be called on application startup.
+    """
+    for collection_name, models in INDEXES.items():
+        try:
+            created = await db[collection_name].create_indexes(models)
+            logger.info("Ensured indexes on '%s': %s", collection_name, created)
+        except OperationFailure as e:
+            logger.error("Failed to create indexes on '%s': %s", collection_name, e)
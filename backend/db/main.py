@@ -2,37 +2,53 @@ from starlette.middleware.cors import CORSMiddleware
 
 from backend.db.routers import prompt_evaluator_router
 from backend.db.routers.user_router import router as user_router
+from backend.db.routers.health_router import router as health_router
+from backend.db.routers.usage_router import router as usage_router
 
 import uvicorn
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-import motor.motor_asyncio
-from backend.db.settings import MONGO_URI, DB_NAME
+from backend.db.db import init_db, get_database, ping_db, close_db
+from backend.db.indexes import ensure_indexes
+from backend.db.service.optimization_job_service import start_job_workers, stop_job_workers
+from backend.llm_clients.ai_client_factory import init_ai_clients, close_ai_clients
 from backend.db.routers.optimization_prompt_router import router as optimized_router
 from backend.utils.http_error_handler import handle_generic_exception
+from backend.utils.password_hasher import close_password_hasher
+from backend.utils.render_prompt import init_prompt_templates
 
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-        Ensures MongoDB connection is established at startup and closed at shutdown.
+        Ensures MongoDB connection (with its indexes) and the pooled AI clients are established at startup and closed at shutdown.
+        Prompt templates are compiled up front so a missing prompt file fails the boot.
     """
+    init_prompt_templates()
     try:
-        app.state.mongo_client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
-        app.state.mongo_db = app.state.mongo_client[DB_NAME]
-        logger.info("Connected to MongoDB at %s", MONGO_URI)
+        init_db()
+        # Refuse traffic until MongoDB is reachable.
+        await ping_db()
+        await ensure_indexes(get_database())
+        init_ai_clients()
+        start_job_workers()
         yield
     except Exception as e:
         handle_generic_exception(e)
 
     finally:
-        app.state.mongo_client.close()
-        logger.info("MongoDB connection closed.")
+        await stop_job_workers()
+        await close_ai_clients()
+        close_password_hasher()
+        close_db()
 
 app = FastAPI(
     title="Prompt Optimization API",
     description="API for evaluating, optimization and testing prompts using AI and storing results in MongoDB",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -43,9 +59,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(health_router, prefix="/health", tags=["Health"])
 app.include_router(user_router, prefix="/users", tags=["Users"])
 app.include_router(prompt_evaluator_router.router, prefix="/evaluations", tags=["Evaluations"])
 app.include_router(optimized_router, prefix="/optimizations", tags=["Optimized Prompts"])
+app.include_router(usage_router, prefix="/usage", tags=["Usage"])
 
 if __name__ == "__main__":
     uvicorn.run("backend.db.main:app", host="127.0.0.1", port=8000)
@@ -0,0 +1,95 @@
+import logging
+from typing import Dict, Any
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from backend.config.config import load_config
+from backend.db.db import ping_db
+from backend.llm_clients.ai_client_factory import get_rate_limiter, get_hedge_policy, get_circuit_breakers, \
+    get_usage_ledger, get_token_planner, get_response_cache
+from backend.utils.password_hasher import get_password_hasher
+from backend.utils.path_utils import resolve_path
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+config = load_config(resolve_path("config.yaml"))
+
+@router.get("/live")
+async def liveness_endpoint() -> Dict[str, Any]:
+    """
+    The process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness_endpoint():
+    """
+    Ready to accept traffic: MongoDB answers a ping. Returns 503 otherwise.
+    """
+    try:
+        await ping_db()
+    except Exception as e:
+        logger.warning("Readiness check failed: %s", e)
+        return JSONResponse(status_code=503, content={"status": "unavailable", "database": str(e)})
+    return {"status": "ok", "database": "ok"}
+
+@router.get("/password_hasher")
+async def password_hasher_endpoint() -> Dict[str, Any]:
+    """
+    Queue depth, in-flight hashes, rejections and average wait of the bcrypt thread pool.
+    """
+    return get_password_hasher().stats()
+
+@router.get("/rate_limits")
+async def rate_limits_endpoint() -> Dict[str, Any]:
+    """
+    Budgets, queue lengths and wait times of the per-(provider, model) LLM rate limiter.
+    """
+    limiter = get_rate_limiter()
+    return limiter.stats() if limiter is not None else {}
+
+@router.get("/response_cache")
+async def response_cache_endpoint() -> Dict[str, Any]:
+    """
+    Hits, misses and hit rate of the LLM response cache, and hits per tier.
+    """
+    cache = get_response_cache()
+    return cache.stats() if cache is not None else {}
+
+@router.get("/hedging")
+async def hedging_endpoint() -> Dict[str, Any]:
+    """
+    Hedged request counts, hedge rate and the current hedge delay per model.
+    """
+    policy = get_hedge_policy()
+    return policy.stats() if policy is not None else {}
+
+@router.get("/providers")
+async def providers_endpoint() -> Dict[str, Any]:
+    """
+    Circuit state, rolling failure rate and latency of every configured (provider, model).
+    """
+    breakers = get_circuit_breakers()
+    if breakers is None:
+        return {}
+    return {
+        provider: {model: breakers.get(provider, model).stats() for model in models}
+        for provider, models in config.get("models", {}).items()
+    }
+
+@router.get("/usage_ledger")
+async def usage_ledger_endpoint() -> Dict[str, Any]:
+    """
+    Recorded, written and buffered usage ledger entries and budget rejections.
+    """
+    ledger = get_usage_ledger()
+    return ledger.stats() if ledger is not None else {}
+
+@router.get("/token_budget")
+async def token_budget_endpoint() -> Dict[str, Any]:
+    """
+    Planned vs actual prompt and completion tokens per model.
+    """
+    planner = get_token_planner()
+    return planner.stats() if planner is not None else {}
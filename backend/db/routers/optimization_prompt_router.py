@@ -1,10 +1,18 @@
 import logging
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Body, Depends
+from typing import Dict, Any, Optional
+from fastapi import APIRouter, Body, Depends, Request
+from fastapi.responses import StreamingResponse
 
+from backend.db.data.batch_data import Batch
+from backend.db.data.optimization_job_data import OptimizationJob
 from backend.db.data.optimized_prompt_data import OptimizedPrompt
+from backend.db.data.page_data import Page
+from backend.db.service.batch_service import start_batch, get_batch
+from backend.db.service.optimization_job_service import enqueue_optimization_job, get_optimization_job
 from backend.db.service.optimization_prompt_service import (
-    create_optimized_prompt,
+    validate_optimization_request,
+    stream_optimized_prompt,
+    race_optimized_prompts,
     get_optimized_prompt,
     list_optimized_prompts,
     update_optimized_prompt,
@@ -16,7 +24,7 @@ from backend.utils.http_error_handler import handle_generic_exception
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/", response_model=OptimizedPrompt)
+@router.post("/", response_model=OptimizationJob, status_code=202)
 async def create_optimized_prompt_endpoint(
         prompt_data: Dict[str, Any] = Body(
         ...,
@@ -30,9 +38,95 @@ async def create_optimized_prompt_endpoint(
     ),
         user_id: str = Depends(get_current_user)
 ) -> Dict[str, Any]:
-    """Create a new OptimizedPrompt document."""
+    """
+    Enqueue an optimization job and return it immediately.
+    Poll GET /optimizations/jobs/{job_id} for its state; the created OptimizedPrompt is in 'result'.
+    """
     try:
-        return await create_optimized_prompt(prompt_data)
+        return await enqueue_optimization_job(prompt_data, user_id=user_id)
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.post("/stream")
+async def stream_optimized_prompt_endpoint(
+        prompt_data: Dict[str, Any] = Body(
+        ...,
+        examples=[{
+            "user_query": "Optimize my resume summary",
+            "provider": "openai",
+            "model": "gpt-3.5-turbo",
+            "technique": "CoT",
+            "number_of_iterations": 3
+        }]
+    ),
+        user_id: str = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Run the optimization and stream it as server-sent events
+    ('token', 'final_query', then 'result' with the stored OptimizedPrompt, or 'error').
+    """
+    try:
+        validate_optimization_request(prompt_data)
+        return StreamingResponse(stream_optimized_prompt(prompt_data, user_id=user_id), media_type="text/event-stream")
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.post("/race")
+async def race_optimized_prompts_endpoint(
+        race_data: Dict[str, Any] = Body(
+        ...,
+        examples=[{
+            "user_query": "Optimize my resume summary",
+            "provider": "openai",
+            "model": "gpt-4o-mini",
+            "techniques": ["CoT", "PC", "ReAct", "CoD", "SC"],
+            "number_of_iterations": 3,
+            "evaluate": True
+        }]
+    ),
+        user_id: str = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Run several techniques concurrently on one query with a shared expert lookup,
+    optionally rate each result, and return the stored OptimizedPrompts ranked by rating.
+    """
+    try:
+        return await race_optimized_prompts(race_data, user_id=user_id)
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.post("/batch")
+async def optimization_batch_endpoint(
+        request: Request,
+        batch_id: Optional[str] = None,
+        user_id: str = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Run every line of an NDJSON upload (one optimization request per line, e.g.
+    {"id": "q1", "user_query": "...", "provider": "openai", "model": "gpt-4o-mini", "technique": "CoT", "number_of_iterations": 3}) and stream the results back as NDJSON as they complete.
+    Pass the 'batch_id' from the first response line to resume an interrupted batch.
+    """
+    try:
+        stream = await start_batch("optimization", request.stream(), user_id=user_id, batch_id=batch_id)
+        return StreamingResponse(stream, media_type="application/x-ndjson")
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.get("/batch/{batch_id}", response_model=Batch)
+async def get_optimization_batch_endpoint(batch_id: str,
+        user_id: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """Retrieve the state and record counts of a batch."""
+    try:
+        return await get_batch(batch_id, "optimization", user_id=user_id)
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.get("/jobs/{job_id}", response_model=OptimizationJob)
+async def get_optimization_job_endpoint(job_id: str,
+        user_id: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """Retrieve the state, progress and result of an optimization job."""
+    try:
+        return await get_optimization_job(job_id, user_id=user_id)
     except Exception as e:
         handle_generic_exception(e)
 
@@ -44,11 +138,24 @@ async def get_optimized_prompt_endpoint(prompt_id: str) -> Optional[Dict[str, An
     except Exception as e:
         handle_generic_exception(e)
 
-@router.get("/", response_model=List[OptimizedPrompt])
-async def list_optimized_prompts_endpoint(limit: int = 10) -> List[Dict[str, Any]]:
-    """List optimized prompts, excluding deleted ones."""
+@router.get("/", response_model=Page)
+async def list_optimized_prompts_endpoint(
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order: str = "desc",
+        user_id: Optional[str] = None,
+        technique: Optional[str] = None,
+        model: Optional[str] = None,
+        fields: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    List optimized prompts, excluding deleted ones, newest first by default.
+    'fields' is a comma-separated list of fields to return ("all" for whole documents);
+    pass 'next_cursor' from the response as 'cursor' to get the next page.
+    """
     try:
-        return await list_optimized_prompts(limit)
+        return await list_optimized_prompts(limit, cursor=cursor, order=order, user_id=user_id,
+                                            technique=technique, model=model, fields=fields)
     except Exception as e:
         handle_generic_exception(e)
 
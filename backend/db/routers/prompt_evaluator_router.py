@@ -1,11 +1,15 @@
 import logging
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Body, Depends
+from typing import Dict, Any, Optional
+from fastapi import APIRouter, Body, Depends, Request
+from fastapi.responses import StreamingResponse
 
+from backend.db.data.batch_data import Batch
+from backend.db.data.page_data import Page
 from backend.db.data.prompt_evaluator_data import PromptEvaluator
-from backend.db.db import get_database
+from backend.db.service.batch_service import start_batch, get_batch
 from backend.db.service.prompt_evaluation_service import create_prompt_evaluation, get_prompt_evaluation, \
-    list_prompt_evaluations, update_prompt_evaluation, delete_prompt_evaluation, create_comparison, create_blind_outputs
+    list_prompt_evaluations, update_prompt_evaluation, delete_prompt_evaluation, create_comparison, create_blind_outputs, \
+    validate_comparison_request, stream_comparison, validate_blind_outputs_request, stream_blind_outputs
 from backend.utils.auth_dependency import get_current_user
 
 from backend.utils.http_error_handler import handle_generic_exception
@@ -13,7 +17,6 @@ from backend.utils.http_error_handler import handle_generic_exception
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-db = get_database()
 @router.post("/", response_model=PromptEvaluator)
 async def create_evaluation_endpoint(
         evaluation_data: Dict[str, Any] = Body(
@@ -32,7 +35,7 @@ async def create_evaluation_endpoint(
     Returns the inserted document with 'id' as a string.
     """
     try:
-       return await create_prompt_evaluation(evaluation_data)
+       return await create_prompt_evaluation(evaluation_data, user_id=user_id)
     except Exception as e:
         handle_generic_exception(e)
 
@@ -54,7 +57,30 @@ async def create_comparison_endpoint(
     Returns the inserted document with 'id' as a string.
     """
     try:
-       return await create_comparison(evaluation_data)
+       return await create_comparison(evaluation_data, user_id=user_id)
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.post("/compare/stream")
+async def stream_comparison_endpoint(
+        evaluation_data: Dict[str, Any] = Body(
+        ...,
+        examples=[{
+            "user_query": "Write a Python function to reverse a string",
+            "provider" : "openai",
+            "model": "gpt-3.5-turbo",
+            "optimized_user_query": "Write a Python enhanced version of function to reverse a string",
+        }]
+        ),
+        user_id: str = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Streams both comparison responses as server-sent events ('token' tagged with
+    the target field, then 'result' with the inserted document, or 'error').
+    """
+    try:
+        validate_comparison_request(evaluation_data)
+        return StreamingResponse(stream_comparison(evaluation_data, user_id=user_id), media_type="text/event-stream")
     except Exception as e:
         handle_generic_exception(e)
 
@@ -74,7 +100,55 @@ async def create_multi_versions_endpoint(
     saving all responses in the 'multi_versions' collection.
     """
     try:
-        return await create_blind_outputs(data)
+        return await create_blind_outputs(data, user_id=user_id)
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.post("/multi_versions/stream")
+async def stream_multi_versions_endpoint(
+    data: Dict[str, Any] = Body(
+        ...,
+        examples=[{
+            "user_query": "Explain how quantum entanglement works in simple terms.",
+            "num_versions": 2
+        }]
+    ),
+    user_id: str = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Streams the blind results of every chosen model as server-sent events
+    ('token' tagged with the version index, 'version_done', then 'result'
+    with the inserted document, or 'error').
+    """
+    try:
+        validate_blind_outputs_request(data)
+        return StreamingResponse(stream_blind_outputs(data, user_id=user_id), media_type="text/event-stream")
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.post("/batch")
+async def evaluation_batch_endpoint(
+        request: Request,
+        batch_id: Optional[str] = None,
+        user_id: str = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Run every line of an NDJSON upload (one evaluation request per line, e.g.
+    {"id": "q1", "user_query": "...", "provider": "openai", "model": "gpt-4o-mini", "evaluation_method": "llm"}) and stream the results back as NDJSON as they complete.
+    Pass the 'batch_id' from the first response line to resume an interrupted batch.
+    """
+    try:
+        stream = await start_batch("evaluation", request.stream(), user_id=user_id, batch_id=batch_id)
+        return StreamingResponse(stream, media_type="application/x-ndjson")
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.get("/batch/{batch_id}", response_model=Batch)
+async def get_evaluation_batch_endpoint(batch_id: str,
+        user_id: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """Retrieve the state and record counts of a batch."""
+    try:
+        return await get_batch(batch_id, "evaluation", user_id=user_id)
     except Exception as e:
         handle_generic_exception(e)
 
@@ -93,16 +167,24 @@ async def get_evaluation_endpoint(
         handle_generic_exception(e)
 
 
-@router.get("/", response_model=List[PromptEvaluator])
+@router.get("/", response_model=Page)
 async def list_evaluation_endpoint(
         limit: int = 10,
-) -> List[Dict[str, Any]]:
+        cursor: Optional[str] = None,
+        order: str = "desc",
+        user_id: Optional[str] = None,
+        evaluation_method: Optional[str] = None,
+        model: Optional[str] = None,
+        fields: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Returns a list of evaluations, excluding those marked as deleted.
+    Returns a page of evaluations, excluding those marked as deleted, newest first by default.
+    'fields' is a comma-separated list of fields to return ("all" for whole documents);
+    pass 'next_cursor' from the response as 'cursor' to get the next page.
     """
     try:
-        docs = await list_prompt_evaluations(limit)
-        return docs
+        return await list_prompt_evaluations(limit, cursor=cursor, order=order, user_id=user_id,
+                                             evaluation_method=evaluation_method, model=model, fields=fields)
     except Exception as e:
         handle_generic_exception(e)
 
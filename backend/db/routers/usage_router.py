@@ -0,0 +1,41 @@
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Depends
+
+from backend.db.service.usage_service import aggregate_usage, get_usage_budget
+from backend.utils.auth_dependency import get_current_user
+from backend.utils.http_error_handler import handle_generic_exception
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/")
+async def aggregate_usage_endpoint(
+        group_by: str = "user_id,technique,model",
+        user_id: Optional[str] = None,
+        technique: Optional[str] = None,
+        model: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        current_user_id: str = Depends(get_current_user)
+) -> List[Dict[str, Any]]:
+    """
+    LLM calls, tokens, cost and tokens per second from the usage ledger, grouped by a
+    comma-separated subset of user_id, technique, provider and model.
+    """
+    try:
+        return await aggregate_usage(group_by, user_id=user_id, technique=technique, model=model,
+                                     since=since, until=until)
+    except Exception as e:
+        handle_generic_exception(e)
+
+@router.get("/me/budget")
+async def usage_budget_endpoint(current_user_id: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    The current user's LLM spend today and the remaining daily budget.
+    """
+    try:
+        return await get_usage_budget(current_user_id)
+    except Exception as e:
+        handle_generic_exception(e)
@@ -1,12 +1,13 @@
 import logging
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Depends
 from datetime import datetime, timedelta
 import jwt  # pyjwt
 from pydantic import BaseModel
 
 from backend.config.config import load_config
 from backend.db.service.user_service import create_user, authenticate_user, get_user_by_id
+from backend.utils.auth_dependency import get_current_user_doc
 from backend.utils.http_error_handler import handle_generic_exception
 from backend.utils.path_utils import resolve_path
 
@@ -78,6 +79,12 @@ async def login_user(
     except Exception as e:
         handle_generic_exception(e)
 
+@router.get("/me")
+async def get_me_endpoint(user_doc: Dict[str, Any] = Depends(get_current_user_doc)) -> Dict[str, Any]:
+    """
+    Retrieve the authenticated user (from the bearer token).
+    """
+    return user_doc
 
 @router.get("/{user_id}")
 async def get_user_endpoint(user_id: str) -> Optional[Dict[str, Any]]:
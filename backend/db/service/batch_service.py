@@ -0,0 +1,311 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, AsyncIterator, List, Optional, Set
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+
+from backend.config.config import load_config
+from backend.db.data.batch_data import Batch
+from backend.db.db import get_database
+from backend.db.service.optimization_prompt_service import build_optimized_prompt
+from backend.db.service.prompt_evaluation_service import build_prompt_evaluation
+from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.ndjson import format_ndjson, iter_ndjson, spool_body, iter_spooled
+from backend.utils.path_utils import resolve_path
+from backend.utils.request_context import current_user_id
+
+logger = logging.getLogger(__name__)
+
+config = load_config(resolve_path("config.yaml"))
+batches_config = config.get("batches", {})
+
+CONCURRENCY = batches_config.get("concurrency", 8)
+CHUNK_SIZE = batches_config.get("chunk_size", 50)
+MAX_RECORDS = batches_config.get("max_records", 10000)
+MAX_LINE_BYTES = batches_config.get("max_line_bytes", 1 << 20)
+MAX_UPLOAD_BYTES = batches_config.get("max_upload_bytes", 256 << 20)
+LEASE_SECONDS = batches_config.get("lease_seconds", 120)
+
+# What every record of a batch is run through, and where its result is stored.
+BATCH_KINDS = {
+    "optimization": {"build": build_optimized_prompt, "collection": "optimized_prompts"},
+    "evaluation": {"build": build_prompt_evaluation, "collection": "prompt_evaluator"},
+}
+
+
+def sanitize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove MongoDB '_id' and set 'id' from it."""
+    if "_id" in doc:
+        doc["id"] = str(doc["_id"])
+        del doc["_id"]
+    return doc
+
+def _record_key(line_number: int, record: Any) -> str:
+    """
+    Identifies a record across uploads: its "id" field, or else its line number.
+    """
+    if isinstance(record, dict) and record.get("id") is not None:
+        return str(record["id"])
+    return f"line:{line_number}"
+
+def _lease_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+
+async def open_batch(kind: str, user_id: Optional[str] = None, batch_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Creates a new batch, or reopens 'batch_id' of the same user and kind to resume it.
+    A batch that is still running can only be taken over once its lease has expired,
+    i.e. the process running it stopped renewing it (crashed or was killed).
+    Called before the response is streamed so that errors are returned as regular HTTP errors.
+    """
+    db = get_database()
+
+    if batch_id is None:
+        batch = Batch(user_id=user_id, kind=kind, lease_expires_at=_lease_expiry())
+        doc = batch.model_dump(by_alias=True)
+        doc.pop("_id", None)
+        result = await db.batches.insert_one(doc)
+        logger.info("Created %s batch with _id: %s", kind, result.inserted_id)
+        return doc
+
+    try:
+        obj_id = ObjectId(batch_id)
+    except InvalidId:
+        handle_http_exception(400, "Invalid batch ID format.")
+
+    now = datetime.utcnow()
+    doc = await db.batches.find_one_and_update(
+        {"_id": obj_id, "user_id": user_id, "kind": kind,
+         "$or": [{"state": {"$ne": "running"}}, {"lease_expires_at": {"$lt": now}}]},
+        {"$set": {"state": "running", "failed": 0, "skipped": 0, "lease_expires_at": _lease_expiry(),
+                  "updated_at": now, "finished_at": None},
+         "$inc": {"runs": 1}},
+        return_document=True
+    )
+    if not doc:
+        existing = await db.batches.find_one({"_id": obj_id, "user_id": user_id, "kind": kind})
+        if not existing:
+            handle_http_exception(404, "Batch not found.")
+        handle_http_exception(409, "The batch is still running.")
+
+    logger.info("Resuming %s batch %s (run %d).", kind, batch_id, doc["runs"])
+    return doc
+
+async def start_batch(kind: str, chunks: AsyncIterator[bytes], user_id: Optional[str] = None,
+                      batch_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Spools the whole upload, then opens the batch and returns its NDJSON stream.
+    The body is read completely before the response starts, so it is never read
+    concurrently with the server's disconnect listener.
+    """
+    upload = await spool_body(chunks, MAX_UPLOAD_BYTES)
+    try:
+        batch = await open_batch(kind, user_id=user_id, batch_id=batch_id)
+    except Exception:
+        upload.close()
+        raise
+    return stream_batch(kind, batch, iter_spooled(upload), user_id=user_id)
+
+async def get_batch(batch_id: str, kind: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+    """Retrieves a batch document of the user by ID."""
+    db = get_database()
+
+    try:
+        obj_id = ObjectId(batch_id)
+    except InvalidId:
+        handle_http_exception(400, "Invalid batch ID format.")
+
+    doc = await db.batches.find_one({"_id": obj_id, "user_id": user_id, "kind": kind})
+    if not doc:
+        handle_http_exception(404, "Batch not found.")
+
+    return sanitize_document(doc)
+
+async def _stored_keys(batch_id: ObjectId) -> Set[str]:
+    """
+    Keys of the records an earlier run of the batch already stored.
+    """
+    db = get_database()
+    cursor = db.batch_items.find({"batch_id": batch_id, "status": "succeeded"}, {"key": 1, "_id": 0})
+    return {item["key"] async for item in cursor}
+
+async def _run_record(kind: str, key: str, line_number: int, record: Any,
+                      user_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Runs one record through the batch's pipeline. Failures are returned, not raised.
+    """
+    entry: Dict[str, Any] = {"key": key, "line": line_number}
+    try:
+        if isinstance(record, ValueError):
+            raise record
+        if not isinstance(record, dict):
+            raise ValueError("Each line must be a JSON object.")
+        request = {field: value for field, value in record.items() if field != "id"}
+        doc = await BATCH_KINDS[kind]["build"](request, user_id=user_id)
+        # The id is assigned up front so the result can be streamed before its chunk is written.
+        doc["_id"] = ObjectId()
+        entry.update(status="succeeded", doc=doc)
+    except Exception as e:
+        logger.warning("Batch record %s failed: %s", key, e)
+        entry.update(status="failed", error=str(getattr(e, "detail", e)))
+    return entry
+
+async def _renew_lease(batch_id: ObjectId, run: int) -> None:
+    """
+    Keeps extending the lease while the run streams, also between chunks.
+    """
+    db = get_database()
+    while True:
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        await db.batches.update_one({"_id": batch_id, "runs": run}, {"$set": {"lease_expires_at": _lease_expiry()}})
+
+async def _write_chunk(kind: str, batch_id: ObjectId, run: int, entries: List[Dict[str, Any]]) -> None:
+    """
+    Stores the results of finished records with one insert_many and marks their keys
+    in 'batch_items', so a resumed run skips them. Renews the run's lease. Written
+    entries are removed from 'entries'; if a step fails, calling it again with the
+    remaining entries does not insert their results twice.
+    """
+    if not entries:
+        return
+    db = get_database()
+    now = datetime.utcnow()
+
+    docs = [entry["doc"] for entry in entries if entry["status"] == "succeeded" and not entry.get("inserted")]
+    if docs:
+        await db[BATCH_KINDS[kind]["collection"]].insert_many(docs)
+        for entry in entries:
+            entry["inserted"] = True
+
+    await db.batch_items.bulk_write([
+        UpdateOne(
+            {"batch_id": batch_id, "key": entry["key"]},
+            {"$set": {"status": entry["status"], "line": entry["line"],
+                      "result_id": entry["doc"]["_id"] if entry["status"] == "succeeded" else None,
+                      "error": entry.get("error"), "updated_at": now}},
+            upsert=True
+        )
+        for entry in entries
+    ], ordered=False)
+
+    written = len(entries)
+    succeeded = sum(entry["status"] == "succeeded" for entry in entries)
+    entries.clear()
+    await db.batches.update_one({"_id": batch_id}, {
+        "$inc": {"succeeded": succeeded, "failed": written - succeeded}
+    })
+    await db.batches.update_one({"_id": batch_id, "runs": run}, {
+        "$set": {"lease_expires_at": _lease_expiry(), "updated_at": now}
+    })
+    logger.info("Batch %s: stored a chunk of %d results (%d failed).", batch_id, succeeded, written - succeeded)
+
+async def _finish_run(kind: str, batch_id: ObjectId, run: int, finished: List[Dict[str, Any]],
+                      state: str, counts: Dict[str, int]) -> None:
+    """
+    Writes the records that finished since the last chunk, then records the end of the run.
+    """
+    db = get_database()
+    try:
+        # Keep what finished before an interruption so a resumed run does not redo it.
+        await _write_chunk(kind, batch_id, run, finished)
+    except Exception as e:
+        logger.error("Could not store the last %d results of batch %s: %s", len(finished), batch_id, e)
+    try:
+        # Only the run that still holds the batch records its end, not one that was taken over.
+        await db.batches.update_one({"_id": batch_id, "runs": run}, {"$set": {
+            "state": state,
+            "skipped": counts["skipped"],
+            "lease_expires_at": None,
+            "updated_at": datetime.utcnow(),
+            "finished_at": datetime.utcnow()
+        }})
+    except Exception as e:
+        logger.error("Could not record the end of batch %s: %s", batch_id, e)
+    logger.info("Batch %s %s: %s", batch_id, state, counts)
+
+def _format_entry(entry: Dict[str, Any]) -> str:
+    line = {"type": "result", "key": entry["key"], "line": entry["line"], "status": entry["status"]}
+    if entry["status"] == "succeeded":
+        line["result"] = sanitize_document(dict(entry["doc"]))
+    else:
+        line["error"] = entry["error"]
+    return format_ndjson(line)
+
+async def stream_batch(kind: str, batch: Dict[str, Any], chunks: AsyncIterator[bytes],
+                       user_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Runs every record of an NDJSON upload through the optimization or evaluation
+    pipeline, at most 'batches.concurrency' at a time. Streams NDJSON back: a 'batch'
+    line with the batch_id, a 'result' (or 'skipped') line per record as it completes,
+    then a 'summary' line.
+    Results are written with insert_many every 'batches.chunk_size' records. If the
+    run is interrupted, the finished records are still written, and uploading the
+    same file again with the batch_id skips them. The run holds a lease that is renewed
+    while it streams; if the process dies, the batch can be resumed once it expires.
+    """
+    current_user_id.set(user_id)
+    batch_id = batch["_id"]
+    run = batch.get("runs", 1)
+    stored = await _stored_keys(batch_id)
+
+    pending: Set[asyncio.Task] = set()
+    finished: List[Dict[str, Any]] = []
+    counts = {"succeeded": 0, "failed": 0, "skipped": 0}
+    completed = False
+
+    async def collect(tasks: Set[asyncio.Task]) -> List[str]:
+        lines = []
+        for task in tasks:
+            entry = task.result()
+            counts[entry["status"]] += 1
+            finished.append(entry)
+            lines.append(_format_entry(entry))
+        if len(finished) >= CHUNK_SIZE:
+            await _write_chunk(kind, batch_id, run, finished)
+        return lines
+
+    lease_task = asyncio.create_task(_renew_lease(batch_id, run))
+    try:
+        yield format_ndjson({"type": "batch", "batch_id": str(batch_id), "kind": kind,
+                             "run": run, "already_stored": len(stored)})
+
+        records = 0
+        async for line_number, record in iter_ndjson(chunks, MAX_LINE_BYTES):
+            key = _record_key(line_number, record)
+            if key in stored:
+                counts["skipped"] += 1
+                yield format_ndjson({"type": "skipped", "key": key, "line": line_number})
+                continue
+
+            records += 1
+            if records > MAX_RECORDS:
+                yield format_ndjson({"type": "error", "detail": f"Batches are limited to {MAX_RECORDS} records; "
+                                                                f"the rest of the upload was not processed."})
+                break
+
+            while len(pending) >= CONCURRENCY:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for line in await collect(done):
+                    yield line
+            pending.add(asyncio.create_task(_run_record(kind, key, line_number, record, user_id)))
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for line in await collect(done):
+                yield line
+
+        await _write_chunk(kind, batch_id, run, finished)
+        completed = True
+        yield format_ndjson({"type": "summary", "batch_id": str(batch_id), **counts})
+
+    finally:
+        lease_task.cancel()
+        for task in pending:
+            task.cancel()
+        # A client disconnect cancels this generator and would cancel these writes too;
+        # shielded, they finish even then.
+        await asyncio.shield(asyncio.ensure_future(
+            _finish_run(kind, batch_id, run, finished, "completed" if completed else "interrupted", counts)))
@@ -0,0 +1,235 @@
+import os
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+from backend.config.config import load_config
+from backend.db.db import get_database
+from backend.db.data.optimization_job_data import OptimizationJob
+from backend.db.service.optimization_prompt_service import create_optimized_prompt, validate_optimization_request
+from backend.llm_clients.usage_ledger import BUDGET_EXCEEDED_DETAIL
+from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.path_utils import resolve_path
+from backend.utils.request_context import current_user_id
+
+logger = logging.getLogger(__name__)
+
+config = load_config(resolve_path("config.yaml"))
+jobs_config = config.get("jobs", {})
+
+NUM_WORKERS = jobs_config.get("workers", 4)
+POLL_INTERVAL_SECONDS = jobs_config.get("poll_interval_seconds", 1.0)
+LEASE_SECONDS = jobs_config.get("lease_seconds", 120)
+MAX_ATTEMPTS = jobs_config.get("max_attempts", 3)
+RETRY_BACKOFF_SECONDS = jobs_config.get("retry_backoff_seconds", 10)
+# HTTP errors that clear up on their own: a rate limit queue timeout (429) or an open circuit (503).
+RETRYABLE_STATUS_CODES = {429, 503}
+
+_worker_tasks: List[asyncio.Task] = []
+_wakeup_event: Optional[asyncio.Event] = None
+
+
+def sanitize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove MongoDB '_id' and set 'id' from it."""
+    if "_id" in doc:
+        doc["id"] = str(doc["_id"])
+        del doc["_id"]
+    return doc
+
+async def enqueue_optimization_job(prompt_data: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validates the optimization request and stores it as a queued job.
+    Returns the job document immediately; a worker picks it up in the background.
+    """
+    validate_optimization_request(prompt_data)
+
+    db = get_database()
+
+    job = OptimizationJob(user_id=user_id, request=prompt_data)
+    doc = job.model_dump(by_alias=True)
+    doc.pop("_id", None)
+
+    result = await db.jobs.insert_one(doc)
+    logger.info("Enqueued optimization job with _id: %s", result.inserted_id)
+
+    if _wakeup_event is not None:
+        _wakeup_event.set()
+
+    doc.pop("_id", None)
+    doc["id"] = str(result.inserted_id)
+    return doc
+
+async def get_optimization_job(job_id: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+    """Retrieves a job document of the user by ID."""
+    db = get_database()
+
+    if not job_id:
+        handle_http_exception(400, "Job ID is required.")
+
+    try:
+        obj_id = ObjectId(job_id)
+    except InvalidId:
+        handle_http_exception(400, "Invalid job ID format.")
+
+    doc = await db.jobs.find_one({"_id": obj_id, "user_id": user_id})
+
+    if not doc:
+        handle_http_exception(404, "Job not found.")
+
+    return sanitize_document(doc)
+
+async def _claim_next_job(worker_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Atomically takes the oldest queued job that is not backing off, or a running job
+    whose lease has expired (its worker died or the process was restarted).
+    """
+    db = get_database()
+    now = datetime.utcnow()
+    return await db.jobs.find_one_and_update(
+        {"$or": [
+            {"state": "queued", "not_before": {"$not": {"$gt": now}}},
+            {"state": "running", "lease_expires_at": {"$lt": now}}
+        ]},
+        {
+            "$set": {
+                "state": "running",
+                "worker_id": worker_id,
+                "lease_expires_at": now + timedelta(seconds=LEASE_SECONDS),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", 1)],
+        return_document=True
+    )
+
+async def _update_job(job_id: ObjectId, worker_id: str, fields: Dict[str, Any]) -> None:
+    """
+    Updates a job only while this worker still holds it.
+    """
+    db = get_database()
+    fields["updated_at"] = datetime.utcnow()
+    await db.jobs.update_one({"_id": job_id, "worker_id": worker_id}, {"$set": fields})
+
+async def _renew_lease(job_id: ObjectId, worker_id: str) -> None:
+    """
+    Keeps extending the lease while the job is being processed.
+    """
+    while True:
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        await _update_job(job_id, worker_id, {
+            "lease_expires_at": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+        })
+
+def _is_retryable(error: Exception) -> bool:
+    """
+    Unexpected errors and transient HTTP errors are retried; invalid requests and an
+    exhausted daily budget fail right away.
+    """
+    if not isinstance(error, HTTPException):
+        return True
+    return error.status_code in RETRYABLE_STATUS_CODES and error.detail != BUDGET_EXCEEDED_DETAIL
+
+def _retry_fields(attempts: int) -> Dict[str, Any]:
+    """
+    Requeues a job with an exponential backoff: 'retry_backoff_seconds', doubled per attempt.
+    """
+    delay = RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return {"state": "queued", "stage": "queued", "lease_expires_at": None,
+            "not_before": datetime.utcnow() + timedelta(seconds=delay)}
+
+async def _run_job(job: Dict[str, Any], worker_id: str) -> None:
+    job_id = job["_id"]
+
+    if job["attempts"] > MAX_ATTEMPTS:
+        await _update_job(job_id, worker_id, {
+            "state": "failed",
+            "stage": "failed",
+            "error": job.get("error") or "Max attempts exceeded.",
+            "finished_at": datetime.utcnow()
+        })
+        return
+
+    async def on_progress(stage: str, progress: int) -> None:
+        await _update_job(job_id, worker_id, {"stage": stage, "progress": progress})
+
+    logger.info("Worker %s running optimization job %s (attempt %d).", worker_id, job_id, job["attempts"])
+    current_user_id.set(job.get("user_id"))
+    lease_task = asyncio.create_task(_renew_lease(job_id, worker_id))
+    try:
+        doc = await create_optimized_prompt(dict(job["request"]), on_progress=on_progress,
+                                            user_id=job.get("user_id"))
+        await _update_job(job_id, worker_id, {
+            "state": "succeeded",
+            "stage": "done",
+            "progress": 100,
+            "result_id": doc["id"],
+            "result": doc,
+            "error": None,
+            "finished_at": datetime.utcnow()
+        })
+        logger.info("Optimization job %s succeeded.", job_id)
+    except asyncio.CancelledError:
+        # Shutting down: hand the job back so the next worker (or the restarted process) resumes it.
+        await _update_job(job_id, worker_id, {"state": "queued", "stage": "queued", "lease_expires_at": None,
+                                              "not_before": None})
+        raise
+    except Exception as e:
+        retry = _is_retryable(e) and job["attempts"] < MAX_ATTEMPTS
+        logger.error("Optimization job %s failed on attempt %d: %s", job_id, job["attempts"], e)
+        fields = _retry_fields(job["attempts"]) if retry else \
+            {"state": "failed", "stage": "failed", "finished_at": datetime.utcnow()}
+        fields["error"] = str(e.detail) if isinstance(e, HTTPException) else str(e)
+        await _update_job(job_id, worker_id, fields)
+    finally:
+        lease_task.cancel()
+
+async def _worker_loop(worker_id: str) -> None:
+    while True:
+        try:
+            job = await _claim_next_job(worker_id)
+        except Exception as e:
+            logger.error("Worker %s failed to claim a job: %s", worker_id, e)
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(_wakeup_event.wait(), timeout=POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _wakeup_event.clear()
+            continue
+
+        await _run_job(job, worker_id)
+
+def start_job_workers(num_workers: int = NUM_WORKERS) -> None:
+    """
+    Starts the background optimization workers.
+    This function should be called on application startup.
+    """
+    global _wakeup_event
+    if _worker_tasks:
+        return
+
+    _wakeup_event = asyncio.Event()
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    for index in range(num_workers):
+        _worker_tasks.append(asyncio.create_task(_worker_loop(f"{prefix}-{index}")))
+    logger.info("Started %d optimization job workers.", num_workers)
+
+async def stop_job_workers() -> None:
+    """
+    Cancels the workers; jobs in progress are put back into the queue.
+    This function should be called on application shutdown.
+    """
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
+    logger.info("Optimization job workers stopped.")
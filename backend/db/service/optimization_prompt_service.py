@@ -1,20 +1,27 @@
 import logging
 from datetime import datetime
 from bson.errors import InvalidId
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional, Callable, Awaitable, AsyncIterator
 from bson import ObjectId
 
 from backend.config.config import load_config
 from backend.db.db import get_database
 from backend.db.data.optimized_prompt_data import OptimizedPrompt
-from backend.modules.automated_refinement_module import AutomatedRefinementModule
+from backend.modules.automated_refinement_module import AutomatedRefinementModule, OPTIMIZATION_TECHNIQUES, SC_MODES
 from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.pagination import build_projection, paginate
 from backend.utils.path_utils import resolve_path
-from backend.utils.validators import validate_required_fields, validate_provider_and_model
+from backend.utils.sse import format_sse
+from backend.utils.validators import validate_required_fields, validate_provider_and_model, validate_text_size
 
 logger = logging.getLogger(__name__)
 
 config = load_config(resolve_path("config.yaml"))
+refinement_config = config.get("iterative_refinement", {})
+race_config = config.get("race", {})
+
+# Fields returned by list_optimized_prompts unless 'fields' asks for others.
+SUMMARY_FIELDS = ["user_id", "user_query", "provider", "model", "technique", "final_optimized_query", "created_at"]
 
 def sanitize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
     """Remove MongoDB '_id' and set 'id' from it."""
@@ -23,32 +30,47 @@ def sanitize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
         del doc["_id"]
     return doc
 
-async def create_optimized_prompt(prompt_data: Dict[str, Any]) -> Dict[str, Any]:
+def validate_optimization_request(prompt_data: Dict[str, Any]) -> None:
     """
-    Inserts a new optimized prompt into the database, validates input, and performs query optimization.
+    Validates the fields required to run a query optimization.
     """
     required_fields = ["user_query", "provider", "model", "technique", "number_of_iterations"]
     validate_required_fields(prompt_data, required_fields)
     validate_provider_and_model(prompt_data["provider"], prompt_data["model"])
+    validate_text_size(prompt_data, "user_query", prompt_data["model"])
 
-    db = get_database()
+    if prompt_data["technique"] not in OPTIMIZATION_TECHNIQUES:
+        handle_http_exception(400, f"Technique '{prompt_data['technique']}' is not supported. "
+                                   f"Available: {OPTIMIZATION_TECHNIQUES}")
 
-    # Perform query optimization
-    refinement_module = AutomatedRefinementModule(
+    if prompt_data.get("sc_mode") is not None and prompt_data["sc_mode"] not in SC_MODES:
+        handle_http_exception(400, f"SC mode '{prompt_data['sc_mode']}' is not supported. Available: {SC_MODES}")
+
+    max_rounds = prompt_data.get("max_rounds")
+    if max_rounds is not None:
+        limit = refinement_config.get("max_rounds", 5)
+        if not isinstance(max_rounds, int) or isinstance(max_rounds, bool) or not 1 <= max_rounds <= limit:
+            handle_http_exception(400, f"'max_rounds' must be an integer between 1 and {limit}.")
+
+def _build_refinement_module(prompt_data: Dict[str, Any]) -> AutomatedRefinementModule:
+    return AutomatedRefinementModule(
         user_query=prompt_data["user_query"],
         provider=prompt_data["provider"],
         model=prompt_data["model"],
         prompts=config.get("prompts", {}),
-        max_iterations=prompt_data["number_of_iterations"]
+        max_iterations=prompt_data["number_of_iterations"],
+        bypass_cache=prompt_data.pop("bypass_cache", False),
+        sc_mode=prompt_data.pop("sc_mode", None)
     )
 
-    optimized_data = refinement_module.optimize_query(
-        selected_technique=prompt_data["technique"],
-        iterations=prompt_data["number_of_iterations"]
-    )
-
-    prompt_data["raw_output"] = optimized_data
-    prompt_data["final_optimized_query"] = refinement_module.final_optimized_query
+def _build_optimized_prompt_doc(prompt_data: Dict[str, Any], raw_output: Dict[str, Any],
+                                final_optimized_query: str,
+                                refinement_module: AutomatedRefinementModule) -> Dict[str, Any]:
+    """
+    Validates an optimization outcome as an OptimizedPrompt and returns the document to insert.
+    """
+    prompt_data["raw_output"] = raw_output
+    prompt_data["final_optimized_query"] = final_optimized_query
     prompt_data["expert_persona_text"] = refinement_module.expert_persona_text
     prompt_data["emotional_stimuli_text"] = refinement_module.emotional_stimuli_text
     prompt_data["created_at"] = datetime.utcnow()
@@ -59,6 +81,17 @@ async def create_optimized_prompt(prompt_data: Dict[str, Any]) -> Dict[str, Any]
     p_model = OptimizedPrompt.model_validate(prompt_data)
     doc = p_model.model_dump(by_alias=True)
     doc.pop("_id", None)
+    return doc
+
+async def _save_optimized_prompt(prompt_data: Dict[str, Any],
+                                 refinement_module: AutomatedRefinementModule) -> Dict[str, Any]:
+    """
+    Stores the outcome of a finished refinement module as an OptimizedPrompt document.
+    """
+    db = get_database()
+
+    doc = _build_optimized_prompt_doc(prompt_data, refinement_module.raw_output,
+                                      refinement_module.final_optimized_query, refinement_module)
 
     result = await db.optimized_prompts.insert_one(doc)
 
@@ -68,6 +101,144 @@ async def create_optimized_prompt(prompt_data: Dict[str, Any]) -> Dict[str, Any]
 
     return doc
 
+async def _run_optimization(prompt_data: Dict[str, Any]) -> AutomatedRefinementModule:
+    """
+    Runs the requested optimization (iteratively when 'max_rounds' > 1) and returns the finished module.
+    """
+    refinement_module = _build_refinement_module(prompt_data)
+    max_rounds = prompt_data.pop("max_rounds", None) or refinement_config.get("default_rounds", 1)
+
+    if max_rounds > 1:
+        await refinement_module.optimize_query_iteratively(
+            selected_technique=prompt_data["technique"],
+            iterations=prompt_data["number_of_iterations"],
+            max_rounds=max_rounds
+        )
+    else:
+        await refinement_module.optimize_query(
+            selected_technique=prompt_data["technique"],
+            iterations=prompt_data["number_of_iterations"]
+        )
+    return refinement_module
+
+async def build_optimized_prompt(prompt_data: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validates input and performs query optimization; returns the OptimizedPrompt
+    document without storing it (used by batches, which insert in chunks).
+    """
+    validate_optimization_request(prompt_data)
+    prompt_data["user_id"] = user_id
+    refinement_module = await _run_optimization(prompt_data)
+    return _build_optimized_prompt_doc(prompt_data, refinement_module.raw_output,
+                                       refinement_module.final_optimized_query, refinement_module)
+
+async def create_optimized_prompt(
+        prompt_data: Dict[str, Any],
+        on_progress: Optional[Callable[[str, int], Awaitable[None]]] = None,
+        user_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Inserts a new optimized prompt into the database, validates input, and performs query optimization.
+    'on_progress' is awaited with (stage, percent) as the optimization advances.
+    """
+    validate_optimization_request(prompt_data)
+    prompt_data["user_id"] = user_id
+
+    if on_progress:
+        await on_progress("optimizing", 10)
+
+    # Perform query optimization
+    refinement_module = await _run_optimization(prompt_data)
+
+    if on_progress:
+        await on_progress("saving", 90)
+
+    return await _save_optimized_prompt(prompt_data, refinement_module)
+
+async def stream_optimized_prompt(prompt_data: Dict[str, Any], user_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Runs the optimization while streaming it as server-sent events:
+    'token' for each text delta, 'final_query' as soon as the Final_Optimized_Query
+    is complete, 'result' with the stored document and 'error' on failure.
+    The request must already be validated with validate_optimization_request.
+    Streaming always runs a single round; 'max_rounds' is ignored.
+    """
+    prompt_data["user_id"] = user_id
+    prompt_data.pop("max_rounds", None)
+    refinement_module = _build_refinement_module(prompt_data)
+    try:
+        async for event in refinement_module.stream_optimize_query(
+            selected_technique=prompt_data["technique"],
+            iterations=prompt_data["number_of_iterations"]
+        ):
+            if event["type"] == "delta":
+                yield format_sse("token", {"text": event["text"]})
+            elif event["type"] == "final_query":
+                yield format_sse("final_query", {"final_optimized_query": event["Final_Optimized_Query"]})
+
+        doc = await _save_optimized_prompt(prompt_data, refinement_module)
+        yield format_sse("result", doc)
+    except Exception as e:
+        logger.exception("Streaming optimization failed: %s", e)
+        yield format_sse("error", {"detail": getattr(e, "detail", str(e))})
+
+def validate_race_request(race_data: Dict[str, Any]) -> None:
+    """
+    Validates a technique race: the optimization fields plus 'techniques', a list of
+    distinct supported techniques (the configured defaults when omitted).
+    """
+    validate_required_fields(race_data, ["user_query", "provider", "model", "number_of_iterations"])
+    validate_provider_and_model(race_data["provider"], race_data["model"])
+    validate_text_size(race_data, "user_query", race_data["model"])
+
+    techniques = race_data.setdefault("techniques", race_config.get("default_techniques", OPTIMIZATION_TECHNIQUES))
+    if not isinstance(techniques, list) or not techniques or len(set(techniques)) != len(techniques):
+        handle_http_exception(400, "'techniques' must be a non-empty list of distinct techniques.")
+    unsupported = [t for t in techniques if t not in OPTIMIZATION_TECHNIQUES or t not in config.get("prompts", {})]
+    if unsupported:
+        handle_http_exception(400, f"Techniques {unsupported} are not supported. Available: {OPTIMIZATION_TECHNIQUES}")
+
+    if race_data.get("sc_mode") is not None and race_data["sc_mode"] not in SC_MODES:
+        handle_http_exception(400, f"SC mode '{race_data['sc_mode']}' is not supported. Available: {SC_MODES}")
+
+async def race_optimized_prompts(race_data: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Runs the requested techniques concurrently on one query with a shared expert persona,
+    optionally rates each result ('evaluate'), stores every successful result as an
+    OptimizedPrompt and returns them ranked, together with the combined usage.
+    """
+    validate_race_request(race_data)
+    techniques = race_data.pop("techniques")
+    evaluate = bool(race_data.pop("evaluate", race_config.get("evaluate", True)))
+    race_data["user_id"] = user_id
+
+    refinement_module = _build_refinement_module(race_data)
+    race = await refinement_module.race_techniques(techniques, race_data["number_of_iterations"], evaluate)
+
+    finished = [entry for entry in race["results"] if entry["error"] is None]
+    docs = [
+        _build_optimized_prompt_doc({**race_data, "technique": entry["technique"]}, entry["raw_output"],
+                                    entry["final_optimized_query"], refinement_module)
+        for entry in finished
+    ]
+    if docs:
+        db = get_database()
+        result = await db.optimized_prompts.insert_many(docs)
+        for entry, doc, inserted_id in zip(finished, docs, result.inserted_ids):
+            doc["id"] = str(inserted_id)
+            doc.pop("_id", None)
+            entry["optimized_prompt"] = doc
+            entry.pop("raw_output")
+        logger.info("Stored %d optimized prompts from a race of %s.", len(docs), techniques)
+
+    return {
+        "user_query": race_data["user_query"],
+        "evaluated": evaluate,
+        "expert_persona_text": race["expert_persona_text"],
+        "results": race["results"],
+        "usage": race["usage"]
+    }
+
 async def get_optimized_prompt(prompt_id: str) -> Dict[str, Any]:
     """Retrieves an optimized prompt document by ID."""
     db = get_database()
@@ -87,12 +258,34 @@ async def get_optimized_prompt(prompt_id: str) -> Dict[str, Any]:
 
     return sanitize_document(doc)
 
-async def list_optimized_prompts(limit: int = 10) -> List[Dict[str, Any]]:
-    """Returns a list of optimized prompts, excluding deleted, up to 'limit'."""
+async def list_optimized_prompts(
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order: str = "desc",
+        user_id: Optional[str] = None,
+        technique: Optional[str] = None,
+        model: Optional[str] = None,
+        fields: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Returns a page of optimized prompts, excluding deleted, ordered by creation time.
+    Pass the returned 'next_cursor' back as 'cursor' to get the following page.
+    """
     db = get_database()
-    cursor = db.optimized_prompts.find({"is_deleted": False}).limit(limit)
-    docs = await cursor.to_list(length=limit)
-    return [sanitize_document(d) for d in docs]
+
+    query: Dict[str, Any] = {"is_deleted": False}
+    if user_id:
+        query["user_id"] = user_id
+    if technique:
+        query["technique"] = technique
+    if model:
+        query["model"] = model
+
+    docs, next_cursor = await paginate(
+        db.optimized_prompts, query, limit=limit, cursor=cursor, order=order,
+        projection=build_projection(fields, SUMMARY_FIELDS)
+    )
+    return {"items": [sanitize_document(d) for d in docs], "next_cursor": next_cursor}
 
 async def update_optimized_prompt(prompt_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
     """Updates an existing optimized prompt document."""
@@ -2,7 +2,7 @@ import logging
 from datetime import datetime
 
 from bson.errors import InvalidId
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, Optional
 
 from bson import ObjectId
 
@@ -11,13 +11,19 @@ from backend.db.data.prompt_evaluator_data import PromptEvaluator
 from backend.db.db import get_database
 from backend.modules.evaluator_module import Evaluator
 from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.pagination import build_projection, paginate
 from backend.utils.path_utils import resolve_path
-from backend.utils.validators import validate_required_fields, validate_provider_and_model
+from backend.utils.sse import format_sse
+from backend.utils.validators import validate_required_fields, validate_provider_and_model, validate_text_size
 
 logger = logging.getLogger(__name__)
 
 config = load_config(resolve_path("config.yaml"))
 
+# Fields returned by list_prompt_evaluations unless 'fields' asks for others.
+SUMMARY_FIELDS = ["user_id", "user_query", "evaluation_method", "provider", "model",
+                  "user_verdict_after_comparison", "chosen_model_after_blind_results", "created_at"]
+
 def sanitize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
     """
     Remove internal _id from the document, set 'id' from it.
@@ -27,16 +33,16 @@ def sanitize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
         del doc["_id"]
     return doc
 
-async def create_prompt_evaluation(evaluation_data: Dict[str, Any]) -> Dict[str, Any]:
+async def build_prompt_evaluation(evaluation_data: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
     """
-    Inserts a new prompt evaluation into the database, validates input, and performs AI evaluation.
+    Validates input and performs AI evaluation; returns the PromptEvaluator document
+    without storing it (used by batches, which insert in chunks).
     """
     # Validate input data
     required_fields = ["user_query", "provider", "model", "evaluation_method"]
     validate_required_fields(evaluation_data, required_fields)
     validate_provider_and_model(evaluation_data["provider"], evaluation_data["model"])
-
-    db = get_database()
+    validate_text_size(evaluation_data, "user_query", evaluation_data["model"])
 
     provider = evaluation_data["provider"]
     evaluator = Evaluator(
@@ -44,11 +50,13 @@ async def create_prompt_evaluation(evaluation_data: Dict[str, Any]) -> Dict[str,
         provider=provider,
         model=evaluation_data["model"],
         human_evaluation=(evaluation_data["evaluation_method"] == "human"),
-        prompts=config.get("prompts", {})
+        prompts=config.get("prompts", {}),
+        bypass_cache=evaluation_data.pop("bypass_cache", False)
     )
 
     evaluation_result = await evaluator.evaluate()
     evaluation_data["evaluation_result"] = evaluation_result
+    evaluation_data["user_id"] = user_id
     evaluation_data["created_at"] = datetime.utcnow()
     evaluation_data["updated_at"] = datetime.utcnow()
     evaluation_data["is_deleted"] = False
@@ -56,7 +64,15 @@ async def create_prompt_evaluation(evaluation_data: Dict[str, Any]) -> Dict[str,
     p_model = PromptEvaluator.model_validate(evaluation_data)
     doc = p_model.model_dump(by_alias=True)
     doc.pop("_id", None)
+    return doc
 
+async def create_prompt_evaluation(evaluation_data: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Inserts a new prompt evaluation into the database, validates input, and performs AI evaluation.
+    """
+    doc = await build_prompt_evaluation(evaluation_data, user_id=user_id)
+
+    db = get_database()
     result = await db.prompt_evaluator.insert_one(doc)
 
     doc.pop("_id", None)
@@ -65,31 +81,14 @@ async def create_prompt_evaluation(evaluation_data: Dict[str, Any]) -> Dict[str,
 
     return doc
 
-async def create_comparison(evaluation_data: Dict[str, Any]) -> Dict[str, Any]:
+async def _insert_evaluation(evaluation_data: Dict[str, Any], label: str,
+                             user_id: Optional[str] = None) -> Dict[str, Any]:
     """
-    Inserts a new prompt evaluation into the database, validates input, and performs AI comparison.
+    Stamps, validates and inserts an evaluation document into 'prompt_evaluator'.
     """
-    # Validate input data
-    required_fields = ["user_query", "provider", "model", "optimized_user_query"]
-    validate_required_fields(evaluation_data, required_fields)
-    validate_provider_and_model(evaluation_data["provider"], evaluation_data["model"])
-
     db = get_database()
 
-    # Perform evaluation using AI
-    provider = evaluation_data["provider"]
-    evaluator = Evaluator(
-        user_query=evaluation_data["user_query"],
-        provider=provider,
-        model=evaluation_data["model"],
-        prompts=config.get("prompts", {}),
-        optimized_user_query = evaluation_data["optimized_user_query"]
-    )
-
-    evaluation_data["evaluation_method"] = "llm"
-
-    parsed_raw_result = await evaluator.compare()
-    evaluation_data["parsed_result_after_comparison"] = parsed_raw_result
+    evaluation_data["user_id"] = user_id
     evaluation_data["created_at"] = datetime.utcnow()
     evaluation_data["updated_at"] = datetime.utcnow()
     evaluation_data["is_deleted"] = False
@@ -104,46 +103,121 @@ async def create_comparison(evaluation_data: Dict[str, Any]) -> Dict[str, Any]:
 
     doc.pop("_id", None)
     doc["id"] = str(result.inserted_id)
-    logger.info("Created new prompt comparison with _id: %s", result.inserted_id)
+    logger.info("Created new %s with _id: %s", label, result.inserted_id)
 
     return doc
 
-async def create_blind_outputs(evaluation_data: Dict[str, Any]) -> Dict[str, Any]:
+def validate_comparison_request(evaluation_data: Dict[str, Any]) -> None:
+    """
+    Validates the fields required to run an AI comparison.
+    """
+    required_fields = ["user_query", "provider", "model", "optimized_user_query"]
+    validate_required_fields(evaluation_data, required_fields)
+    validate_provider_and_model(evaluation_data["provider"], evaluation_data["model"])
+    validate_text_size(evaluation_data, "user_query", evaluation_data["model"])
+    validate_text_size(evaluation_data, "optimized_user_query", evaluation_data["model"])
+
+def _build_comparison_evaluator(evaluation_data: Dict[str, Any]) -> Evaluator:
+    evaluation_data["evaluation_method"] = "llm"
+    return Evaluator(
+        user_query=evaluation_data["user_query"],
+        provider=evaluation_data["provider"],
+        model=evaluation_data["model"],
+        prompts=config.get("prompts", {}),
+        optimized_user_query = evaluation_data["optimized_user_query"],
+        bypass_cache=evaluation_data.pop("bypass_cache", False)
+    )
+
+async def create_comparison(evaluation_data: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Inserts a new prompt evaluation into the database, validates input, and performs AI comparison.
+    """
+    validate_comparison_request(evaluation_data)
 
+    # Perform evaluation using AI
+    evaluator = _build_comparison_evaluator(evaluation_data)
+
+    parsed_raw_result = await evaluator.compare()
+    evaluation_data["parsed_result_after_comparison"] = parsed_raw_result
+
+    return await _insert_evaluation(evaluation_data, "prompt comparison", user_id)
+
+async def stream_comparison(evaluation_data: Dict[str, Any], user_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Runs the AI comparison while streaming both responses as server-sent events:
+    'token' (tagged with the target field) for each delta, 'result' with the stored
+    document and 'error' on failure. The request must already be validated.
+    """
+    evaluator = _build_comparison_evaluator(evaluation_data)
+    try:
+        async for event in evaluator.stream_compare():
+            if event["type"] == "delta":
+                yield format_sse("token", {"target": event["target"], "text": event["text"]})
+            else:
+                evaluation_data["parsed_result_after_comparison"] = event["parsed_result_after_comparison"]
+
+        doc = await _insert_evaluation(evaluation_data, "prompt comparison", user_id)
+        yield format_sse("result", doc)
+    except Exception as e:
+        logger.exception("Streaming comparison failed: %s", e)
+        yield format_sse("error", {"detail": getattr(e, "detail", str(e))})
+
+def validate_blind_outputs_request(evaluation_data: Dict[str, Any]) -> None:
+    """
+    Validates the fields required to generate blind results.
+    """
     required_fields = ["user_query", "num_versions"]
     validate_required_fields(evaluation_data, required_fields)
+    validate_text_size(evaluation_data, "user_query")
 
-    db = get_database()
-
-    provider = "openai"
-    evaluator = Evaluator(
+def _build_blind_outputs_evaluator(evaluation_data: Dict[str, Any]) -> Evaluator:
+    evaluation_data["evaluation_method"] = "llm"
+    evaluation_data["provider"] = "openai"
+    evaluation_data["model"] = "gpt-3.5-turbo"
+    return Evaluator(
         user_query=evaluation_data["user_query"],
-        provider=provider,
-        model="gpt-3.5-turbo",
+        provider=evaluation_data["provider"],
+        model=evaluation_data["model"],
         prompts=config.get("prompts", {}),
+        bypass_cache=evaluation_data.pop("bypass_cache", False)
     )
 
-    evaluation_data["evaluation_method"] = "llm"
+async def create_blind_outputs(evaluation_data: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
 
-    parsed_raw_result = await evaluator.generate_blind_results(evaluation_data["user_query"], evaluation_data["num_versions"])
-    evaluation_data["blind_results"] = parsed_raw_result
-    evaluation_data["provider"] = provider
-    evaluation_data["model"] = "gpt-3.5-turbo"
-    evaluation_data["created_at"] = datetime.utcnow()
-    evaluation_data["updated_at"] = datetime.utcnow()
-    evaluation_data["is_deleted"] = False
+    validate_blind_outputs_request(evaluation_data)
 
-    p_model = PromptEvaluator.model_validate(evaluation_data)
-    doc = p_model.model_dump(by_alias=True)
-    doc.pop("_id", None)
+    evaluator = _build_blind_outputs_evaluator(evaluation_data)
 
-    result = await db.prompt_evaluator.insert_one(doc)
+    parsed_raw_result = await evaluator.generate_blind_results(evaluation_data["user_query"], evaluation_data["num_versions"])
+    evaluation_data["blind_results"] = parsed_raw_result
 
-    doc.pop("_id", None)
-    doc["id"] = str(result.inserted_id)
-    logger.info("Created new blind results with _id: %s", result.inserted_id)
+    return await _insert_evaluation(evaluation_data, "blind results", user_id)
 
-    return doc
+async def stream_blind_outputs(evaluation_data: Dict[str, Any], user_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Generates blind results while streaming every model's output as server-sent events:
+    'token' (tagged with the version index) for each delta, 'version_done' when one
+    model finishes, 'version_error' when one fails or times out, 'result' with the
+    stored document and 'error' on failure.
+    """
+    evaluator = _build_blind_outputs_evaluator(evaluation_data)
+    try:
+        async for event in evaluator.stream_blind_results(evaluation_data["user_query"],
+                                                          evaluation_data["num_versions"]):
+            if event["type"] == "delta":
+                yield format_sse("token", {"version": event["version"], "text": event["text"]})
+            elif event["type"] == "version_done":
+                yield format_sse("version_done", {"version": event["version"]})
+            elif event["type"] == "version_error":
+                yield format_sse("version_error", {"version": event["version"], "status": event["status"]})
+            else:
+                evaluation_data["blind_results"] = event["blind_results"]
+
+        doc = await _insert_evaluation(evaluation_data, "blind results", user_id)
+        yield format_sse("result", doc)
+    except Exception as e:
+        logger.exception("Streaming blind results failed: %s", e)
+        yield format_sse("error", {"detail": getattr(e, "detail", str(e))})
 
 async def get_prompt_evaluation(evaluation_id: str) -> Dict[str, Any]:
     """
@@ -166,14 +240,34 @@ async def get_prompt_evaluation(evaluation_id: str) -> Dict[str, Any]:
 
     return sanitize_document(doc)
 
-async def list_prompt_evaluations(limit: int = 10) -> List[Dict[str, Any]]:
+async def list_prompt_evaluations(
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order: str = "desc",
+        user_id: Optional[str] = None,
+        evaluation_method: Optional[str] = None,
+        model: Optional[str] = None,
+        fields: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    Return a list of prompt evaluations, excluding deleted, up to 'limit'.
+    Return a page of prompt evaluations, excluding deleted, ordered by creation time.
+    Pass the returned 'next_cursor' back as 'cursor' to get the following page.
     """
     db = get_database()
-    cursor = db.prompt_evaluator.find({"is_deleted": False}).limit(limit)
-    docs = await cursor.to_list(length=limit)
-    return [sanitize_document(d) for d in docs]
+
+    query: Dict[str, Any] = {"is_deleted": False}
+    if user_id:
+        query["user_id"] = user_id
+    if evaluation_method:
+        query["evaluation_method"] = evaluation_method
+    if model:
+        query["model"] = model
+
+    docs, next_cursor = await paginate(
+        db.prompt_evaluator, query, limit=limit, cursor=cursor, order=order,
+        projection=build_projection(fields, SUMMARY_FIELDS)
+    )
+    return {"items": [sanitize_document(d) for d in docs], "next_cursor": next_cursor}
 
 async def update_prompt_evaluation(evaluation_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
     """
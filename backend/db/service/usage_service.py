@@ -0,0 +1,101 @@
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from backend.db.db import get_database
+from backend.llm_clients.ai_client_factory import get_usage_ledger
+from backend.utils.http_error_handler import handle_http_exception
+
+logger = logging.getLogger(__name__)
+
+GROUP_BY_FIELDS = ["user_id", "technique", "provider", "model"]
+
+def parse_group_by(group_by: Optional[str]) -> List[str]:
+    """
+    Splits a comma-separated 'group_by' and checks every field can be grouped on.
+    """
+    fields = [field.strip() for field in (group_by or "").split(",") if field.strip()]
+    unknown = [field for field in fields if field not in GROUP_BY_FIELDS]
+    if unknown:
+        handle_http_exception(400, f"Cannot group usage by {unknown}. Available: {GROUP_BY_FIELDS}")
+    return fields
+
+async def aggregate_usage(
+        group_by: Optional[str] = "user_id,technique,model",
+        user_id: Optional[str] = None,
+        technique: Optional[str] = None,
+        model: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Sums calls, tokens, cost and latency of the usage ledger per group, most expensive first.
+    'tokens_per_second' is the output throughput over all calls of the group and
+    'cache_hit_rate' the share of input tokens served from the provider's prompt cache.
+    """
+    fields = parse_group_by(group_by)
+
+    # Entries still buffered in this process count too.
+    ledger = get_usage_ledger()
+    if ledger is not None:
+        await ledger.flush()
+
+    match: Dict[str, Any] = {}
+    if user_id:
+        match["user_id"] = user_id
+    if technique:
+        match["technique"] = technique
+    if model:
+        match["model"] = model
+    if since or until:
+        match["created_at"] = {}
+        if since:
+            match["created_at"]["$gte"] = since
+        if until:
+            match["created_at"]["$lt"] = until
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {field: f"${field}" for field in fields} or None,
+            "calls": {"$sum": 1},
+            "input_tokens": {"$sum": "$input_tokens"},
+            "output_tokens": {"$sum": "$output_tokens"},
+            "cached_tokens": {"$sum": "$cached_tokens"},
+            "cache_write_tokens": {"$sum": "$cache_write_tokens"},
+            "tokens_spent": {"$sum": "$tokens_spent"},
+            "cost_usd": {"$sum": "$cost_usd"},
+            "time_in_seconds": {"$sum": "$time_in_seconds"},
+            "first_call_at": {"$min": "$created_at"},
+            "last_call_at": {"$max": "$created_at"}
+        }},
+        {"$sort": {"cost_usd": -1, "tokens_spent": -1}}
+    ]
+
+    db = get_database()
+    results = []
+    async for row in db.usage_ledger.aggregate(pipeline):
+        group = row.pop("_id") or {}
+        row["cost_usd"] = round(row["cost_usd"], 6)
+        row["time_in_seconds"] = round(row["time_in_seconds"], 3)
+        row["cache_hit_rate"] = round(row["cached_tokens"] / row["input_tokens"], 3) if row["input_tokens"] else None
+        row["tokens_per_second"] = round(row["output_tokens"] / row["time_in_seconds"], 1) \
+            if row["time_in_seconds"] else None
+        results.append({**group, **row})
+    return results
+
+async def get_usage_budget(user_id: str) -> Dict[str, Any]:
+    """
+    The user's spend since midnight UTC and what is left of the daily budget.
+    """
+    ledger = get_usage_ledger()
+    if ledger is None:
+        handle_http_exception(404, "Usage recording is disabled.")
+
+    spent = await ledger.spent_today(user_id)
+    budget = ledger.daily_budget_usd
+    return {
+        "spent_today_usd": round(spent, 6),
+        "daily_budget_usd": budget,
+        "remaining_usd": round(max(0.0, budget - spent), 6) if budget is not None else None
+    }
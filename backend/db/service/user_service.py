@@ -4,18 +4,15 @@ from typing import Dict, Any
 
 from bson import ObjectId
 from bson.errors import InvalidId
-from passlib.context import CryptContext
 
 from backend.db.db import get_database
 from backend.db.data.user_data import User
 from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.password_hasher import get_password_hasher
 from backend.utils.validators import validate_required_fields
 
 logger = logging.getLogger(__name__)
 
-# Create a CryptContext for hashing. This example uses bcrypt.
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def sanitize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
     """
     Replaces '_id' with 'id' in the returned doc.
@@ -44,8 +41,8 @@ async def create_user(user_data: Dict[str, Any]) -> Dict[str, Any]:
     if existing:
         handle_http_exception(400, f"Email '{user_data['email']}' is already in use.")
 
-    # Hash the password
-    hashed_password = pwd_context.hash(user_data["password"])
+    # Hash the password off the event loop
+    hashed_password = await get_password_hasher().hash(user_data["password"])
     user_data["password"] = hashed_password
 
     user_data["created_at"] = datetime.utcnow()
@@ -78,9 +75,19 @@ async def authenticate_user(email: str, password: str) -> Dict[str, Any]:
 
     # Compare hashed passwords
     hashed_password = user_doc["password"]
-    if not pwd_context.verify(password, hashed_password):
+    valid, new_hash = await get_password_hasher().verify_and_update(password, hashed_password)
+    if not valid:
         handle_http_exception(401, "Invalid email or password.")
 
+    # The stored hash used an outdated cost factor: replace it while we have the plain password.
+    if new_hash:
+        await users_coll.update_one(
+            {"_id": user_doc["_id"], "password": hashed_password},
+            {"$set": {"password": new_hash, "updated_at": datetime.utcnow()}}
+        )
+        logger.info("Rehashed password of user %s with the current cost factor.", user_doc["_id"])
+        user_doc["password"] = new_hash
+
     return sanitize_document(user_doc)
 
 async def get_user_by_id(user_id: str) -> Dict[str, Any]:
@@ -9,3 +9,14 @@ _config = load_config(CONFIG_PATH)
 # Expose MongoDB settings from the YAML configuration.
 MONGO_URI = _config["database"]["uri"]
 DB_NAME = _config["database"]["database_name"]
+
+# Connection pool options passed to the Motor client.
+_pool_config = _config["database"].get("pool", {})
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": _pool_config.get("max_pool_size", 100),
+    "minPoolSize": _pool_config.get("min_pool_size", 0),
+    "maxIdleTimeMS": _pool_config.get("max_idle_time_ms", 300000),
+    "compressors": ",".join(_pool_config.get("compressors", ["zstd", "snappy"])),
+    "readPreference": _pool_config.get("read_preference", "primaryPreferred"),
+    "serverSelectionTimeoutMS": _pool_config.get("server_selection_timeout_ms", 5000)
+}
@@ -29,8 +29,15 @@ def test_list_evaluations():
     response = client.get("/evaluations/?limit=5")
     assert response.status_code == 200, response.text
     data = response.json()
-    assert isinstance(data, list)
-    assert len(data) <= 5
+    assert isinstance(data["items"], list)
+    assert len(data["items"]) <= 5
+    for item in data["items"]:
+        assert "blind_results" not in item, "Summary rows should not carry blind_results"
+
+    if data["next_cursor"]:
+        next_page = client.get(f"/evaluations/?limit=5&cursor={data['next_cursor']}").json()
+        seen = {item["id"] for item in data["items"]}
+        assert not seen & {item["id"] for item in next_page["items"]}
 
 
 def test_update_evaluation():
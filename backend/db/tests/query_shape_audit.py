@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from backend.db.db import get_database
+from backend.db.indexes import ensure_indexes
+
+# (collection, filter, sort) for every query the services issue.
+QUERY_SHAPES: List[Tuple[str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("users", {"email": "audit@example.com", "is_deleted": False}, None),
+    ("users", {"_id": ObjectId(), "is_deleted": False}, None),
+    ("optimized_prompts", {"_id": ObjectId(), "is_deleted": False}, None),
+    ("optimized_prompts", {"is_deleted": False}, [("created_at", -1), ("_id", -1)]),
+    ("optimized_prompts", {"is_deleted": False, "user_id": "audit"}, [("created_at", -1), ("_id", -1)]),
+    ("optimized_prompts", {"is_deleted": False, "technique": "CoT"}, [("created_at", 1), ("_id", 1)]),
+    ("prompt_evaluator", {"_id": ObjectId(), "is_deleted": False}, None),
+    ("prompt_evaluator", {"is_deleted": False}, [("created_at", -1), ("_id", -1)]),
+    ("prompt_evaluator", {"is_deleted": False, "user_id": "audit"}, [("created_at", -1), ("_id", -1)]),
+    ("jobs", {"_id": ObjectId(), "user_id": "audit"}, None),
+    ("jobs", {"$or": [{"state": "queued", "not_before": {"$not": {"$gt": datetime.utcnow()}}}, {"state": "running", "lease_expires_at": {"$lt": datetime.utcnow()}}]},
+     [("created_at", 1)]),
+    ("usage_ledger", {"user_id": "audit", "created_at": {"$gte": datetime.utcnow()}}, None),
+    ("usage_ledger", {"created_at": {"$gte": datetime.utcnow()}}, None),
+    ("batches", {"_id": ObjectId(), "user_id": "audit", "kind": "optimization"}, None),
+    ("batch_items", {"batch_id": ObjectId(), "status": "succeeded"}, None),
+    ("batch_items", {"batch_id": ObjectId(), "key": "line:1"}, None),
+]
+
+
+def collect_stages(plan: Dict[str, Any]) -> List[str]:
+    """
+    Returns every stage name in an explain() plan tree.
+    """
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(collect_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(collect_stages(child))
+    return [s for s in stages if s]
+
+
+async def explain_query(collection: str, query: Dict[str, Any],
+                        sort: Optional[List[Tuple[str, int]]] = None) -> List[str]:
+    """
+    Runs explain() for a query shape and returns the stages of the winning plan.
+    """
+    cursor = get_database()[collection].find(query).limit(1)
+    if sort:
+        cursor = cursor.sort(sort)
+    explanation = await cursor.explain()
+    return collect_stages(explanation["queryPlanner"]["winningPlan"])
+
+
+async def audit_query_shapes() -> List[Tuple[str, Dict[str, Any], List[str]]]:
+    """
+    Ensures the indexes exist and returns (collection, filter, stages) for every
+    query shape that still falls back to a collection scan.
+    """
+    await ensure_indexes(get_database())
+    failures = []
+    for collection, query, sort in QUERY_SHAPES:
+        stages = await explain_query(collection, query, sort)
+        if "COLLSCAN" in stages:
+            failures.append((collection, query, stages))
+    return failures
+
+
+def test_no_collection_scans():
+    failures = asyncio.run(audit_query_shapes())
+    assert not failures, f"Queries doing a COLLSCAN: {failures}"
+
+
+if __name__ == "__main__":
+    for failure in asyncio.run(audit_query_shapes()):
+        print("COLLSCAN >>", failure)
@@ -1,26 +1,250 @@
 import logging
-from backend.config.config import load_config
-from backend.llm_clients.clients import OpenAIClient, AnthropicClient
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+from backend.config.config import load_config, get_api_key
+from backend.llm_clients.batch_clients import BatchAIClient, OpenAIBatchClient, AnthropicBatchClient
+from backend.llm_clients.circuit_breaker import CircuitBreakers, CircuitBreakingAIClient
+from backend.llm_clients.clients import AIClient, OpenAIClient, AnthropicClient
+from backend.llm_clients.hedging import HedgePolicy, HedgingAIClient
+from backend.llm_clients.rate_limiter import RateLimiter, RateLimitedAIClient
+from backend.llm_clients.response_cache import CachingAIClient, TieredResponseCache, build_response_cache
+from backend.llm_clients.single_flight import SingleFlightAIClient
+from backend.llm_clients.token_budget import TokenBudgetPlanner
+from backend.llm_clients.usage_ledger import UsageLedger, UsageLedgerAIClient
 from backend.utils.path_utils import resolve_path
 
 logger = logging.getLogger(__name__)
 
+# Long-lived clients, one per (provider, api key), sharing a single HTTP connection pool.
+_clients: Dict[Tuple[str, str], AIClient] = {}
+# Provider batch clients for offline runs, one per provider.
+_batch_clients: Dict[str, BatchAIClient] = {}
+_api_keys: Dict[str, str] = {}
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_response_cache: Optional[TieredResponseCache] = None
+_rate_limiter: Optional[RateLimiter] = None
+_hedge_policy: Optional[HedgePolicy] = None
+_circuit_breakers: Optional[CircuitBreakers] = None
+_usage_ledger: Optional[UsageLedger] = None
+_token_planner: Optional[TokenBudgetPlanner] = None
+_config: Optional[Dict[str, Any]] = None
 
-def get_ai_client(provider: str):
+
+def _build_http_clients(pool_config: Dict[str, Any]) -> Tuple[httpx.Client, httpx.AsyncClient]:
     """
-    Returns an AI client instance based on the provider.
+    Builds the shared sync and async httpx clients from the 'http_pool' config section.
     """
-    config = load_config(resolve_path("config.yaml"))
-    api_key = config["api_keys"].get(provider)
+    limits = httpx.Limits(
+        max_connections=pool_config.get("max_connections", 100),
+        max_keepalive_connections=pool_config.get("max_keepalive_connections", 20),
+        keepalive_expiry=pool_config.get("keepalive_expiry", 30.0)
+    )
+    timeout = httpx.Timeout(pool_config.get("timeout", 120.0), connect=pool_config.get("connect_timeout", 10.0))
+    http2 = pool_config.get("http2", True)
+
+    return (
+        httpx.Client(limits=limits, timeout=timeout, http2=http2),
+        httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+    )
 
-    if not api_key:
-        logger.error("API key for %s not found.", provider)
-        raise ValueError(f"API key for {provider} not provided.")
 
-    if provider.lower() == "openai":
-        return OpenAIClient(api_key=api_key)
-    elif provider.lower() == "claude":
-        return AnthropicClient(api_key=api_key)
+def _create_client(provider: str, api_key: str) -> AIClient:
+    """
+    Creates a provider client bound to the shared connection pool, behind the
+    usage ledger, rate limiter, circuit breaker, hedging, request coalescing and the response cache
+    when they are enabled.
+    """
+    on_retry_after = None
+    if _rate_limiter is not None:
+        on_retry_after = lambda model, seconds: _rate_limiter.pause(provider, model, seconds)
+
+    if provider == "openai":
+        client = OpenAIClient(api_key=api_key, http_client=_http_client, async_http_client=_async_http_client,
+                              on_retry_after=on_retry_after, token_planner=_token_planner)
+    elif provider == "claude":
+        client = AnthropicClient(api_key=api_key, http_client=_http_client, async_http_client=_async_http_client,
+                                 on_retry_after=on_retry_after, token_planner=_token_planner,
+                                 prompt_caching=_config.get("prompt_caching", {}).get("enabled", True))
     else:
         logger.error("Unsupported AI provider: %s", provider)
         raise ValueError(f"Unsupported AI provider: {provider}")
+
+    if _usage_ledger is not None:
+        client = UsageLedgerAIClient(client, provider, _usage_ledger)
+    if _rate_limiter is not None:
+        client = RateLimitedAIClient(client, provider, _rate_limiter)
+    if _circuit_breakers is not None:
+        client = CircuitBreakingAIClient(client, provider, _circuit_breakers)
+    if _hedge_policy is not None:
+        client = HedgingAIClient(client, provider, _hedge_policy)
+    if _config.get("single_flight", {}).get("enabled", True):
+        client = SingleFlightAIClient(client, provider)
+    if _response_cache is not None:
+        client = CachingAIClient(client, provider, _response_cache)
+    return client
+
+
+def init_ai_clients(config: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Loads the configuration once and builds one client per configured provider.
+    This function should be called on application startup.
+    """
+    global _config, _http_client, _async_http_client, _response_cache, _rate_limiter, _hedge_policy, \
+        _circuit_breakers, _usage_ledger, _token_planner
+    if _config is not None:
+        return
+
+    _config = config or load_config(resolve_path("config.yaml"))
+    _http_client, _async_http_client = _build_http_clients(_config.get("http_pool", {}))
+
+    cache_config = _config.get("response_cache", {})
+    if cache_config.get("enabled", True):
+        _response_cache = build_response_cache(cache_config)
+
+    limits_config = _config.get("rate_limits", {})
+    if limits_config.get("enabled", True):
+        _rate_limiter = RateLimiter(limits_config)
+
+    hedging_config = _config.get("hedging", {})
+    if hedging_config.get("enabled", False):
+        _hedge_policy = HedgePolicy(hedging_config, _config.get("models", {}))
+
+    breaker_config = _config.get("circuit_breaker", {})
+    if breaker_config.get("enabled", True):
+        _circuit_breakers = CircuitBreakers(breaker_config, _config.get("models", {}))
+
+    budget_config = _config.get("token_budget", {})
+    if budget_config.get("enabled", True):
+        _token_planner = TokenBudgetPlanner(budget_config)
+
+    ledger_config = _config.get("usage_ledger", {})
+    if ledger_config.get("enabled", True):
+        _usage_ledger = UsageLedger(ledger_config, _config.get("pricing", {}))
+
+    for provider in _config.get("api_keys", {}):
+        get_ai_client(provider)
+    logger.info("Initialized AI clients for providers: %s", [key[0] for key in _clients])
+
+
+def get_ai_client(provider: str) -> AIClient:
+    """
+    Returns the shared AI client instance for the provider.
+    If the registry hasn't been initialized, it calls init_ai_clients().
+    """
+    if _config is None:
+        init_ai_clients()
+
+    provider = provider.lower()
+    if provider not in _api_keys:
+        _api_keys[provider] = get_api_key(provider, _config)
+
+    api_key = _api_keys[provider]
+    key = (provider, api_key)
+    if key not in _clients:
+        _clients[key] = _create_client(provider, api_key)
+    return _clients[key]
+
+
+def get_batch_client(provider: str) -> BatchAIClient:
+    """
+    Returns the provider's batch client for offline runs. It talks to the provider
+    directly (or to 'offline_batches.base_urls.<provider>', e.g. a local stand-in
+    server), bypassing the interactive cache, rate limiter and circuit breaker;
+    its usage is still recorded in the ledger.
+    """
+    if _config is None:
+        init_ai_clients()
+
+    provider = provider.lower()
+    if provider not in _batch_clients:
+        batch_config = _config.get("offline_batches", {})
+        base_url = batch_config.get("base_urls", {}).get(provider)
+        api_key = get_api_key(provider, _config)
+        if provider == "openai":
+            client = OpenAIClient(api_key=api_key, http_client=_http_client, async_http_client=_async_http_client,
+                                  token_planner=_token_planner, base_url=base_url)
+            _batch_clients[provider] = OpenAIBatchClient(client, provider, batch_config, _usage_ledger)
+        elif provider == "claude":
+            client = AnthropicClient(api_key=api_key, http_client=_http_client, async_http_client=_async_http_client,
+                                     token_planner=_token_planner,
+                                     prompt_caching=_config.get("prompt_caching", {}).get("enabled", True),
+                                     base_url=base_url)
+            _batch_clients[provider] = AnthropicBatchClient(client, provider, batch_config, _usage_ledger)
+        else:
+            logger.error("Unsupported AI provider for batches: %s", provider)
+            raise ValueError(f"Unsupported AI provider for batches: {provider}")
+    return _batch_clients[provider]
+
+
+def get_response_cache() -> Optional[TieredResponseCache]:
+    """
+    Returns the shared LLM response cache, or None when caching is disabled.
+    """
+    return _response_cache
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Returns the shared per-(provider, model) rate limiter, or None when rate limiting is disabled.
+    """
+    return _rate_limiter
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    """
+    Returns the shared hedging policy, or None when hedging is disabled.
+    """
+    return _hedge_policy
+
+
+def get_circuit_breakers() -> Optional[CircuitBreakers]:
+    """
+    Returns the per-(provider, model) circuit breakers, or None when they are disabled.
+    """
+    return _circuit_breakers
+
+
+def get_usage_ledger() -> Optional[UsageLedger]:
+    """
+    Returns the shared usage ledger, or None when usage recording is disabled.
+    """
+    return _usage_ledger
+
+
+def get_token_planner() -> Optional[TokenBudgetPlanner]:
+    """
+    Returns the shared token budget planner, or None when max_tokens is fixed.
+    """
+    return _token_planner
+
+
+async def close_ai_clients() -> None:
+    """
+    Closes the shared connection pool and drops all cached clients.
+    This function should be called on application shutdown.
+    """
+    global _config, _http_client, _async_http_client, _response_cache, _rate_limiter, _hedge_policy, \
+        _circuit_breakers, _usage_ledger, _token_planner
+    if _usage_ledger is not None:
+        await _usage_ledger.close()
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+    if _http_client is not None:
+        _http_client.close()
+
+    _clients.clear()
+    _batch_clients.clear()
+    _api_keys.clear()
+    _http_client = None
+    _async_http_client = None
+    _response_cache = None
+    _rate_limiter = None
+    _hedge_policy = None
+    _circuit_breakers = None
+    _usage_ledger = None
+    _token_planner = None
+    _config = None
+    logger.info("AI clients closed.")
@@ -0,0 +1,199 @@
+import json
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+
+from backend.llm_clients.clients import AIClient, build_usage
+from backend.llm_clients.usage_ledger import UsageLedger
+
+logger = logging.getLogger(__name__)
+
+OPENAI_BATCH_ENDPOINT = "/v1/chat/completions"
+# OpenAI batch states after which the batch does not change any more.
+OPENAI_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _batch_usage(input_tokens: Optional[int], output_tokens: Optional[int],
+                 cached_tokens: Optional[int]) -> Dict[str, Any]:
+    """
+    Usage of one batched completion. Batches report no per-request latency, so
+    'time_in_seconds' and 'tokens_per_second' are None.
+    """
+    usage = build_usage(input_tokens, output_tokens, cached_tokens, 0.0)
+    usage["time_in_seconds"] = None
+    return usage
+
+
+class BatchAIClient(ABC):
+    """
+    Sends many chat completions of one model as a single provider batch job. Batches
+    are billed at a discount and do not count against the interactive rate limits,
+    but their results may take up to 24 hours. Requests are built with the provider
+    client's build_params, so they match interactive calls of the same model.
+    """
+
+    def __init__(self, client: AIClient, provider: str, batch_config: Dict[str, Any],
+                 ledger: Optional[UsageLedger] = None):
+        self.client = client
+        self.provider = provider
+        self.poll_interval_seconds = batch_config.get("poll_interval_seconds", 30)
+        self.timeout_seconds = batch_config.get("timeout_seconds", 86400)
+        self.ledger = ledger
+
+    @abstractmethod
+    async def submit(self, model: str, requests: Dict[str, List[Dict[str, Any]]]) -> str:
+        """
+        Submits one batch of {custom_id: messages} for the model and returns the provider's batch ID.
+        """
+        pass
+
+    @abstractmethod
+    async def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Returns {"state", "done", "counts"} of a submitted batch.
+        """
+        pass
+
+    @abstractmethod
+    async def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns {custom_id: {"text", "usage"}} of a finished batch, or {custom_id: {"error"}}
+        for requests that failed. Requests the provider did not process are missing.
+        """
+        pass
+
+    async def collect(self, batch_id: str, model: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Polls the batch every 'poll_interval_seconds' until it is done, then returns its
+        results and records their usage in the ledger. Raises TimeoutError after
+        'timeout_seconds'; the batch keeps running and can be collected again later.
+        """
+        deadline = time.monotonic() + self.timeout_seconds
+        while True:
+            status = await self.retrieve(batch_id)
+            if status["done"]:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Batch {batch_id} is still '{status['state']}' "
+                                   f"after {self.timeout_seconds} seconds.")
+            logger.info("Batch %s of '%s' is %s: %s", batch_id, model, status["state"], status["counts"])
+            await asyncio.sleep(self.poll_interval_seconds)
+
+        logger.info("Batch %s of '%s' finished as '%s': %s", batch_id, model, status["state"], status["counts"])
+        results = await self.results(batch_id)
+        if self.ledger is not None:
+            for result in results.values():
+                if "usage" in result:
+                    result["usage"]["cost_usd"] = self.ledger.record(
+                        self.provider, model, result["usage"], batched=True)["cost_usd"]
+        return results
+
+
+class OpenAIBatchClient(BatchAIClient):
+    """
+    OpenAI Batch API: the requests are uploaded as a JSONL file and the results are
+    downloaded as output and error files once the batch is completed.
+    """
+
+    async def submit(self, model: str, requests: Dict[str, List[Dict[str, Any]]]) -> str:
+        lines = [
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": OPENAI_BATCH_ENDPOINT,
+                        "body": self.client.build_params(model, messages)}, ensure_ascii=False)
+            for custom_id, messages in requests.items()
+        ]
+        async_client = self.client.async_client
+        input_file = await async_client.files.create(
+            file=("batch.jsonl", ("\n".join(lines) + "\n").encode("utf-8")),
+            purpose="batch"
+        )
+        batch = await async_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=OPENAI_BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        logger.info("Submitted OpenAI batch %s with %d requests for '%s'.", batch.id, len(requests), model)
+        return batch.id
+
+    async def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        batch = await self.client.async_client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "state": batch.status,
+            "done": batch.status in OPENAI_FINAL_STATES,
+            "counts": {"total": counts.total, "completed": counts.completed, "failed": counts.failed}
+            if counts else {}
+        }
+
+    async def _read_file(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        content = await self.client.async_client.files.content(file_id)
+        return [json.loads(line) for line in content.text.splitlines() if line.strip()]
+
+    async def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        batch = await self.client.async_client.batches.retrieve(batch_id)
+        results: Dict[str, Dict[str, Any]] = {}
+        for line in await self._read_file(batch.output_file_id) + await self._read_file(batch.error_file_id):
+            response = line.get("response") or {}
+            body = response.get("body") or {}
+            if line.get("error") or response.get("status_code") != 200:
+                error = line.get("error") or body.get("error") or {}
+                results[line["custom_id"]] = {"error": error.get("message") or str(error)}
+                continue
+            usage = body.get("usage") or {}
+            details = usage.get("prompt_tokens_details") or {}
+            results[line["custom_id"]] = {
+                "text": (body["choices"][0]["message"]["content"] or "").strip(),
+                "usage": _batch_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"),
+                                      details.get("cached_tokens") or 0)
+            }
+        return results
+
+
+class AnthropicBatchClient(BatchAIClient):
+    """
+    Anthropic Message Batches API: the requests are sent inline and the results are
+    streamed back as JSONL once processing has ended.
+    """
+
+    async def submit(self, model: str, requests: Dict[str, List[Dict[str, Any]]]) -> str:
+        batch = await self.client.async_client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": self.client.build_params(model, messages)}
+            for custom_id, messages in requests.items()
+        ])
+        logger.info("Submitted Anthropic message batch %s with %d requests for '%s'.",
+                    batch.id, len(requests), model)
+        return batch.id
+
+    async def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        batch = await self.client.async_client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "state": batch.processing_status,
+            "done": batch.processing_status == "ended",
+            "counts": {"processing": counts.processing, "succeeded": counts.succeeded, "errored": counts.errored,
+                       "canceled": counts.canceled, "expired": counts.expired}
+        }
+
+    async def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        async for entry in await self.client.async_client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type != "succeeded":
+                error = getattr(result, "error", None)
+                results[entry.custom_id] = {"error": str(getattr(error, "error", error) or result.type)}
+                continue
+            message = result.message
+            usage_obj = message.usage
+            cached_tokens = getattr(usage_obj, "cache_read_input_tokens", None) or 0
+            cache_write_tokens = getattr(usage_obj, "cache_creation_input_tokens", None) or 0
+            usage = _batch_usage(usage_obj.input_tokens + cached_tokens + cache_write_tokens,
+                                 usage_obj.output_tokens, cached_tokens)
+            usage["cache_write_tokens"] = cache_write_tokens
+            results[entry.custom_id] = {
+                "text": message.content[0].text.strip() if message.content else "",
+                "usage": usage
+            }
+        return results
@@ -0,0 +1,227 @@
+import time
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from backend.llm_clients.clients import AIClient, DelegatingAIClient
+from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.request_context import upstream_started_at
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome and latency of recent calls to one (provider, model). The circuit
+    opens when the failure rate or the slow-call rate over the rolling window crosses its
+    threshold, rejects calls while open, then lets a few probe calls through (half-open)
+    and closes again once they succeed.
+    """
+
+    def __init__(self, name: str, breaker_config: Dict[str, Any]):
+        self.name = name
+        self.window_seconds = breaker_config.get("window_seconds", 60)
+        self.min_calls = breaker_config.get("min_calls", 10)
+        self.failure_rate_threshold = breaker_config.get("failure_rate_threshold", 0.5)
+        self.slow_call_seconds = breaker_config.get("slow_call_seconds", 30)
+        self.slow_call_rate_threshold = breaker_config.get("slow_call_rate_threshold", 0.8)
+        self.open_seconds = breaker_config.get("open_seconds", 30)
+        self.half_open_max_calls = breaker_config.get("half_open_max_calls", 1)
+
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.half_open_calls = 0
+        self.rejected = 0
+        # (finished_at, succeeded, latency)
+        self._calls: Deque[Tuple[float, bool, float]] = deque()
+
+    def _trim(self) -> None:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _rates(self) -> Tuple[float, float]:
+        self._trim()
+        total = len(self._calls)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for _, succeeded, _ in self._calls if not succeeded)
+        slow = sum(1 for _, _, latency in self._calls if latency >= self.slow_call_seconds)
+        return failures / total, slow / total
+
+    def _transition(self, state: str) -> None:
+        logger.warning("Circuit for %s: %s -> %s", self.name, self.state, state)
+        self.state = state
+        self.half_open_calls = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        elif state == CLOSED:
+            self.opened_at = None
+            self._calls.clear()
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call may go upstream now. Counts the call as a probe when half-open.
+        """
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self.half_open_calls < self.half_open_max_calls:
+            self.half_open_calls += 1
+            return True
+        return False
+
+    def record(self, succeeded: bool, latency: float) -> None:
+        if self.state == HALF_OPEN:
+            if succeeded and latency < self.slow_call_seconds:
+                self._transition(CLOSED)
+            else:
+                self._transition(OPEN)
+            return
+
+        self._calls.append((time.monotonic(), succeeded, latency))
+        if self.state == CLOSED:
+            failure_rate, slow_rate = self._rates()
+            if len(self._calls) >= self.min_calls and (failure_rate >= self.failure_rate_threshold
+                                                       or slow_rate >= self.slow_call_rate_threshold):
+                self._transition(OPEN)
+
+    def abandon(self) -> None:
+        """
+        A call ended without an outcome (cancelled); frees its probe slot when half-open.
+        """
+        if self.state == HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        failure_rate, slow_rate = self._rates()
+        latencies = [latency for _, succeeded, latency in self._calls if succeeded]
+        return {
+            "state": self.state,
+            "calls_in_window": len(self._calls),
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "avg_latency_seconds": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)), 1)
+            if self.state == OPEN else None
+        }
+
+
+class CircuitBreakers:
+    """
+    One CircuitBreaker per (provider, model), configured from the 'circuit_breaker' config section.
+    """
+
+    def __init__(self, breaker_config: Dict[str, Any], models_config: Dict[str, Dict[str, str]]):
+        self.breaker_config = breaker_config
+        self.fallback_models: Dict[str, str] = {}
+        for model, fallback in breaker_config.get("fallback_models", {}).items():
+            # Fallback calls go through the same provider client.
+            if any(model in models and fallback in models for models in models_config.values()):
+                self.fallback_models[model] = fallback
+            else:
+                logger.error("Ignoring circuit fallback '%s' for '%s': not a model of the same provider.",
+                             fallback, model)
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, provider: str, model: str) -> CircuitBreaker:
+        key = (provider, model)
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(f"{provider}/{model}", self.breaker_config)
+        return self._breakers[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {breaker.name: breaker.stats() for breaker in self._breakers.values()}
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    # Local rejections (e.g. a rate limit queue timeout) say nothing about the provider's health.
+    return not isinstance(error, HTTPException)
+
+
+def _upstream_latency(start_time: float) -> float:
+    """
+    Seconds since the call was sent upstream. Time spent waiting in the local rate limiter
+    queue (which runs inside this layer) is excluded, so our own backlog cannot open the circuit.
+    """
+    sent_at = upstream_started_at.get()
+    return time.monotonic() - max(start_time, sent_at or start_time)
+
+
+class CircuitBreakingAIClient(DelegatingAIClient):
+    """
+    Fails fast while a model's circuit is open, or routes the call to the model's
+    configured fallback if that one's circuit is closed. Routed answers carry
+    'fallback_model' in their usage.
+    """
+
+    def __init__(self, inner: AIClient, provider: str, breakers: CircuitBreakers):
+        super().__init__(inner)
+        self.provider = provider
+        self.breakers = breakers
+
+    def _route(self, model: str) -> Tuple[str, CircuitBreaker]:
+        breaker = self.breakers.get(self.provider, model)
+        if breaker.allow_request():
+            return model, breaker
+
+        breaker.rejected += 1
+        fallback = self.breakers.fallback_models.get(model)
+        if fallback:
+            fallback_breaker = self.breakers.get(self.provider, fallback)
+            if fallback_breaker.allow_request():
+                logger.warning("Circuit for %s is open, routing to '%s'.", breaker.name, fallback)
+                return fallback, fallback_breaker
+        handle_http_exception(503, f"Model '{model}' of provider '{self.provider}' is temporarily unavailable.")
+
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        routed_model, breaker = self._route(model)
+        start_time = time.monotonic()
+        recorded = False
+        try:
+            response = await self.inner.acall_chat_completion(routed_model, messages, bypass_cache=bypass_cache)
+            breaker.record(True, _upstream_latency(start_time))
+            recorded = True
+            if routed_model != model:
+                response["usage"]["fallback_model"] = routed_model
+            return response
+        except Exception as e:
+            if _is_provider_failure(e):
+                breaker.record(False, _upstream_latency(start_time))
+                recorded = True
+            raise
+        finally:
+            if not recorded:
+                breaker.abandon()
+
+    async def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                      bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        routed_model, breaker = self._route(model)
+        start_time = time.monotonic()
+        recorded = False
+        try:
+            async for event in self.inner.astream_chat_completion(routed_model, messages, bypass_cache=bypass_cache):
+                if event["type"] == "done":
+                    breaker.record(True, _upstream_latency(start_time))
+                    recorded = True
+                    if routed_model != model:
+                        event["usage"]["fallback_model"] = routed_model
+                yield event
+        except Exception as e:
+            if _is_provider_failure(e) and not recorded:
+                breaker.record(False, _upstream_latency(start_time))
+                recorded = True
+            raise
+        finally:
+            if not recorded:
+                breaker.abandon()
@@ -1,13 +1,80 @@
 import time
+import asyncio
 import logging
 
 import anthropic
+import httpx
 import openai
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
+
+from backend.llm_clients.token_budget import TokenBudgetPlanner
 
 logger = logging.getLogger(__name__)
 
+# Completion budget used when no token budget planner is configured.
+DEFAULT_MAX_TOKENS = 4096
+
+
+def build_usage(input_tokens: Optional[int], output_tokens: Optional[int], cached_tokens: Optional[int],
+                elapsed_time: float) -> Dict[str, Any]:
+    """
+    Standard usage dictionary of one completion. 'tokens_spent' is input plus output tokens.
+    """
+    tokens_spent = input_tokens + output_tokens if input_tokens is not None and output_tokens is not None else None
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cached_tokens": cached_tokens,
+        "tokens_spent": tokens_spent,
+        "time_in_seconds": round(elapsed_time, 3),
+        "tokens_per_second": round(output_tokens / elapsed_time, 1) if output_tokens and elapsed_time > 0 else None
+    }
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Returns the delay a provider asked for in its Retry-After header, if the error carries one.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _next_retry_delay(client: "AIClient", model: str, error: Exception, attempt: int) -> float:
+    """
+    Honors Retry-After (and reports it through 'on_retry_after'), otherwise backs off exponentially.
+    """
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        if client.on_retry_after is not None:
+            client.on_retry_after(model, retry_after)
+        return retry_after
+    return client.backoff_factor * (2 ** (attempt - 1))
+
+
+def _plan_max_tokens(client: "AIClient", model: str, messages: List[Dict[str, str]]) -> int:
+    """
+    The max_tokens the token budget planner picked for this prompt, or the default without a planner.
+    """
+    if client.token_planner is None:
+        return DEFAULT_MAX_TOKENS
+    return client.token_planner.plan(model, messages).max_tokens
+
+
+def _record_token_plan(client: "AIClient", model: str, messages: List[Dict[str, str]],
+                       usage: Dict[str, Any]) -> None:
+    if client.token_planner is not None:
+        client.token_planner.record(model, messages, usage)
+
 
 class AIClient(ABC):
     @abstractmethod
@@ -17,64 +84,268 @@ class AIClient(ABC):
         """
         pass
 
+    @abstractmethod
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Abstract method to call a chat completion API without blocking the event loop.
+        'bypass_cache' asks any caching layer in front of the client to go upstream.
+        """
+        pass
+
+    @abstractmethod
+    def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Abstract method to stream a chat completion as it is generated.
+        Yields {"type": "delta", "text": ...} events followed by one
+        {"type": "done", "text": <full text>, "usage": {...}} event.
+        """
+        pass
+
+    @abstractmethod
+    def build_params(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Abstract method returning the exact request parameters sent to the provider.
+        """
+        pass
+
+
+class DelegatingAIClient(AIClient):
+    """
+    Base class for layers (caching, limiting, ...) that wrap another AIClient.
+    Every call is forwarded to the wrapped client unless the subclass overrides it.
+    """
+
+    def __init__(self, inner: AIClient):
+        self.inner = inner
+
+    def call_chat_completion(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        return self.inner.call_chat_completion(model, messages)
+
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        return await self.inner.acall_chat_completion(model, messages, bypass_cache=bypass_cache)
+
+    async def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                      bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        async for event in self.inner.astream_chat_completion(model, messages, bypass_cache=bypass_cache):
+            yield event
+
+    def build_params(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        return self.inner.build_params(model, messages)
+
 class OpenAIClient(AIClient):
-    def __init__(self, api_key: str, max_retries: int = 3, backoff_factor: float = 1.0):
+    def __init__(self, api_key: str, max_retries: int = 3, backoff_factor: float = 1.0,
+                 http_client: Optional[httpx.Client] = None,
+                 async_http_client: Optional[httpx.AsyncClient] = None,
+                 on_retry_after: Optional[Callable[[str, float], None]] = None,
+                 token_planner: Optional[TokenBudgetPlanner] = None,
+                 base_url: Optional[str] = None):
         """
         Initialize the OpenAI client with an API key and retry settings.
+        Optional shared httpx clients let several SDK clients reuse one connection pool.
+        'on_retry_after' is called with (model, seconds) when the API asks to back off.
+        'token_planner' picks max_tokens per request; without it DEFAULT_MAX_TOKENS is used.
+        'base_url' points the SDK at another API server (the public API by default).
         """
-        self.client = openai.OpenAI(api_key=api_key)
+        self.client = openai.OpenAI(api_key=api_key, http_client=http_client, base_url=base_url)
+        self.async_client = openai.AsyncOpenAI(api_key=api_key, http_client=async_http_client, base_url=base_url)
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
+        self.on_retry_after = on_retry_after
+        self.token_planner = token_planner
 
-    def call_chat_completion(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    def build_params(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
         """
-        Call the OpenAI chat completion API with retry logic.
+        Build the request parameters for the chat completion API.
         """
         params = {
             "model": model,
             "temperature": 0.0,
             "messages": messages
         }
+        max_tokens = _plan_max_tokens(self, model, messages)
+        if model == "o3-mini":
+            params["max_completion_tokens"] = max_tokens
+            del params["temperature"]
+        else:
+            params["max_tokens"] = max_tokens
+        return params
+
+    @staticmethod
+    def _build_usage(usage_obj: Any, elapsed_time: float) -> Dict[str, Any]:
+        """
+        Exact token counts reported by the API; cached_tokens are prompt tokens served from OpenAI's prompt cache.
+        """
+        if not usage_obj:
+            return build_usage(None, None, None, elapsed_time)
+        details = getattr(usage_obj, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) if details else None
+        return build_usage(usage_obj.prompt_tokens, usage_obj.completion_tokens, cached_tokens or 0, elapsed_time)
+
+    def _build_result(self, response: Any, elapsed_time: float) -> Dict[str, Any]:
+        """
+        Convert an OpenAI response into the standard {text, usage} dictionary.
+        """
+        result_text = response.choices[0].message.content.strip()
+        usage_data = self._build_usage(response.usage, elapsed_time)
+        logger.info("Received response from AI model. AI API call took %.2f seconds", elapsed_time)
+        return {
+            "text": result_text,
+            "usage": usage_data
+        }
+
+    def call_chat_completion(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Call the OpenAI chat completion API with retry logic.
+        """
+        params = self.build_params(model, messages)
         attempt = 0
         while attempt < self.max_retries:
             try:
                 start_time = time.time()
-                if model == "o3-mini":
-                    params["max_completion_tokens"] = 4096
-                    del params["temperature"]
-                else:
-                    params["max_tokens"] = 4096
                 response = self.client.chat.completions.create(**params)
-                elapsed_time = time.time() - start_time
-                result_text = response.choices[0].message.content.strip()
-                usage_obj = response.usage
-                tokens_spent = usage_obj.total_tokens if usage_obj else None
-                usage_data = {
-                    "tokens_spent": tokens_spent,
-                    "time_in_seconds": round(elapsed_time, 3)
-                }
-                logger.info("Received response from AI model. AI API call took %.2f seconds", elapsed_time)
-                return {
-                    "text": result_text,
-                    "usage": usage_data
-                }
+                result = self._build_result(response, time.time() - start_time)
+                _record_token_plan(self, model, messages, result["usage"])
+                return result
             except Exception as e:
                 attempt += 1
-                sleep_time = self.backoff_factor * (2 ** (attempt - 1))
+                sleep_time = _next_retry_delay(self, model, e, attempt)
                 logger.error("Error calling OpenAI API on attempt %d: %s. Retrying in %f seconds.", attempt, e,
                              sleep_time)
                 time.sleep(sleep_time)
         raise Exception("Max retries exceeded for OpenAI API call.")
 
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Call the OpenAI chat completion API asynchronously with retry logic.
+        """
+        params = self.build_params(model, messages)
+        attempt = 0
+        while attempt < self.max_retries:
+            try:
+                start_time = time.time()
+                response = await self.async_client.chat.completions.create(**params)
+                result = self._build_result(response, time.time() - start_time)
+                _record_token_plan(self, model, messages, result["usage"])
+                return result
+            except Exception as e:
+                attempt += 1
+                sleep_time = _next_retry_delay(self, model, e, attempt)
+                logger.error("Error calling OpenAI API on attempt %d: %s. Retrying in %f seconds.", attempt, e,
+                             sleep_time)
+                await asyncio.sleep(sleep_time)
+        raise Exception("Max retries exceeded for OpenAI API call.")
+
+    async def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                      bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the OpenAI chat completion. Failures are retried only until the
+        first token has been sent to the caller.
+        """
+        params = self.build_params(model, messages)
+        params["stream"] = True
+        params["stream_options"] = {"include_usage": True}
+        attempt = 0
+        while attempt < self.max_retries:
+            emitted = False
+            try:
+                start_time = time.time()
+                chunks = []
+                usage_obj = None
+                stream = await self.async_client.chat.completions.create(**params)
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage_obj = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        chunks.append(chunk.choices[0].delta.content)
+                        emitted = True
+                        yield {"type": "delta", "text": chunk.choices[0].delta.content}
+
+                elapsed_time = time.time() - start_time
+                logger.info("Streamed response from AI model. AI API call took %.2f seconds", elapsed_time)
+                usage_data = self._build_usage(usage_obj, elapsed_time)
+                _record_token_plan(self, model, messages, usage_data)
+                yield {"type": "done", "text": "".join(chunks).strip(), "usage": usage_data}
+                return
+            except Exception as e:
+                if emitted:
+                    raise
+                attempt += 1
+                sleep_time = _next_retry_delay(self, model, e, attempt)
+                logger.error("Error streaming from OpenAI API on attempt %d: %s. Retrying in %f seconds.", attempt,
+                             e, sleep_time)
+                await asyncio.sleep(sleep_time)
+        raise Exception("Max retries exceeded for OpenAI API call.")
+
 
 class AnthropicClient(AIClient):
-    def __init__(self, api_key: str, max_retries: int = 3, backoff_factor: float = 1.0):
+    def __init__(self, api_key: str, max_retries: int = 3, backoff_factor: float = 1.0,
+                 http_client: Optional[httpx.Client] = None,
+                 async_http_client: Optional[httpx.AsyncClient] = None,
+                 on_retry_after: Optional[Callable[[str, float], None]] = None,
+                 token_planner: Optional[TokenBudgetPlanner] = None,
+                 prompt_caching: bool = True,
+                 base_url: Optional[str] = None):
         """
         Initialize the Anthropic client with an API key and retry settings.
+        Optional shared httpx clients let several SDK clients reuse one connection pool.
+        'on_retry_after' is called with (model, seconds) when the API asks to back off.
+        'token_planner' picks max_tokens per request; without it DEFAULT_MAX_TOKENS is used.
+        'prompt_caching' marks the system prompt as a cacheable prefix.
+        'base_url' points the SDK at another API server (the public API by default).
         """
-        self.client = anthropic.Client(api_key=api_key)
+        self.client = anthropic.Client(api_key=api_key, http_client=http_client, base_url=base_url)
+        self.async_client = anthropic.AsyncAnthropic(api_key=api_key, http_client=async_http_client,
+                                                     base_url=base_url)
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
+        self.on_retry_after = on_retry_after
+        self.token_planner = token_planner
+        self.prompt_caching = prompt_caching
+
+    def build_params(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Build the request parameters for the messages API.
+        """
+        params = {
+            "model": model,
+            "messages": [message for message in messages if message["role"] != "system"],
+            "max_tokens": _plan_max_tokens(self, model, messages),
+            "temperature": 0.0
+        }
+        # The messages API takes system instructions as a separate parameter; marking the block
+        # with cache_control lets Anthropic reuse the processed prefix across requests.
+        system_text = "\n\n".join(message["content"] for message in messages if message["role"] == "system")
+        if system_text:
+            system_block = {"type": "text", "text": system_text}
+            if self.prompt_caching:
+                system_block["cache_control"] = {"type": "ephemeral"}
+            params["system"] = [system_block]
+        return params
+
+    def _build_result(self, response: Any, elapsed_time: float) -> Dict[str, Any]:
+        """
+        Convert an Anthropic response into the standard {text, usage} dictionary.
+        Anthropic reports cache reads and cache writes separately from the uncached input tokens.
+        """
+        logger.info("Received response from Anthropic. API call took %.2f seconds", elapsed_time)
+
+        result_text = response.content[0].text.strip() if response.content else ""
+
+        usage_obj = response.usage
+        cached_tokens = getattr(usage_obj, "cache_read_input_tokens", None) or 0
+        cache_write_tokens = getattr(usage_obj, "cache_creation_input_tokens", None) or 0
+        input_tokens = usage_obj.input_tokens + cached_tokens + cache_write_tokens
+        usage_data = build_usage(input_tokens, usage_obj.output_tokens, cached_tokens, elapsed_time)
+        usage_data["cache_write_tokens"] = cache_write_tokens
+
+        return {
+            "text": result_text,
+            "usage": usage_data
+        }
 
     def call_chat_completion(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
         """
@@ -82,43 +353,80 @@ class AnthropicClient(AIClient):
         converting 'messages' (role/content) into the format
         Claude expects (HUMAN_PROMPT and AI_PROMPT).
         """
+        params = self.build_params(model, messages)
+        attempt = 0
+        while attempt < self.max_retries:
+            try:
+                start_time = time.time()
+                response = self.client.messages.create(**params)
+                result = self._build_result(response, time.time() - start_time)
+                _record_token_plan(self, model, messages, result["usage"])
+                return result
 
+            except Exception as e:
+                attempt += 1
+                sleep_time = _next_retry_delay(self, model, e, attempt)
+                logger.error("Error calling Anthropic API on attempt %d: %s. Retrying in %f seconds.",
+                             attempt, e, sleep_time)
+                time.sleep(sleep_time)
+
+        raise Exception("Max retries exceeded for Anthropic (Claude) API call.")
+
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Calls the Anthropic Claude API asynchronously, with the same retry
+        semantics as call_chat_completion but without blocking the event loop.
+        """
+        params = self.build_params(model, messages)
         attempt = 0
         while attempt < self.max_retries:
             try:
                 start_time = time.time()
-                response = self.client.messages.create(
-                    model=model,
-                    messages=messages,
-                    max_tokens=4096,
-                    temperature=0.0
-                )
-                elapsed_time = time.time() - start_time
-                logger.info("Received response from Anthropic. API call took %.2f seconds", elapsed_time)
+                response = await self.async_client.messages.create(**params)
+                result = self._build_result(response, time.time() - start_time)
+                _record_token_plan(self, model, messages, result["usage"])
+                return result
 
-                result_text = response.content[0].text.strip() if response.content else ""
+            except Exception as e:
+                attempt += 1
+                sleep_time = _next_retry_delay(self, model, e, attempt)
+                logger.error("Error calling Anthropic API on attempt %d: %s. Retrying in %f seconds.",
+                             attempt, e, sleep_time)
+                await asyncio.sleep(sleep_time)
 
-                prompt_word_count = sum(len(msg["content"].split()) for msg in messages)
-                prompt_tokens = int(prompt_word_count * 1.33)
-                completion_word_count = len(result_text.split())
-                completion_tokens = int(completion_word_count * 1.33)
-                tokens_spent = prompt_tokens + completion_tokens
+        raise Exception("Max retries exceeded for Anthropic (Claude) API call.")
 
-                usage_data = {
-                    "tokens_spent": tokens_spent,
-                    "time_in_seconds": round(elapsed_time, 3)
-                }
+    async def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                      bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the Anthropic Claude response. Failures are retried only until
+        the first token has been sent to the caller.
+        """
+        params = self.build_params(model, messages)
+        attempt = 0
+        while attempt < self.max_retries:
+            emitted = False
+            try:
+                start_time = time.time()
+                async with self.async_client.messages.stream(**params) as stream:
+                    async for text in stream.text_stream:
+                        emitted = True
+                        yield {"type": "delta", "text": text}
+                    response = await stream.get_final_message()
 
-                return {
-                    "text": result_text,
-                    "usage": usage_data
-                }
+                result = self._build_result(response, time.time() - start_time)
+                _record_token_plan(self, model, messages, result["usage"])
+                yield {"type": "done", "text": result["text"], "usage": result["usage"]}
+                return
 
             except Exception as e:
+                if emitted:
+                    raise
                 attempt += 1
-                sleep_time = self.backoff_factor * (2 ** (attempt - 1))
-                logger.error("Error calling Anthropic API on attempt %d: %s. Retrying in %f seconds.",
+                sleep_time = _next_retry_delay(self, model, e, attempt)
+                logger.error("Error streaming from Anthropic API on attempt %d: %s. Retrying in %f seconds.",
                              attempt, e, sleep_time)
-                time.sleep(sleep_time)
+                await asyncio.sleep(sleep_time)
 
         raise Exception("Max retries exceeded for Anthropic (Claude) API call.")
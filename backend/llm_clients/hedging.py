@@ -0,0 +1,144 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from backend.llm_clients.clients import AIClient, DelegatingAIClient
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """
+    Decides when to hedge: tracks recent latencies per model and allows a duplicate
+    request once the primary has been running longer than the configured percentile,
+    as long as the share of hedged requests stays under 'max_hedge_rate'.
+
+    Attributes:
+        models (list): Models whose calls may be hedged.
+        fallback_models (dict): Model -> model to send the hedge to (same provider); default is the same model.
+        percentile (float): Latency percentile after which the hedge is sent.
+        min_samples (int): Latencies needed before a model is hedged at all.
+        min_delay_seconds (float): Lower bound for the hedge delay.
+        max_hedge_rate (float): Maximum fraction of requests that may be hedged.
+    """
+
+    def __init__(self, hedging_config: Dict[str, Any], models_config: Dict[str, Dict[str, str]]):
+        self.models = set(hedging_config.get("models", []))
+        self.fallback_models: Dict[str, str] = {}
+        for model, fallback in hedging_config.get("fallback_models", {}).items():
+            # A hedge is sent through the primary's client, so the fallback must be of the same provider.
+            if any(model in models and fallback in models for models in models_config.values()):
+                self.fallback_models[model] = fallback
+            else:
+                logger.error("Ignoring hedge fallback '%s' for '%s': not a model of the same provider.", fallback, model)
+        self.percentile = hedging_config.get("percentile", 0.95)
+        self.min_samples = hedging_config.get("min_samples", 20)
+        self.min_delay_seconds = hedging_config.get("min_delay_seconds", 1.0)
+        self.max_hedge_rate = hedging_config.get("max_hedge_rate", 0.1)
+        self.window = hedging_config.get("window", 200)
+        self._latencies: Dict[str, Deque[float]] = {}
+
+        # Metrics
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.skipped_by_rate_cap = 0
+
+    def record_latency(self, model: str, seconds: float) -> None:
+        self._latencies.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """
+        Seconds to wait for the primary before hedging, or None if the model is not hedged (yet).
+        """
+        if model not in self.models:
+            return None
+        latencies = self._latencies.get(model)
+        if not latencies or len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        return max(self.min_delay_seconds, ordered[index])
+
+    def may_hedge(self) -> bool:
+        if self.hedges >= self.max_hedge_rate * self.requests:
+            self.skipped_by_rate_cap += 1
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_rate": round(self.hedges / self.requests, 3) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "skipped_by_rate_cap": self.skipped_by_rate_cap,
+            "hedge_delay_seconds": {model: self.hedge_delay(model) for model in self.models}
+        }
+
+
+class HedgingAIClient(DelegatingAIClient):
+    """
+    Sends a duplicate request (to the same or a fallback model) when the primary call
+    is slower than the policy's latency percentile, returns whichever answer arrives
+    first and cancels the other. Streaming calls are not hedged.
+    """
+
+    def __init__(self, inner: AIClient, provider: str, policy: HedgePolicy):
+        super().__init__(inner)
+        self.provider = provider
+        self.policy = policy
+
+    async def _timed_call(self, model: str, messages: List[Dict[str, str]], bypass_cache: bool) -> Dict[str, Any]:
+        start_time = time.monotonic()
+        response = await self.inner.acall_chat_completion(model, messages, bypass_cache=bypass_cache)
+        self.policy.record_latency(model, time.monotonic() - start_time)
+        return response
+
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        delay = self.policy.hedge_delay(model)
+        if model in self.policy.models:
+            self.policy.requests += 1
+        if delay is None:
+            return await self._timed_call(model, messages, bypass_cache)
+
+        primary_started = time.monotonic()
+        primary = asyncio.ensure_future(self._timed_call(model, messages, bypass_cache))
+        tasks = {primary}
+        hedge_won = False
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self.policy.may_hedge():
+                return await primary
+
+            hedge_model = self.policy.fallback_models.get(model, model)
+            logger.info("Hedging %s model '%s' after %.2f seconds with '%s'.", self.provider, model, delay, hedge_model)
+            self.policy.hedges += 1
+            hedge = asyncio.ensure_future(self._timed_call(hedge_model, messages, bypass_cache))
+            tasks.add(hedge)
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    if hedge in succeeded:
+                        self.policy.hedge_wins += 1
+                        hedge_won = True
+                        response = hedge.result()
+                        if hedge_model != model:
+                            response["usage"]["fallback_model"] = hedge_model
+                        return response
+                    return succeeded[0].result()
+                # Both failed: surface the last error, otherwise wait for the other call.
+                if not tasks:
+                    return done.pop().result()
+        finally:
+            if hedge_won and not primary.done():
+                # The slow primary is cancelled and never records its latency; its elapsed time
+                # is a lower bound for it, and leaving it out would pull the percentile down.
+                self.policy.record_latency(model, time.monotonic() - primary_started)
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,223 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from backend.llm_clients.clients import AIClient, DelegatingAIClient
+from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.request_context import current_user_id, upstream_started_at
+from backend.utils.tokenizer import content_text, count_message_tokens, count_tokens
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS = "anonymous"
+
+
+def estimate_request_tokens(params: Dict[str, Any], expected_completion_tokens: int) -> int:
+    """
+    Token estimate of a request: its prompt tokens (counted offline, including a separate
+    system parameter) plus the expected completion.
+    """
+    prompt_tokens = count_message_tokens(params.get("messages", []), params.get("model"))
+    if params.get("system"):
+        prompt_tokens += count_tokens(content_text(params["system"]), params.get("model"))
+    return prompt_tokens + expected_completion_tokens
+
+
+class ModelBudget:
+    """
+    Requests-per-minute and tokens-per-minute token buckets for one (provider, model),
+    with a fair queue: waiting calls are granted round-robin across users, FIFO per user.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests_available = float(rpm)
+        self.tokens_available = float(tpm)
+        self.paused_until = 0.0
+        self._last_refill = time.monotonic()
+        self._queues: "OrderedDict[str, Deque[Tuple[asyncio.Future, int]]]" = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Metrics
+        self.granted = 0
+        self.throttled = 0
+        self.retry_after_pauses = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def queue_length(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self.requests_available = min(self.rpm, self.requests_available + elapsed * self.rpm / 60)
+        self.tokens_available = min(self.tpm, self.tokens_available + elapsed * self.tpm / 60)
+
+    def _seconds_until_available(self, tokens: int) -> float:
+        """
+        How long until one request with 'tokens' fits; a request larger than the whole
+        per-minute token budget only waits for a full bucket.
+        """
+        tokens = min(tokens, self.tpm)
+        waits = [max(0.0, self.paused_until - time.monotonic())]
+        if self.requests_available < 1:
+            waits.append((1 - self.requests_available) * 60 / self.rpm)
+        if self.tokens_available < tokens:
+            waits.append((tokens - self.tokens_available) * 60 / self.tpm)
+        return max(waits)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self._queues:
+            user, queue = next(iter(self._queues.items()))
+            future, tokens = queue[0]
+            if future.done():
+                # Cancelled while waiting.
+                queue.popleft()
+            else:
+                self._refill()
+                wait = self._seconds_until_available(tokens)
+                if wait > 0:
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                    return
+                queue.popleft()
+                self.requests_available -= 1
+                self.tokens_available -= tokens
+                future.set_result(None)
+
+            # Round-robin: the served user goes to the back of the line.
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue
+
+    async def acquire(self, tokens: int, user: str, timeout: Optional[float] = None) -> None:
+        """
+        Waits until the call fits in both budgets, then reserves one request and 'tokens'.
+        """
+        enqueued_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user, deque()).append((future, tokens))
+        if self._timer is None:
+            self._dispatch()
+
+        if not future.done():
+            self.throttled += 1
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+            except asyncio.TimeoutError:
+                future.cancel()
+                logger.warning("Rate limit wait for %s exceeded %s seconds.", self.name, timeout)
+                handle_http_exception(429, f"Rate limit for '{self.name}' exceeded, please retry later.")
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+
+        waited = time.monotonic() - enqueued_at
+        self.granted += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def settle(self, reserved_tokens: int, actual_tokens: Optional[int]) -> None:
+        """
+        Corrects the token bucket once the real usage of a call is known.
+        """
+        if actual_tokens is None:
+            return
+        self._refill()
+        self.tokens_available = min(self.tpm, self.tokens_available + reserved_tokens - actual_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Holds all calls for 'seconds', e.g. after the provider answered with Retry-After.
+        """
+        self.retry_after_pauses += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        logger.warning("Pausing %s for %.1f seconds (Retry-After).", self.name, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "requests_available": int(self.requests_available),
+            "tokens_available": int(self.tokens_available),
+            "queue_length": self.queue_length,
+            "waiting_users": len(self._queues),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "retry_after_pauses": self.retry_after_pauses,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.granted, 3) if self.granted else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 3)
+        }
+
+
+class RateLimiter:
+    """
+    Holds one ModelBudget per (provider, model), sized from the 'rate_limits' config section.
+    """
+
+    def __init__(self, limits_config: Dict[str, Any]):
+        self.default_limits = limits_config.get("default", {})
+        self.model_limits = limits_config.get("models", {})
+        self.expected_completion_tokens = limits_config.get("expected_completion_tokens", 1024)
+        self.max_wait_seconds = limits_config.get("max_wait_seconds", 120)
+        self._budgets: Dict[Tuple[str, str], ModelBudget] = {}
+
+    def budget(self, provider: str, model: str) -> ModelBudget:
+        key = (provider, model)
+        if key not in self._budgets:
+            limits = {**self.default_limits, **self.model_limits.get(provider, {}).get(model, {})}
+            self._budgets[key] = ModelBudget(
+                f"{provider}/{model}",
+                rpm=limits.get("rpm", 500),
+                tpm=limits.get("tpm", 200000)
+            )
+        return self._budgets[key]
+
+    def pause(self, provider: str, model: str, seconds: float) -> None:
+        self.budget(provider, model).pause(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {budget.name: budget.stats() for budget in self._budgets.values()}
+
+
+class RateLimitedAIClient(DelegatingAIClient):
+    """
+    Waits for the (provider, model) budget before every upstream call and
+    settles the token bucket with the real usage afterwards.
+    """
+
+    def __init__(self, inner: AIClient, provider: str, limiter: RateLimiter):
+        super().__init__(inner)
+        self.provider = provider
+        self.limiter = limiter
+
+    async def _acquire(self, model: str, messages: List[Dict[str, str]]) -> Tuple[ModelBudget, int]:
+        budget = self.limiter.budget(self.provider, model)
+        tokens = estimate_request_tokens(self.build_params(model, messages), self.limiter.expected_completion_tokens)
+        await budget.acquire(tokens, current_user_id.get() or ANONYMOUS, timeout=self.limiter.max_wait_seconds)
+        # Outer layers (the circuit breaker) time the upstream call from here, not including the queue wait.
+        upstream_started_at.set(time.monotonic())
+        return budget, tokens
+
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        budget, tokens = await self._acquire(model, messages)
+        response = await self.inner.acall_chat_completion(model, messages, bypass_cache=bypass_cache)
+        budget.settle(tokens, response["usage"].get("tokens_spent"))
+        return response
+
+    async def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                      bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        budget, tokens = await self._acquire(model, messages)
+        async for event in self.inner.astream_chat_completion(model, messages, bypass_cache=bypass_cache):
+            if event["type"] == "done":
+                budget.settle(tokens, event["usage"].get("tokens_spent"))
+            yield event
@@ -0,0 +1,221 @@
+import copy
+import json
+import time
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+from backend.db.db import get_database
+from backend.llm_clients.clients import AIClient, DelegatingAIClient
+from backend.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(provider: str, params: Dict[str, Any]) -> str:
+    """
+    Builds a content hash over the provider and the exact request parameters
+    (model, messages, temperature, token limits, ...).
+    """
+    payload = json.dumps({"provider": provider, "params": params}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(params: Dict[str, Any]) -> bool:
+    """
+    Only greedy (temperature 0) requests are safe to answer from cache. Requests
+    without a temperature (e.g. reasoning models, which do not accept one) are
+    sampled by the provider and never cached.
+    """
+    return "temperature" in params and params["temperature"] == 0.0
+
+
+class ResponseCache(ABC):
+    """
+    A single storage tier for LLM responses keyed by make_cache_key().
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, response: Dict[str, Any]) -> None:
+        pass
+
+
+class InMemoryResponseCache(ResponseCache):
+    """
+    Process-local LRU tier.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        self.entries = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, response: Dict[str, Any]) -> None:
+        self.entries.set(key, response)
+
+
+class MongoResponseCache(ResponseCache):
+    """
+    Shared tier stored in MongoDB. Entries expire through a TTL index on 'created_at'.
+    Storage errors are logged and treated as misses so the cache never fails an LLM call.
+    """
+
+    def __init__(self, collection_name: str = "llm_response_cache", ttl_seconds: int = 86400):
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        self._index_ready = False
+
+    async def _collection(self):
+        collection = get_database()[self.collection_name]
+        if not self._index_ready:
+            await collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+            self._index_ready = True
+        return collection
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            collection = await self._collection()
+            doc = await collection.find_one({"_id": key})
+        except Exception as e:
+            logger.warning("Response cache lookup failed: %s", e)
+            return None
+        return doc["response"] if doc else None
+
+    async def set(self, key: str, response: Dict[str, Any]) -> None:
+        try:
+            collection = await self._collection()
+            await collection.replace_one(
+                {"_id": key},
+                {"_id": key, "response": response, "created_at": datetime.utcnow()},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning("Response cache write failed: %s", e)
+
+
+class TieredResponseCache:
+    """
+    Read-through cache over several tiers (fastest first). A hit in a lower tier
+    is copied into the tiers above it. Keeps hit/miss counters per tier.
+    """
+
+    def __init__(self, tiers: List[ResponseCache]):
+        self.tiers = tiers
+        self.hits = 0
+        self.misses = 0
+        self.tier_hits = [0] * len(tiers)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        for index, tier in enumerate(self.tiers):
+            response = await tier.get(key)
+            if response is not None:
+                self.hits += 1
+                self.tier_hits[index] += 1
+                for upper in self.tiers[:index]:
+                    await upper.set(key, response)
+                return response
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, response: Dict[str, Any]) -> None:
+        for tier in self.tiers:
+            await tier.set(key, response)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "tier_hits": {type(tier).__name__: count for tier, count in zip(self.tiers, self.tier_hits)}
+        }
+
+
+class CachingAIClient(DelegatingAIClient):
+    """
+    Answers deterministic chat completions from the response cache and stores
+    upstream results in it. Cached answers report zero tokens spent.
+    """
+
+    def __init__(self, inner: AIClient, provider: str, cache: TieredResponseCache):
+        super().__init__(inner)
+        self.provider = provider
+        self.cache = cache
+
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        params = self.build_params(model, messages)
+        if bypass_cache or not is_deterministic(params):
+            return await self.inner.acall_chat_completion(model, messages, bypass_cache=bypass_cache)
+
+        key = make_cache_key(self.provider, params)
+        start_time = time.time()
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.info("Response cache hit for %s model '%s'.", self.provider, model)
+            response = copy.deepcopy(cached)
+            response["usage"] = {
+                "tokens_spent": 0,
+                "time_in_seconds": round(time.time() - start_time, 3),
+                "cache_hit": True
+            }
+            return response
+
+        response = await self.inner.acall_chat_completion(model, messages)
+        # An answer from a fallback model must not be served later as this model's answer.
+        if "fallback_model" not in response["usage"]:
+            await self.cache.set(key, copy.deepcopy(response))
+        return response
+
+    async def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                      bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Replays a cached answer as a single delta, otherwise streams upstream
+        and stores the completed answer.
+        """
+        params = self.build_params(model, messages)
+        if bypass_cache or not is_deterministic(params):
+            async for event in self.inner.astream_chat_completion(model, messages, bypass_cache=bypass_cache):
+                yield event
+            return
+
+        key = make_cache_key(self.provider, params)
+        start_time = time.time()
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.info("Response cache hit for %s model '%s'.", self.provider, model)
+            yield {"type": "delta", "text": cached["text"]}
+            yield {
+                "type": "done",
+                "text": cached["text"],
+                "usage": {"tokens_spent": 0, "time_in_seconds": round(time.time() - start_time, 3), "cache_hit": True}
+            }
+            return
+
+        async for event in self.inner.astream_chat_completion(model, messages):
+            if event["type"] == "done" and "fallback_model" not in event["usage"]:
+                await self.cache.set(key, {"text": event["text"], "usage": copy.deepcopy(event["usage"])})
+            yield event
+
+
+def build_response_cache(cache_config: Dict[str, Any]) -> TieredResponseCache:
+    """
+    Builds the tiered cache from the 'response_cache' config section.
+    """
+    ttl_seconds = cache_config.get("ttl_seconds", 86400)
+    tiers: List[ResponseCache] = [
+        InMemoryResponseCache(max_entries=cache_config.get("max_entries", 1024), ttl_seconds=ttl_seconds)
+    ]
+    if cache_config.get("mongo_enabled", True):
+        tiers.append(MongoResponseCache(
+            collection_name=cache_config.get("mongo_collection", "llm_response_cache"),
+            ttl_seconds=ttl_seconds
+        ))
+    return TieredResponseCache(tiers)
@@ -0,0 +1,142 @@
+import copy
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.llm_clients.clients import AIClient, DelegatingAIClient
+from backend.llm_clients.response_cache import make_cache_key, is_deterministic
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """
+    One upstream call shared by every caller that asked for the same request meanwhile.
+    """
+
+    def __init__(self):
+        self.waiters = 0
+        self.task: Optional[asyncio.Task] = None
+        # Streaming flights record every event so late joiners can replay them.
+        self.events: List[Dict[str, Any]] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+
+
+def _shared_usage(start_time: float) -> Dict[str, Any]:
+    """
+    Usage reported to callers that joined another caller's flight; the tokens were spent only once.
+    """
+    return {"tokens_spent": 0, "time_in_seconds": round(time.time() - start_time, 3), "coalesced": True}
+
+
+class SingleFlightAIClient(DelegatingAIClient):
+    """
+    Makes identical deterministic requests that are in flight at the same time share
+    one upstream call. The upstream call is cancelled only when every caller waiting
+    on it has gone away.
+    """
+
+    def __init__(self, inner: AIClient, provider: str):
+        super().__init__(inner)
+        self.provider = provider
+        self._calls: Dict[str, _Flight] = {}
+        self._streams: Dict[str, _Flight] = {}
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+    def _join(self, flights: Dict[str, _Flight], key: str, model: str) -> Tuple[_Flight, bool]:
+        flight = flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            flights[key] = flight
+            self.upstream_calls += 1
+        else:
+            self.coalesced_calls += 1
+            logger.info("Joined in-flight %s request for model '%s'.", self.provider, model)
+        flight.waiters += 1
+        return flight, leader
+
+    def _leave(self, flights: Dict[str, _Flight], key: str, flight: _Flight) -> None:
+        flight.waiters -= 1
+        if flight.waiters == 0:
+            if flights.get(key) is flight:
+                del flights[key]
+            if not flight.task.done():
+                flight.task.cancel()
+
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        params = self.build_params(model, messages)
+        if bypass_cache or not is_deterministic(params):
+            return await self.inner.acall_chat_completion(model, messages, bypass_cache=bypass_cache)
+
+        key = make_cache_key(self.provider, params)
+        start_time = time.time()
+        flight, leader = self._join(self._calls, key, model)
+        if leader:
+            flight.task = asyncio.ensure_future(self.inner.acall_chat_completion(model, messages))
+            # Later identical requests start a new flight once this one has an answer.
+            flight.task.add_done_callback(lambda _: self._calls.pop(key, None) if self._calls.get(key) is flight else None)
+
+        try:
+            response = await asyncio.shield(flight.task)
+        finally:
+            self._leave(self._calls, key, flight)
+
+        response = copy.deepcopy(response)
+        if not leader:
+            response["usage"] = _shared_usage(start_time)
+        return response
+
+    async def _pump(self, flight: _Flight, model: str, messages: List[Dict[str, str]]) -> None:
+        try:
+            async for event in self.inner.astream_chat_completion(model, messages):
+                async with flight.changed:
+                    flight.events.append(event)
+                    flight.changed.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.finished = True
+            async with flight.changed:
+                flight.changed.notify_all()
+
+    async def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                      bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Callers joining a stream already in flight first receive the deltas sent so far.
+        """
+        params = self.build_params(model, messages)
+        if bypass_cache or not is_deterministic(params):
+            async for event in self.inner.astream_chat_completion(model, messages, bypass_cache=bypass_cache):
+                yield event
+            return
+
+        key = make_cache_key(self.provider, params)
+        start_time = time.time()
+        flight, leader = self._join(self._streams, key, model)
+        if leader:
+            flight.task = asyncio.ensure_future(self._pump(flight, model, messages))
+            flight.task.add_done_callback(lambda _: self._streams.pop(key, None) if self._streams.get(key) is flight else None)
+
+        try:
+            index = 0
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: index < len(flight.events) or flight.finished)
+                if index < len(flight.events):
+                    event = flight.events[index]
+                    index += 1
+                    if event["type"] == "done" and not leader:
+                        event = {**event, "usage": _shared_usage(start_time)}
+                    yield event
+                elif flight.error is not None:
+                    raise flight.error
+                else:
+                    return
+        finally:
+            self._leave(self._streams, key, flight)
@@ -0,0 +1,100 @@
+import logging
+from typing import Any, Dict, List, NamedTuple
+
+from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.lru_cache import LRUCache
+from backend.utils.request_context import current_technique
+from backend.utils.tokenizer import content_text, count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class TokenPlan(NamedTuple):
+    prompt_tokens: int
+    max_tokens: int
+
+
+class TokenBudgetPlanner:
+    """
+    Counts the prompt tokens of a request before it is sent and picks 'max_tokens' from
+    the technique's completion budget, the model's output limit and what is left of its
+    context window. Requests that cannot fit are rejected with HTTP 400 before any call.
+    Keeps planned vs actual token counts per model.
+    """
+
+    def __init__(self, budget_config: Dict[str, Any]):
+        self.default_limits = budget_config.get("default", {})
+        self.model_limits = budget_config.get("models", {})
+        self.technique_output_tokens = budget_config.get("techniques", {})
+        self.safety_margin_tokens = budget_config.get("safety_margin_tokens", 256)
+        self.min_output_tokens = budget_config.get("min_output_tokens", 256)
+        # build_params runs in several layers per call; plans are reused instead of re-tokenizing.
+        self._plans = LRUCache(max_entries=budget_config.get("max_cached_plans", 512))
+        # model -> counters of planned vs actual tokens
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def limits(self, model: str) -> Dict[str, Any]:
+        return {**self.default_limits, **self.model_limits.get(model, {})}
+
+    def plan(self, model: str, messages: List[Dict[str, Any]]) -> TokenPlan:
+        """
+        Returns the estimated prompt tokens and the max_tokens to request.
+        """
+        technique = current_technique.get()
+        key = (model, technique, tuple((m.get("role"), content_text(m.get("content"))) for m in messages))
+        token_plan = self._plans.get(key)
+        if token_plan is not None:
+            return token_plan
+
+        limits = self.limits(model)
+        context_window = limits.get("context_window", 128000)
+        prompt_tokens = count_message_tokens(messages, model)
+        available = context_window - prompt_tokens - self.safety_margin_tokens
+        if available < self.min_output_tokens:
+            logger.warning("Prompt of ~%d tokens does not fit the %d-token context window of '%s'.",
+                           prompt_tokens, context_window, model)
+            handle_http_exception(400, f"The prompt is too long for model '{model}': about {prompt_tokens} tokens "
+                                       f"of a {context_window}-token context window.")
+
+        wanted = self.technique_output_tokens.get(technique, limits.get("output_tokens", 4096))
+        # Reasoning models spend part of the completion budget on hidden reasoning.
+        wanted += limits.get("reasoning_tokens", 0)
+        max_tokens = min(wanted, limits.get("max_output_tokens", wanted), available)
+
+        token_plan = TokenPlan(prompt_tokens, max_tokens)
+        self._plans.set(key, token_plan)
+        return token_plan
+
+    def record(self, model: str, messages: List[Dict[str, Any]], usage: Dict[str, Any]) -> None:
+        """
+        Logs the plan of a finished call next to the usage the provider reported.
+        """
+        if usage.get("input_tokens") is None:
+            return
+        token_plan = self.plan(model, messages)
+        logger.info("Token plan for '%s' (%s): ~%d prompt tokens, max_tokens %d; actual %d prompt, %d completion tokens.",
+                    model, current_technique.get(), token_plan.prompt_tokens, token_plan.max_tokens,
+                    usage["input_tokens"], usage["output_tokens"])
+
+        stats = self._stats.setdefault(model, {"calls": 0, "planned_prompt_tokens": 0, "actual_prompt_tokens": 0,
+                                               "planned_max_tokens": 0, "actual_output_tokens": 0,
+                                               "hit_max_tokens": 0})
+        stats["calls"] += 1
+        stats["planned_prompt_tokens"] += token_plan.prompt_tokens
+        stats["actual_prompt_tokens"] += usage["input_tokens"]
+        stats["planned_max_tokens"] += token_plan.max_tokens
+        stats["actual_output_tokens"] += usage["output_tokens"]
+        if usage["output_tokens"] >= token_plan.max_tokens:
+            stats["hit_max_tokens"] += 1
+            logger.warning("Completion of '%s' (%s) was cut off at max_tokens %d.",
+                           model, current_technique.get(), token_plan.max_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model: {
+                **stats,
+                "prompt_estimate_ratio": round(stats["planned_prompt_tokens"] / stats["actual_prompt_tokens"], 3)
+                if stats["actual_prompt_tokens"] else None
+            }
+            for model, stats in self._stats.items()
+        }
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.db.db import get_database
+from backend.llm_clients.clients import AIClient, DelegatingAIClient
+from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.request_context import current_user_id, current_technique
+
+logger = logging.getLogger(__name__)
+
+TOKENS_PER_PRICE_UNIT = 1_000_000
+# Detail of the 429 sent once a user's daily budget is used up; unlike a rate limit, retrying soon does not help.
+BUDGET_EXCEEDED_DETAIL = "Daily LLM usage budget exceeded, please retry tomorrow."
+
+
+def compute_cost(usage: Dict[str, Any], price: Optional[Dict[str, float]]) -> Optional[float]:
+    """
+    Cost in USD of one call from its usage and the model's prices per million tokens.
+    Cached input tokens are billed at 'cached_input' and cache writes at 'cache_write'
+    when the model has such prices.
+    """
+    if not price or usage.get("input_tokens") is None or usage.get("output_tokens") is None:
+        return None
+    input_price = price.get("input", 0)
+    cached_tokens = usage.get("cached_tokens") or 0
+    cache_write_tokens = usage.get("cache_write_tokens") or 0
+    # Cache writes are part of the input tokens but billed at their own (higher) price.
+    cost = ((usage["input_tokens"] - cached_tokens) * input_price
+            + cached_tokens * price.get("cached_input", input_price)
+            + cache_write_tokens * (price.get("cache_write", input_price) - input_price)
+            + usage["output_tokens"] * price.get("output", 0))
+    return round(cost / TOKENS_PER_PRICE_UNIT, 6)
+
+
+class UsageLedger:
+    """
+    Records the usage and cost of every upstream LLM call in the 'usage_ledger' collection.
+    Entries are buffered and written in batches so recording never delays a call; write
+    errors are logged and the batch is dropped. Optionally enforces a daily cost budget per user.
+    """
+
+    def __init__(self, ledger_config: Dict[str, Any], pricing: Dict[str, Dict[str, float]]):
+        self.collection_name = ledger_config.get("collection", "usage_ledger")
+        self.flush_interval_seconds = ledger_config.get("flush_interval_seconds", 5)
+        self.max_buffer = ledger_config.get("max_buffer", 100)
+        self.daily_budget_usd = ledger_config.get("daily_budget_usd_per_user")
+        # Provider batch jobs are billed at a discount of the interactive prices.
+        self.batch_cost_factor = ledger_config.get("batch_cost_factor", 0.5)
+        self.pricing = pricing
+        self._buffer: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # Cost spent per (user, UTC day), seeded from the collection on first use.
+        self._daily_spend: Dict[Tuple[str, str], float] = {}
+
+        # Metrics
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def record(self, provider: str, model: str, usage: Dict[str, Any], streamed: bool = False,
+               batched: bool = False) -> Dict[str, Any]:
+        """
+        Buffers one ledger entry for a finished call and returns it.
+        'batched' marks a result of a provider batch job, billed at 'batch_cost_factor'.
+        """
+        user_id = current_user_id.get()
+        cost = compute_cost(usage, self.pricing.get(model))
+        if batched and cost is not None:
+            cost = round(cost * self.batch_cost_factor, 6)
+        entry = {
+            "user_id": user_id,
+            "technique": current_technique.get(),
+            "provider": provider,
+            "model": model,
+            "input_tokens": usage.get("input_tokens"),
+            "output_tokens": usage.get("output_tokens"),
+            "cached_tokens": usage.get("cached_tokens"),
+            "cache_write_tokens": usage.get("cache_write_tokens"),
+            "tokens_spent": usage.get("tokens_spent"),
+            "cost_usd": cost,
+            "time_in_seconds": usage.get("time_in_seconds"),
+            "tokens_per_second": usage.get("tokens_per_second"),
+            "streamed": streamed,
+            "batched": batched,
+            "created_at": datetime.utcnow()
+        }
+        self.recorded += 1
+        self._buffer.append(entry)
+
+        spend_key = (user_id, entry["created_at"].strftime("%Y-%m-%d"))
+        if user_id and cost and spend_key in self._daily_spend:
+            self._daily_spend[spend_key] += cost
+
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+        if len(self._buffer) >= self.max_buffer:
+            asyncio.create_task(self.flush())
+        return entry
+
+    async def flush(self) -> None:
+        """
+        Writes the buffered entries with one insert_many.
+        """
+        if not self._buffer:
+            return
+        entries, self._buffer = self._buffer, []
+        try:
+            await get_database()[self.collection_name].insert_many(entries, ordered=False)
+            self.written += len(entries)
+        except Exception as e:
+            self.dropped += len(entries)
+            logger.error("Failed to write %d usage ledger entries: %s", len(entries), e)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await self.flush()
+
+    async def spent_today(self, user_id: str) -> float:
+        """
+        Cost in USD the user has spent since midnight UTC.
+        """
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        spend_key = (user_id, today.strftime("%Y-%m-%d"))
+        if spend_key not in self._daily_spend:
+            # Drop the counters of previous days.
+            for key in [key for key in self._daily_spend if key[1] != spend_key[1]]:
+                del self._daily_spend[key]
+            await self.flush()
+            cursor = get_database()[self.collection_name].aggregate([
+                {"$match": {"user_id": user_id, "created_at": {"$gte": today, "$lt": today + timedelta(days=1)}}},
+                {"$group": {"_id": None, "cost_usd": {"$sum": "$cost_usd"}}}
+            ])
+            result = await cursor.to_list(length=1)
+            self._daily_spend[spend_key] = result[0]["cost_usd"] if result else 0.0
+        return self._daily_spend[spend_key]
+
+    async def check_budget(self) -> None:
+        """
+        Rejects the call with 429 when the current user has used up the daily budget.
+        """
+        user_id = current_user_id.get()
+        if self.daily_budget_usd is None or not user_id:
+            return
+        if await self.spent_today(user_id) >= self.daily_budget_usd:
+            self.rejected += 1
+            logger.warning("User %s exceeded the daily LLM budget of %s USD.", user_id, self.daily_budget_usd)
+            handle_http_exception(429, BUDGET_EXCEEDED_DETAIL)
+
+    async def close(self) -> None:
+        """
+        Stops the periodic flush and writes what is left in the buffer.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "buffered": len(self._buffer),
+            "budget_rejections": self.rejected,
+            "daily_budget_usd_per_user": self.daily_budget_usd
+        }
+
+
+class UsageLedgerAIClient(DelegatingAIClient):
+    """
+    Checks the user's daily budget before every upstream call and records the
+    exact usage and cost of the model that actually answered.
+    """
+
+    def __init__(self, inner: AIClient, provider: str, ledger: UsageLedger):
+        super().__init__(inner)
+        self.provider = provider
+        self.ledger = ledger
+
+    async def acall_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        await self.ledger.check_budget()
+        response = await self.inner.acall_chat_completion(model, messages, bypass_cache=bypass_cache)
+        response["usage"]["cost_usd"] = self.ledger.record(self.provider, model, response["usage"])["cost_usd"]
+        return response
+
+    async def astream_chat_completion(self, model: str, messages: List[Dict[str, str]],
+                                      bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        await self.ledger.check_budget()
+        async for event in self.inner.astream_chat_completion(model, messages, bypass_cache=bypass_cache):
+            if event["type"] == "done":
+                event["usage"]["cost_usd"] = self.ledger.record(
+                    self.provider, model, event["usage"], streamed=True)["cost_usd"]
+            yield event
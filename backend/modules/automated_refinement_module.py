@@ -1,16 +1,54 @@
+import time
+import asyncio
 import logging
 import sys
 import random
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 
 from backend.config.config import load_config
 from backend.llm_clients.ai_client_factory import get_ai_client
+from backend.modules.consensus_selector import ConsensusSelector
+from backend.modules.evaluator_module import Evaluator
+from backend.utils.lru_cache import LRUCache
 from backend.utils.path_utils import resolve_path
-from backend.utils.render_prompt import load_and_render_prompt, build_user_message
-from backend.utils.prompt_parser_validator import extract_json_from_response
+from backend.utils.render_prompt import build_prompt_messages
+from backend.utils.request_context import current_technique
+from backend.utils.prompt_parser_validator import extract_json_from_response, StreamingFieldParser
 
 logger = logging.getLogger(__name__)
 
+config = load_config(resolve_path("config.yaml"))
+expert_cache_config = config.get("expert_persona_cache", {})
+sc_config = config.get("self_consistency", {})
+refinement_config = config.get("iterative_refinement", {})
+
+# Expert personas keyed by (provider, model, normalized query); shared by all modules in the process.
+_expert_cache = LRUCache(
+    max_entries=expert_cache_config.get("max_entries", 1024),
+    ttl_seconds=expert_cache_config.get("ttl_seconds", 86400)
+)
+
+OPTIMIZATION_TECHNIQUES = ["CoT", "SC", "ReAct", "PC", "CoD", "SC_ReAct"]
+
+# Self-consistency execution modes: one completion that generates every interpretation
+# ("single_call"), or one concurrent call per interpretation and a local consensus vote ("parallel").
+SC_MODES = ["parallel", "single_call"]
+# Techniques that support the parallel mode -> prompt key of their single-candidate template.
+PARALLEL_SC_PROMPTS = {"SC": "SC_candidate", "SC_ReAct": "SC_ReAct_candidate"}
+
+# Each parallel candidate interprets the query from its own angle, so candidates differ
+# while every call stays deterministic (and cacheable).
+candidate_perspectives = [
+    "The most literal reading of the query.",
+    "The user's most likely underlying goal.",
+    "How a domain expert would frame the request.",
+    "How a newcomer to the topic would need the request framed.",
+    "The most specific and constrained version of the request.",
+    "The broadest reasonable scope of the request.",
+    "The expected output format and level of detail.",
+    "The constraints and edge cases the answer must respect."
+]
+
 emotional_stimuli_list = [
     "Write your answer and give me a confidence score between 0-1 for your answer.",
     "This is very important to my career.",
@@ -35,6 +73,8 @@ class AutomatedRefinementModule:
         max_iterations (int): Maximum number of optimization iterations (default: 3).
         hyperparams (dict): Hyperparameters for LLM calls.
         is_optimizing (bool): Simple lock preventing parallel optimization.
+        bypass_cache (bool): Whether to skip the LLM response cache for this module's calls.
+        sc_mode (str): Execution mode of SC and SC_ReAct, "parallel" or "single_call".
     """
 
     def __init__(
@@ -44,7 +84,9 @@ class AutomatedRefinementModule:
         model: str,
         prompts: Dict[str, str],
         max_iterations: int = 3,
-        hyperparams: Optional[dict] = None
+        hyperparams: Optional[dict] = None,
+        bypass_cache: bool = False,
+        sc_mode: Optional[str] = None
     ):
         self.user_query = user_query
         self.provider = provider
@@ -52,6 +94,8 @@ class AutomatedRefinementModule:
         self.model = model
         self.prompts = prompts
         self.max_iterations = max_iterations
+        self.bypass_cache = bypass_cache
+        self.sc_mode = sc_mode or sc_config.get("mode", "parallel")
         self.hyperparams = hyperparams or {
             "max_tokens": 1024,
             "temperature": 0.7,
@@ -61,7 +105,7 @@ class AutomatedRefinementModule:
             "stop_sequences": []
         }
         self.emotional_stimuli = emotional_stimuli_list
-        self.expert_persona_text: Optional[str] = f"You are {self.expert_finder()} with extensive experience."
+        self.expert_persona_text: Optional[str] = None
         self.emotional_stimuli_text: Optional[str] = random.choice(self.emotional_stimuli)
 
         # Tracking
@@ -70,19 +114,23 @@ class AutomatedRefinementModule:
         self.is_optimizing: bool = False  # Simple concurrency lock
         self.is_expert_present: bool = False
 
-    def expert_finder(self):
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    async def expert_finder(self):
+        # Runs in its own task next to the technique call; its usage and token budget are its own.
+        current_technique.set("expert_finder")
         full_expert_finder_path = self.prompts.get("expert_finder")
         prompt_context = {
             "user_query": self.user_query,
         }
 
-        # Render the chosen technique's prompt
-        rendered_prompt = load_and_render_prompt(full_expert_finder_path, prompt_context)
-        messages = build_user_message(rendered_prompt)
+        messages = build_prompt_messages(full_expert_finder_path, prompt_context)
 
         logger.info(f"Finding expert based on query: {self.user_query}  ...")
 
-        response_dict = self.client.call_chat_completion(self.model, messages)
+        response_dict = await self.client.acall_chat_completion(self.model, messages, bypass_cache=self.bypass_cache)
         response_text = response_dict["text"]
 
         content = extract_json_from_response(response_text)
@@ -94,12 +142,267 @@ class AutomatedRefinementModule:
             self.is_expert_present = False
             return None
 
-    def optimize_query(
+    async def resolve_expert_persona(self) -> str:
+        """
+        Sets and returns expert_persona_text, taking the expert from the persona cache
+        when the same (normalized) query was already seen for this provider and model.
+        """
+        cache_key = (self.provider, self.model, self._normalize_query(self.user_query))
+        expert = None if self.bypass_cache else _expert_cache.get(cache_key)
+
+        if expert is not None:
+            logger.info("Expert persona cache hit for query: %s", self.user_query)
+            self.is_expert_present = True
+        else:
+            expert = await self.expert_finder()
+            if self.is_expert_present:
+                _expert_cache.set(cache_key, expert)
+
+        self.expert_persona_text = f"You are {expert} with extensive experience."
+        return self.expert_persona_text
+
+    def _build_technique_messages(self, selected_technique: str, iterations: Optional[int] = None,
+                                  query: Optional[str] = None) -> list:
+        """
+        Render the chosen technique's prompt for 'query' (the user query by default) into chat messages.
+        """
+        technique_prompt_path = self.prompts.get(selected_technique)
+        if not technique_prompt_path:
+            raise ValueError(f"Technique '{selected_technique}' is not supported.")
+
+        iters = iterations or self.max_iterations
+
+        prompt_context = {
+            "user_query": query or self.user_query,
+            "number_of_iterations": iters,
+            "number_of_versions": iters
+        }
+
+        return build_prompt_messages(technique_prompt_path, prompt_context)
+
+    def _uses_parallel_sc(self, selected_technique: str) -> bool:
+        return self.sc_mode == "parallel" and selected_technique in PARALLEL_SC_PROMPTS
+
+    @staticmethod
+    def _combine_usage(usages: List[Dict[str, Any]], elapsed_time: float) -> Dict[str, Any]:
+        """
+        Sums the token counts and cost of concurrent calls; the time is the wall time of all of them.
+        """
+        combined: Dict[str, Any] = {"calls": len(usages), "time_in_seconds": round(elapsed_time, 3)}
+        for field in ("input_tokens", "output_tokens", "cached_tokens", "tokens_spent", "cost_usd"):
+            values = [usage.get(field) for usage in usages if usage.get(field) is not None]
+            combined[field] = sum(values) if values else None
+        if combined["output_tokens"] and elapsed_time > 0:
+            combined["tokens_per_second"] = round(combined["output_tokens"] / elapsed_time, 1)
+        return combined
+
+    async def _parallel_self_consistency(self, selected_technique: str, iterations: Optional[int] = None,
+                                         query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generates one interpretation per call, all calls concurrently, and selects the
+        consensus candidate locally. Returns the same shape as the single-call SC output.
+        """
+        prompt_path = self.prompts.get(PARALLEL_SC_PROMPTS[selected_technique])
+        if not prompt_path:
+            raise ValueError(f"Prompt for '{PARALLEL_SC_PROMPTS[selected_technique]}' is not configured.")
+
+        iters = iterations or self.max_iterations
+        num_candidates = min(iters, sc_config.get("max_candidates", 8))
+
+        logger.info("Generating %d self-consistency candidates concurrently with '%s'...",
+                    num_candidates, selected_technique)
+
+        start_time = time.time()
+        responses = await asyncio.gather(*[
+            self.client.acall_chat_completion(
+                model=self.model,
+                messages=build_prompt_messages(prompt_path, {
+                    "user_query": query or self.user_query,
+                    "number_of_iterations": iters,
+                    "perspective": candidate_perspectives[index % len(candidate_perspectives)]
+                }),
+                bypass_cache=self.bypass_cache
+            )
+            for index in range(num_candidates)
+        ], return_exceptions=True)
+
+        candidates = []
+        usages = []
+        errors = []
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.error("Self-consistency candidate failed: %s", response)
+                errors.append(response)
+                continue
+            usages.append(response["usage"])
+            content = extract_json_from_response(response["text"])
+            if isinstance(content, dict) and content.get("Optimized_Query"):
+                candidates.append(content)
+
+        if not candidates:
+            if errors:
+                raise errors[0]
+            raise ValueError("None of the self-consistency candidates returned an optimized query.")
+
+        consensus = await ConsensusSelector().select([c["Optimized_Query"] for c in candidates])
+        chosen = candidates[consensus["index"]]
+
+        return {
+            "Interpretations": candidates,
+            "Final_Synthesis": f"Interpretation {consensus['index'] + 1} of {len(candidates)} agrees with "
+                               f"{consensus['support'] - 1} other interpretation(s) "
+                               f"(mean similarity {consensus['mean_similarity']}) and was selected as the consensus.",
+            "Final_Optimized_Query": chosen["Optimized_Query"],
+            "Consensus": {**consensus, "candidates": num_candidates, "failed": num_candidates - len(candidates)},
+            "usage": self._combine_usage(usages, time.time() - start_time)
+        }
+
+    @staticmethod
+    def _parse_technique_response(response_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The technique's JSON output with the call's usage under "usage".
+        """
+        raw_output = extract_json_from_response(response_dict["text"])
+        raw_output["usage"] = response_dict["usage"]
+        return raw_output
+
+    def _apply_technique_response(self, selected_technique: str, response_dict: Dict[str, Any]) -> None:
+        """
+        Parse the technique's JSON output and record the final optimized query.
+        """
+        self.raw_output = self._parse_technique_response(response_dict)
+
+        if selected_technique in OPTIMIZATION_TECHNIQUES:
+            self.final_optimized_query = self.raw_output.get("Final_Optimized_Query", "")
+
+    async def _run_technique(self, selected_technique: str, iterations: Optional[int] = None,
+                             query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Runs the technique once on 'query' (the user query by default) and returns its raw output.
+        """
+        current_technique.set(selected_technique)
+        if self._uses_parallel_sc(selected_technique):
+            return await self._parallel_self_consistency(selected_technique, iterations, query)
+
+        messages = self._build_technique_messages(selected_technique, iterations, query)
+        response_dict = await self.client.acall_chat_completion(
+            model=self.model,
+            messages=messages,
+            bypass_cache=self.bypass_cache
+        )
+        return self._parse_technique_response(response_dict)
+
+    async def _score_query(self, query: str) -> Dict[str, Any]:
+        """
+        Rates a query with the LLM evaluator; returns the rating (None if unparsable), reasons and usage.
+        """
+        evaluator = Evaluator(
+            user_query=query,
+            provider=self.provider,
+            model=self.model,
+            prompts=self.prompts,
+            bypass_cache=self.bypass_cache
+        )
+        result = await evaluator.evaluate()
+        rating = result.get("prompt_rating") if isinstance(result, dict) else None
+        return {
+            "rating": rating if isinstance(rating, (int, float)) else None,
+            "reasons": result.get("reasons", []) if isinstance(result, dict) else [],
+            "usage": evaluator.evaluation_usage
+        }
+
+    async def optimize_query_iteratively(
+        self,
+        selected_technique: str,
+        iterations: Optional[int] = None,
+        max_rounds: Optional[int] = None,
+        target_rating: Optional[float] = None,
+        min_improvement: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Runs up to 'max_rounds' optimization rounds, each feeding the previous round's
+        Final_Optimized_Query back through the technique and rating the result with the
+        LLM evaluator. Stops once the rating reaches 'target_rating' or improves by less
+        than 'min_improvement' on the previous round (for round 1, on the rating of the
+        original query). The best-rated round becomes the result; every round's
+        rating, tokens and latency are kept under "rounds".
+        """
+        max_rounds = max_rounds or refinement_config.get("default_rounds", 1)
+        target_rating = target_rating if target_rating is not None else refinement_config.get("target_rating", 9)
+        min_improvement = min_improvement if min_improvement is not None \
+            else refinement_config.get("min_improvement", 1)
+
+        start_time = time.time()
+        # The original query is rated while the first round runs.
+        _, baseline = await asyncio.gather(
+            self.optimize_query(selected_technique, iterations),
+            self._score_query(self.user_query)
+        )
+        round_output = self.raw_output
+        round_input = self.user_query
+        round_started = start_time
+
+        rounds: List[Dict[str, Any]] = []
+        best: Optional[Dict[str, Any]] = None
+        stop_reason = "max_rounds"
+        while True:
+            query = round_output.get("Final_Optimized_Query", "")
+            score = await self._score_query(query) if query else {"rating": None, "reasons": [], "usage": None}
+            rounds.append({
+                "round": len(rounds) + 1,
+                "input_query": round_input,
+                "final_optimized_query": query,
+                "rating": score["rating"],
+                "reasons": score["reasons"],
+                "usage": round_output.get("usage"),
+                "evaluation_usage": score["usage"],
+                "time_in_seconds": round(time.time() - round_started, 3)
+            })
+            logger.info("Refinement round %d of '%s' rated %s.", len(rounds), selected_technique, score["rating"])
+
+            previous_rating = rounds[-2]["rating"] if len(rounds) > 1 else baseline["rating"]
+            if best is None or (score["rating"] or 0) > (best["round"]["rating"] or 0):
+                best = {"round": rounds[-1], "raw_output": round_output}
+
+            if score["rating"] is None:
+                stop_reason = "unrated"
+                break
+            if score["rating"] >= target_rating:
+                stop_reason = "target_rating"
+                break
+            if previous_rating is not None and score["rating"] - previous_rating < min_improvement:
+                stop_reason = "plateau"
+                break
+            if len(rounds) >= max_rounds:
+                break
+
+            round_input = query
+            round_started = time.time()
+            round_output = await self._run_technique(selected_technique, iterations, query=query)
+
+        usages = [usage for r in rounds for usage in (r["usage"], r["evaluation_usage"]) if usage]
+        if baseline["usage"]:
+            usages.append(baseline["usage"])
+
+        self.raw_output = dict(best["raw_output"])
+        self.raw_output["usage"] = self._combine_usage(usages, time.time() - start_time)
+        self.raw_output["rounds"] = rounds
+        self.raw_output["baseline_rating"] = baseline["rating"]
+        self.raw_output["best_round"] = best["round"]["round"]
+        self.raw_output["stop_reason"] = stop_reason
+        self.final_optimized_query = best["round"]["final_optimized_query"]
+        return self.raw_output
+
+    async def optimize_query(
         self, selected_technique: str, iterations: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Optimize the user query using the specified technique over a number of iterations.
-        Each technique has its own prompt template and output structure.
+        Each technique has its own prompt template and output structure. In the
+        parallel SC mode, SC and SC_ReAct run one call per interpretation concurrently.
+
+        The expert persona is resolved concurrently with the technique call, so the
+        latency is that of a single LLM round trip.
 
         Returns the raw JSON extracted from the LLM response.
         """
@@ -107,75 +410,172 @@ class AutomatedRefinementModule:
             raise RuntimeError("An optimization process is already in progress. Please wait.")
 
         self.is_optimizing = True
+        current_technique.set(selected_technique)
         try:
-            technique_prompt_path = self.prompts.get(selected_technique)
-            if not technique_prompt_path:
-                raise ValueError(f"Technique '{selected_technique}' is not supported.")
+            logger.info(f"Optimizing user query with technique '{selected_technique}'...")
 
-            iters = iterations or self.max_iterations
+            _, self.raw_output = await asyncio.gather(
+                self.resolve_expert_persona(),
+                self._run_technique(selected_technique, iterations)
+            )
+            self.final_optimized_query = self.raw_output.get("Final_Optimized_Query", "")
 
-            prompt_context = {
-                "user_query": self.user_query,
-                "number_of_iterations": iters,
-                "number_of_versions": iters
-            }
+        finally:
+            self.is_optimizing = False
 
-            rendered_prompt = load_and_render_prompt(technique_prompt_path, prompt_context)
-            messages = build_user_message(rendered_prompt)
+        return self.raw_output
 
-            logger.info(f"Optimizing user query with technique '{selected_technique}'...")
+    async def _race_technique(self, selected_technique: str, iterations: Optional[int],
+                              evaluate: bool) -> Dict[str, Any]:
+        """
+        One entry of a race: runs the technique and, when 'evaluate' is set, rates its
+        Final_Optimized_Query right after it finishes. Failures are reported, not raised.
+        """
+        start_time = time.time()
+        entry: Dict[str, Any] = {"technique": selected_technique, "final_optimized_query": None, "rating": None,
+                                 "reasons": [], "evaluation_usage": None, "error": None}
+        try:
+            entry["raw_output"] = await self._run_technique(selected_technique, iterations)
+            entry["final_optimized_query"] = entry["raw_output"].get("Final_Optimized_Query", "")
+            if evaluate and entry["final_optimized_query"]:
+                score = await self._score_query(entry["final_optimized_query"])
+                entry["rating"] = score["rating"]
+                entry["reasons"] = score["reasons"]
+                entry["evaluation_usage"] = score["usage"]
+        except Exception as e:
+            logger.error("Technique '%s' failed in race: %s", selected_technique, e)
+            entry["error"] = getattr(e, "detail", str(e))
+        entry["time_in_seconds"] = round(time.time() - start_time, 3)
+        return entry
+
+    async def race_techniques(
+        self, techniques: List[str], iterations: Optional[int] = None, evaluate: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Runs several techniques on the user query concurrently, sharing one expert persona
+        lookup, and optionally rates each result with the LLM evaluator as soon as it is
+        ready. Returns {"results", "expert_persona_text", "usage"}: results are ranked by
+        rating (highest first) when evaluated, otherwise kept in the requested order;
+        failed techniques come last with their "error".
+        """
+        if self.is_optimizing:
+            raise RuntimeError("An optimization process is already in progress. Please wait.")
 
-            response_dict = self.client.call_chat_completion(
-                model=self.model,
-                messages=messages
+        self.is_optimizing = True
+        start_time = time.time()
+        try:
+            logger.info("Racing techniques %s on the user query...", techniques)
+            _, *results = await asyncio.gather(
+                self.resolve_expert_persona(),
+                *[self._race_technique(technique, iterations, evaluate) for technique in techniques]
             )
-            response_text = response_dict["text"]
-            usage_info = response_dict["usage"]
-            self.raw_output = extract_json_from_response(response_text)
-            self.raw_output["usage"] = usage_info
-
-            if selected_technique in ["CoT", "SC", "ReAct", "PC", "CoD", "SC_ReAct"]:
-                self.final_optimized_query = self.raw_output.get("Final_Optimized_Query", "")
-
         finally:
             self.is_optimizing = False
 
-        return self.raw_output
+        order = {technique: index for index, technique in enumerate(techniques)}
+        results.sort(key=lambda entry: (entry["error"] is not None,
+                                        -(entry["rating"] if entry["rating"] is not None else -1),
+                                        order[entry["technique"]]))
+        for rank, entry in enumerate(results, start=1):
+            entry["rank"] = rank
+
+        usages = [usage for entry in results
+                  for usage in (entry.get("raw_output", {}).get("usage"), entry["evaluation_usage"]) if usage]
+        return {
+            "results": results,
+            "expert_persona_text": self.expert_persona_text,
+            "usage": self._combine_usage(usages, time.time() - start_time)
+        }
+
+    async def stream_optimize_query(
+        self, selected_technique: str, iterations: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of optimize_query. Yields {"type": "delta", "text": ...}
+        events while the technique output arrives, a {"type": "final_query", ...}
+        event as soon as "Final_Optimized_Query" is complete in the stream, and a
+        final {"type": "done", "raw_output": ...} event. The expert lookup runs
+        concurrently so it does not delay the first token.
+        """
+        if self.is_optimizing:
+            raise RuntimeError("An optimization process is already in progress. Please wait.")
+
+        self.is_optimizing = True
+        current_technique.set(selected_technique)
+        expert_task = None
+        try:
+            expert_task = asyncio.create_task(self.resolve_expert_persona())
+
+            if self._uses_parallel_sc(selected_technique):
+                # Candidates are not streamed; the consensus query is sent once it is chosen.
+                self.raw_output = await self._parallel_self_consistency(selected_technique, iterations)
+                self.final_optimized_query = self.raw_output["Final_Optimized_Query"]
+                yield {"type": "final_query", "Final_Optimized_Query": self.final_optimized_query}
+                await expert_task
+                yield {"type": "done", "raw_output": self.raw_output}
+                return
 
+            messages = self._build_technique_messages(selected_technique, iterations)
+
+            logger.info(f"Streaming optimization of user query with technique '{selected_technique}'...")
+
+            parser = StreamingFieldParser("Final_Optimized_Query")
+            async for event in self.client.astream_chat_completion(
+                model=self.model,
+                messages=messages,
+                bypass_cache=self.bypass_cache
+            ):
+                if event["type"] == "delta":
+                    yield event
+                    final_query = parser.feed(event["text"])
+                    if final_query is not None:
+                        yield {"type": "final_query", "Final_Optimized_Query": final_query}
+                else:
+                    self._apply_technique_response(selected_technique, event)
+
+            await expert_task
+            yield {"type": "done", "raw_output": self.raw_output}
+
+        finally:
+            if expert_task is not None and not expert_task.done():
+                expert_task.cancel()
+            self.is_optimizing = False
 
 if __name__ == "__main__":
-    """
-    Example usage when running this module directly.
-    Make sure your config.yaml has the required structure for 'provider',
-    API keys, and prompt file paths for each technique.
-    """
-    logging.basicConfig(level=logging.INFO)
+    async def main():
+        """
+        Example usage when running this module directly.
+        Make sure your config.yaml has the required structure for 'provider',
+        API keys, and prompt file paths for each technique.
+        """
+        logging.basicConfig(level=logging.INFO)
+
+        provider = config.get("provider", "openai")
 
-    config = load_config(resolve_path("config.yaml"))
+        client = get_ai_client(provider)
 
-    provider = config.get("provider", "openai")
+        # Example model
+        model = config["models"].get(provider, {}).get("gpt-3.5-turbo")
+        if not model:
+            logger.error("No default model specified for provider %s in configuration.", provider)
+            sys.exit(1)
 
-    client = get_ai_client(provider)
+        prompts = config.get("prompts", {})
 
-    # Example model
-    model = config["models"].get(provider, {}).get("gpt-3.5-turbo")
-    if not model:
-        logger.error("No default model specified for provider %s in configuration.", provider)
-        sys.exit(1)
+        user_query = input("Enter your query: ")
+        refinement_module = AutomatedRefinementModule(
+            user_query=user_query,
+            provider=provider,
+            model=model,
+            prompts=prompts
+        )
 
-    prompts = config.get("prompts", {})
+        res = await refinement_module.optimize_query(selected_technique="CoT", iterations=3)
 
-    user_query = input("Enter your query: ")
-    refinement_module = AutomatedRefinementModule(
-        user_query=user_query,
-        provider=provider,
-        model=model,
-        prompts=prompts
-    )
+        print("=== Final Result ===")
+        print("STIMULI >> ", refinement_module.emotional_stimuli_text)
+        print("Expert >>", refinement_module.expert_persona_text)
+        print(res)
 
-    res = refinement_module.optimize_query(selected_technique="CoT", iterations=3)
 
-    print("=== Final Result ===")
-    print("STIMULI >> ", refinement_module.emotional_stimuli_text)
-    print("Expert >>", refinement_module.expert_persona_text)
-    print(res)
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import re
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from backend.config.config import load_config
+from backend.utils.path_utils import resolve_path
+
+logger = logging.getLogger(__name__)
+
+config = load_config(resolve_path("config.yaml"))
+sc_config = config.get("self_consistency", {})
+
+# The embedding model is loaded on first use and shared by all selectors in the process.
+_embedding_model: Any = None
+_embedding_model_lock = threading.Lock()
+_embedding_unavailable = False
+
+
+def _get_embedding_model() -> Optional[Any]:
+    """
+    Loads the sentence-transformers model named in 'self_consistency.embedding_model',
+    or returns None when the library or the model cannot be loaded.
+    """
+    global _embedding_model, _embedding_unavailable
+    if _embedding_model is not None or _embedding_unavailable:
+        return _embedding_model
+
+    with _embedding_model_lock:
+        if _embedding_model is None and not _embedding_unavailable:
+            model_name = sc_config.get("embedding_model", "all-MiniLM-L6-v2")
+            try:
+                from sentence_transformers import SentenceTransformer
+                _embedding_model = SentenceTransformer(model_name)
+                logger.info("Loaded embedding model '%s' for consensus selection.", model_name)
+            except Exception as e:
+                _embedding_unavailable = True
+                logger.warning("Embedding model '%s' unavailable, using lexical similarity: %s", model_name, e)
+    return _embedding_model
+
+
+def _lexical_similarity_matrix(texts: List[str]) -> List[List[float]]:
+    """
+    Jaccard similarity of the word sets, used when no embedding model is available.
+    """
+    word_sets = [set(re.findall(r"\w+", text.lower())) for text in texts]
+    return [
+        [len(a & b) / len(a | b) if a | b else 1.0 for b in word_sets]
+        for a in word_sets
+    ]
+
+
+def _embedding_similarity_matrix(model: Any, texts: List[str]) -> List[List[float]]:
+    embeddings = model.encode(texts, normalize_embeddings=True)
+    return (embeddings @ embeddings.T).tolist()
+
+
+class ConsensusSelector:
+    """
+    Picks the consensus answer among independently generated candidates: the candidate
+    that agrees with the most others (cosine similarity of sentence embeddings at or above
+    'similarity_threshold'), ties broken by the mean similarity to all other candidates.
+    """
+
+    def __init__(self, similarity_threshold: Optional[float] = None):
+        self.similarity_threshold = similarity_threshold if similarity_threshold is not None \
+            else sc_config.get("similarity_threshold", 0.8)
+
+    def _similarity_matrix(self, texts: List[str]) -> Dict[str, Any]:
+        model = _get_embedding_model()
+        if model is not None:
+            return {"method": "embedding", "matrix": _embedding_similarity_matrix(model, texts)}
+        return {"method": "lexical", "matrix": _lexical_similarity_matrix(texts)}
+
+    async def select(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Returns {"index", "support", "mean_similarity", "method"} of the consensus candidate.
+        Encoding runs in a worker thread so the event loop stays responsive.
+        """
+        if len(texts) == 1:
+            return {"index": 0, "support": 1, "mean_similarity": 1.0, "method": "single"}
+
+        similarity = await asyncio.to_thread(self._similarity_matrix, texts)
+        matrix = similarity["matrix"]
+
+        best = None
+        for i, row in enumerate(matrix):
+            others = [score for j, score in enumerate(row) if j != i]
+            support = 1 + sum(1 for score in others if score >= self.similarity_threshold)
+            mean_similarity = sum(others) / len(others)
+            if best is None or (support, mean_similarity) > (best["support"], best["mean_similarity"]):
+                best = {"index": i, "support": support, "mean_similarity": round(mean_similarity, 3)}
+
+        best["method"] = similarity["method"]
+        return best
@@ -1,25 +1,32 @@
 import json
+import time
 import logging
 import asyncio
 import random
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 from backend.config.config import load_config
 from backend.llm_clients.ai_client_factory import get_ai_client
 from backend.llm_clients.clients import AIClient
 from backend.utils.http_error_handler import handle_http_exception
 from backend.utils.prompt_parser_validator import extract_json_from_response
 from backend.utils.path_utils import resolve_path
-from backend.utils.render_prompt import load_and_render_prompt, build_user_message
+from backend.utils.render_prompt import build_prompt_messages, build_user_message
+from backend.utils.request_context import current_technique
+from backend.utils.sse import merge_streams
 
 logger = logging.getLogger(__name__)
 
+config = load_config(resolve_path("config.yaml"))
+
+BLIND_RESULT_TIMEOUT_SECONDS = config.get("blind_results", {}).get("timeout_seconds", 60)
+
 class Evaluator:
     """
     Evaluator class for assessing prompts using either human-defined or LLM evaluation criteria.
     """
     def __init__(self, user_query: str, provider: str, model: str,
                  human_evaluation: bool = False, prompts: Dict[str, str] = None,
-                 optimized_user_query: str = None) -> None:
+                 optimized_user_query: str = None, bypass_cache: bool = False) -> None:
         """
         Initialize the Evaluator.
 
@@ -30,6 +37,7 @@ class Evaluator:
             human_evaluation (bool): Whether to use human-defined evaluation criteria.
             prompts (Dict[str, str]): A dictionary of prompt file paths.
             optimized_user_query (str): Optimized user query for comparison.
+            bypass_cache (bool): Whether to skip the LLM response cache for this evaluator's calls.
         """
         self.user_query = user_query
         self.provider = provider
@@ -43,12 +51,15 @@ class Evaluator:
         self.parsed_result_after_comparison: Dict[str, Any] = {}
         self.blind_results: Optional[list] = []
         self.chosen_model_after_blind_results: Optional[str] = None
+        self.bypass_cache = bypass_cache
+        self.evaluation_usage: Optional[Dict[str, Any]] = None
 
     async def evaluate(self) -> Dict[str, Any]:
         """
         Evaluate the input prompt using the selected evaluation method.
         """
         prompt_key = "evaluator_human" if self.human_evaluation else "evaluator_llm"
+        current_technique.set(prompt_key)
         prompt_path = self.prompts.get(prompt_key)
         if not prompt_path:
             raise ValueError("Prompt path for key '%s' not provided in configuration." % prompt_key)
@@ -57,18 +68,18 @@ class Evaluator:
             "user_query": self.user_query
         }
 
-        rendered_prompt = load_and_render_prompt(prompt_path, prompt_context)
-
-        messages = build_user_message(rendered_prompt)
+        messages = build_prompt_messages(prompt_path, prompt_context)
 
         logger.info("Calling AI model '%s' for evaluation using '%s' criteria.", self.model, prompt_key)
-        response_dict = self.client.call_chat_completion(self.model, messages)
+        response_dict = await self.client.acall_chat_completion(self.model, messages, bypass_cache=self.bypass_cache)
+        self.evaluation_usage = response_dict["usage"]
         response_text = response_dict["text"]
         self.evaluation_result = extract_json_from_response(response_text)
 
         return self.evaluation_result
 
     async def compare(self) -> Dict[str, Any]:
+        current_technique.set("comparison")
 
         messages1 = build_user_message(self.user_query)
 
@@ -77,8 +88,8 @@ class Evaluator:
         logger.info("Calling AI model '%s' for comparison between two queries", self.model)
 
         response1_dict, response2_dict = await asyncio.gather(
-            asyncio.to_thread(self.client.call_chat_completion, self.model, messages1),
-            asyncio.to_thread(self.client.call_chat_completion, self.model, messages2)
+            self.client.acall_chat_completion(self.model, messages1, bypass_cache=self.bypass_cache),
+            self.client.acall_chat_completion(self.model, messages2, bypass_cache=self.bypass_cache)
         )
 
         resp1_text = response1_dict["text"]
@@ -88,16 +99,43 @@ class Evaluator:
 
         return self.parsed_result_after_comparison
 
-    async def generate_blind_results(
-            self,
-            user_text: str,
-            num_versions: int
-    ):
+    async def stream_compare(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of compare. Both responses are streamed concurrently;
+        deltas are tagged with the result field they belong to.
+        """
+        current_technique.set("comparison")
+        streams = {
+            "default_query_response": self.client.astream_chat_completion(
+                self.model, build_user_message(self.user_query), bypass_cache=self.bypass_cache),
+            "optimized_query_response": self.client.astream_chat_completion(
+                self.model, build_user_message(self.optimized_user_query), bypass_cache=self.bypass_cache)
+        }
+
+        logger.info("Streaming AI model '%s' for comparison between two queries", self.model)
+
+        results = {}
+        async for target, event in merge_streams(streams):
+            if isinstance(event, Exception):
+                raise event
+            if event["type"] == "delta":
+                yield {"type": "delta", "target": target, "text": event["text"]}
+            else:
+                results[target] = event["text"]
+
+        self.parsed_result_after_comparison = {
+            "default_query_response": results.get("default_query_response", ""),
+            "optimized_query_response": results.get("optimized_query_response", "")
+        }
+        yield {"type": "done", "parsed_result_after_comparison": self.parsed_result_after_comparison}
+
+    def _choose_blind_models(self, num_versions: int) -> List[Tuple[str, str]]:
+        """
+        Randomly picks 'num_versions' distinct (provider, model) combinations from the configuration.
+        """
         if num_versions < 2 or num_versions > 4:
             handle_http_exception(400, "num_versions must be between 2 and 4.")
 
-
-        config = load_config(resolve_path("config.yaml"))
         openai_models = config["models"].get("openai", {})
         claude_models = config["models"].get("claude", {})
 
@@ -109,34 +147,139 @@ class Evaluator:
             handle_http_exception(500,
                                   "Not enough distinct models available to produce the requested number of versions.")
 
-        chosen_combos = random.sample(all_models, num_versions)
-
-        version_results = []
-        for (prov, model_name) in chosen_combos:
+        return random.sample(all_models, num_versions)
 
-            client: AIClient = get_ai_client(prov)
-
-            messages = build_user_message(user_text)
-            logger.info("Calling %s model='%s'", prov, model_name)
+    async def _generate_one_version(self, provider: str, model_name: str,
+                                    messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Calls one model for the blind results. Errors and timeouts are reported
+        in the returned entry instead of failing the whole request.
+        """
+        client: AIClient = get_ai_client(provider)
+        logger.info("Calling %s model='%s'", provider, model_name)
 
-            try:
-                response_dict = client.call_chat_completion(
+        start_time = time.time()
+        try:
+            response_dict = await asyncio.wait_for(
+                client.acall_chat_completion(
                     model=model_name,
-                    messages=messages
-                )
-                response_text = response_dict["text"]
-            except Exception as e:
-                logger.error("Error calling %s model '%s': %s", prov, model_name, e)
-                handle_http_exception(500, f"Error calling {prov} model '{model_name}': {e}")
-
-            version_results.append({
+                    messages=messages,
+                    bypass_cache=self.bypass_cache
+                ),
+                timeout=BLIND_RESULT_TIMEOUT_SECONDS
+            )
+            return {
                 "model": model_name,
-                "response": response_text
-            })
-        self.blind_results = version_results
+                "response": response_dict["text"],
+                "status": "ok",
+                "time_in_seconds": round(time.time() - start_time, 3)
+            }
+        except asyncio.TimeoutError:
+            logger.error("Timed out calling %s model '%s' after %s seconds", provider, model_name,
+                         BLIND_RESULT_TIMEOUT_SECONDS)
+            return {
+                "model": model_name,
+                "response": None,
+                "status": "timeout",
+                "error": f"No response within {BLIND_RESULT_TIMEOUT_SECONDS} seconds.",
+                "time_in_seconds": round(time.time() - start_time, 3)
+            }
+        except Exception as e:
+            logger.error("Error calling %s model '%s': %s", provider, model_name, e)
+            return {
+                "model": model_name,
+                "response": None,
+                "status": "error",
+                "error": str(e),
+                "time_in_seconds": round(time.time() - start_time, 3)
+            }
+
+    def _finish_blind_results(self, version_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Stores the version results; fails only if no model answered at all.
+        """
+        if not any(result["status"] == "ok" for result in version_results):
+            errors = "; ".join(f"{result['model']}: {result.get('error')}" for result in version_results)
+            handle_http_exception(502, f"None of the chosen models returned a response. {errors}")
 
+        self.blind_results = version_results
         return self.blind_results
 
+    async def generate_blind_results(
+            self,
+            user_text: str,
+            num_versions: int
+    ):
+        """
+        Calls all chosen models concurrently, each with its own timeout, so the
+        wall time is that of the slowest model rather than the sum of all of them.
+        Models that fail or time out are kept in the result with their status.
+        """
+        current_technique.set("blind_results")
+        chosen_combos = self._choose_blind_models(num_versions)
+
+        messages = build_user_message(user_text)
+        version_results = await asyncio.gather(*[
+            self._generate_one_version(prov, model_name, messages)
+            for (prov, model_name) in chosen_combos
+        ])
+
+        return self._finish_blind_results(list(version_results))
+
+    async def stream_blind_results(
+            self,
+            user_text: str,
+            num_versions: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_blind_results. All chosen models are
+        streamed concurrently; deltas are tagged with the version index only,
+        model names are revealed in the final event.
+        """
+        current_technique.set("blind_results")
+        chosen_combos = self._choose_blind_models(num_versions)
+
+        messages = build_user_message(user_text)
+        streams = {}
+        for version, (prov, model_name) in enumerate(chosen_combos):
+            logger.info("Streaming %s model='%s'", prov, model_name)
+            streams[version] = get_ai_client(prov).astream_chat_completion(
+                model=model_name,
+                messages=messages,
+                bypass_cache=self.bypass_cache
+            )
+
+        start_time = time.time()
+        version_results: Dict[int, Dict[str, Any]] = {}
+        async for version, event in merge_streams(streams, timeout=BLIND_RESULT_TIMEOUT_SECONDS):
+            prov, model_name = chosen_combos[version]
+            elapsed = round(time.time() - start_time, 3)
+            if isinstance(event, Exception):
+                timed_out = isinstance(event, asyncio.TimeoutError)
+                logger.error("Error streaming %s model '%s': %s", prov, model_name,
+                             "timed out" if timed_out else event)
+                version_results[version] = {
+                    "model": model_name,
+                    "response": None,
+                    "status": "timeout" if timed_out else "error",
+                    "error": f"No response within {BLIND_RESULT_TIMEOUT_SECONDS} seconds." if timed_out
+                    else str(event),
+                    "time_in_seconds": elapsed
+                }
+                yield {"type": "version_error", "version": version, "status": version_results[version]["status"]}
+            elif event["type"] == "delta":
+                yield {"type": "delta", "version": version, "text": event["text"]}
+            else:
+                version_results[version] = {
+                    "model": model_name,
+                    "response": event["text"],
+                    "status": "ok",
+                    "time_in_seconds": elapsed
+                }
+                yield {"type": "version_done", "version": version}
+
+        blind_results = self._finish_blind_results([version_results[v] for v in range(len(chosen_combos))])
+        yield {"type": "done", "blind_results": blind_results}
 
 
 if __name__ == "__main__":
@@ -8,7 +8,7 @@ from backend.llm_clients.clients import AIClient
 from backend.config.config import load_config
 from backend.utils.path_utils import resolve_path
 from backend.utils.prompt_parser_validator import extract_json_from_response
-from backend.utils.render_prompt import load_and_render_prompt, build_user_message
+from backend.utils.render_prompt import build_prompt_messages
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +34,7 @@ class KeyExtractor:
         self.prompts = prompts
         self.result = {}
 
-    def extract_key_elements(self) -> dict:
+    async def extract_key_elements(self) -> dict:
         prompt_key = "key_extraction"
         prompt_path = self.prompts.get(prompt_key)
         if not prompt_path:
@@ -44,13 +44,11 @@ class KeyExtractor:
             "user_query": self.user_query
         }
 
-        rendered_prompt = load_and_render_prompt(prompt_path, prompt_context)
-
-        messages = build_user_message(rendered_prompt)
+        messages = build_prompt_messages(prompt_path, prompt_context)
 
         logger.info("Calling AI model '%s' for extraction key elements.", self.model)
-        response_content = self.client.call_chat_completion(self.model, messages)
-        self.result = extract_json_from_response(response_content)
+        response_dict = await self.client.acall_chat_completion(self.model, messages)
+        self.result = extract_json_from_response(response_dict["text"])
         return self.result
 
 
@@ -78,7 +76,7 @@ if __name__ == "__main__":
         user_query = input("Enter your query: ").strip()
 
         extractor = KeyExtractor(user_query=user_query, client=client, model=model, prompts=prompts)
-        extracted_keys = extractor.extract_key_elements()
+        extracted_keys = await extractor.extract_key_elements()
         print(json.dumps(extracted_keys, indent=4))
 
 
@@ -2,6 +2,7 @@ import asyncio
 import time
 import logging
 import random
+from datetime import datetime
 from typing import Dict, Any, Optional, List, Union
 from tabulate import tabulate
 
@@ -9,17 +10,23 @@ from torch.distributions.constraints import independent
 
 from backend.config.config import load_config
 from backend.db.db import get_database
-from backend.llm_clients.ai_client_factory import get_ai_client
+from backend.llm_clients.ai_client_factory import get_ai_client, get_batch_client
 from backend.llm_clients.clients import AIClient
 from backend.modules.automated_refinement_module import AutomatedRefinementModule
 from backend.modules.evaluator_module import Evaluator
 from backend.utils.path_utils import resolve_path
 from backend.utils.prompt_parser_validator import extract_json_from_response
-from backend.utils.render_prompt import load_and_render_prompt, build_user_message
+from backend.utils.render_prompt import build_prompt_messages
 
 logger = logging.getLogger(__name__)
 config = load_config(resolve_path("config.yaml"))
 
+# Where the results of each kind of offline batch are stored.
+OFFLINE_BATCH_COLLECTIONS = {
+    "answers": "test_answer_results",
+    "automatic_evaluation": "automatic_answer_evaluation"
+}
+
 class AIQualityTestService:
 
     def __init__(self):
@@ -64,11 +71,12 @@ class AIQualityTestService:
             provider=provider,
             model=model,
             prompts=config.get("prompts", {}),
-            max_iterations=iterations
+            max_iterations=iterations,
+            bypass_cache=True
         )
 
         start_time = time.time()
-        raw_output = refinement_module.optimize_query(selected_technique=selected_technique)
+        raw_output = await refinement_module.optimize_query(selected_technique=selected_technique)
         elapsed = time.time() - start_time
 
         final_optimized_query = ""
@@ -123,6 +131,7 @@ class AIQualityTestService:
             model=model,
             human_evaluation=False,
             prompts=config.get("prompts", {}),
+            bypass_cache=True
         )
         result = await evaluator.evaluate()
 
@@ -142,8 +151,17 @@ class AIQualityTestService:
             user_text: str,
             num_versions: int,
             provider: str,
-            selected_model: str
+            selected_model: str,
+            offline: bool = False
     ) -> List[Dict[str, Any]]:
+        """
+        Generates 'num_versions' answers to 'user_text' and stores them in test_answer_results.
+        With 'offline', all answers are requested as one provider batch job instead.
+        """
+        if offline:
+            requests = {f"answer-{index}": [{"role": "user", "content": user_text}] for index in range(num_versions)}
+            return await self._run_offline_batch("answers", provider, selected_model, requests,
+                                                 {"user_query": user_text})
 
         tasks = []
         for _ in range(num_versions):
@@ -166,7 +184,7 @@ class AIQualityTestService:
 
         messages = [{"role": "user", "content": user_text}]
 
-        response_dict = await asyncio.to_thread(client.call_chat_completion, model, messages)
+        response_dict = await client.acall_chat_completion(model, messages, bypass_cache=True)
 
         response_text = response_dict["text"]
         usage = response_dict["usage"]
@@ -189,7 +207,8 @@ class AIQualityTestService:
             self,
             provider: str,
             model: str,
-            limit: int = 5
+            limit: int = 5,
+            offline: bool = False
     ) -> List[Dict[str, Any]]:
         """
         1) Get from test_answer_results a number (limit) of documents
@@ -198,6 +217,7 @@ class AIQualityTestService:
         3) Extract overall_score from response.
         4) Write (test_answer_result_id, overall_score) to automatic_answer_evaluation.
 
+        With 'offline', all evaluations are requested as one provider batch job instead.
         Return list of inserted documents.
         """
         client: AIClient = get_ai_client(provider)
@@ -206,6 +226,16 @@ class AIQualityTestService:
         cursor = self.db["test_answer_results"].find(query).limit(limit)
         docs_to_evaluate = await cursor.to_list(length=limit)
 
+        if offline:
+            requests = {
+                str(doc["_id"]): build_prompt_messages(
+                    self.prompts.get("independent_agent"),
+                    {"user_query": doc["user_query"], "model_response": doc["raw_response"]}
+                )
+                for doc in docs_to_evaluate
+            }
+            return await self._run_offline_batch("automatic_evaluation", provider, model, requests, {})
+
         inserted_results = []
 
         for doc in docs_to_evaluate:
@@ -213,16 +243,15 @@ class AIQualityTestService:
             user_query = doc["user_query"]
             model_response = doc["raw_response"]
 
-            rendered_prompt = load_and_render_prompt(
+            messages = build_prompt_messages(
                 self.prompts.get("independent_agent"),
                 {
                     "user_query": user_query,
                     "model_response": model_response
                 }
             )
-            messages = build_user_message(rendered_prompt)
 
-            response_dict = await asyncio.to_thread(client.call_chat_completion, model, messages)
+            response_dict = await client.acall_chat_completion(model, messages, bypass_cache=True)
             response_text = response_dict["text"]
 
             parsed = extract_json_from_response(response_text)
@@ -249,6 +278,129 @@ class AIQualityTestService:
 
         return inserted_results
 
+    async def _run_offline_batch(
+            self,
+            kind: str,
+            provider: str,
+            model: str,
+            requests: Dict[str, List[Dict[str, Any]]],
+            context: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Submits the requests ({custom_id: messages}) as one provider batch job, records it
+        in test_offline_batches so it can be collected after an interruption, then waits
+        for it and ingests its results. The record is written before the job is submitted,
+        so a submitted job is never left untracked.
+        """
+        if not requests:
+            return []
+
+        batch_client = get_batch_client(provider)
+        batch_doc = {
+            "kind": kind,
+            "provider": provider,
+            "model": model,
+            "batch_id": None,
+            "custom_ids": list(requests),
+            "context": context,
+            "state": "submitting",
+            "created_at": datetime.utcnow()
+        }
+        await self.db["test_offline_batches"].insert_one(batch_doc)
+
+        try:
+            batch_doc["batch_id"] = await batch_client.submit(model, requests)
+        except Exception as e:
+            logger.error("Submitting offline batch %s (%s) failed: %s", batch_doc["_id"], kind, e)
+            await self.db["test_offline_batches"].update_one(
+                {"_id": batch_doc["_id"]}, {"$set": {"state": "submit_failed", "error": str(e)}})
+            raise
+
+        batch_doc["state"] = "submitted"
+        try:
+            await self.db["test_offline_batches"].update_one(
+                {"_id": batch_doc["_id"]}, {"$set": {"batch_id": batch_doc["batch_id"], "state": "submitted"}})
+        except Exception as e:
+            # The job runs anyway; its ID is only in this log line and in this run.
+            logger.error("Could not record the ID %s of submitted offline batch %s: %s",
+                         batch_doc["batch_id"], batch_doc["_id"], e)
+        logger.info("Submitted offline batch %s (%s, %d requests)", batch_doc["batch_id"], kind, len(requests))
+
+        return await self._ingest_offline_batch(batch_doc)
+
+    def _offline_result_doc(self, batch_doc: Dict[str, Any], custom_id: str,
+                            result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The document an interactive run would store for this result, plus its batch_id.
+        """
+        if batch_doc["kind"] == "answers":
+            return {
+                "user_query": batch_doc["context"]["user_query"],
+                "time_in_seconds": result["usage"].get("time_in_seconds"),
+                "tokens_spent": result["usage"].get("tokens_spent"),
+                "model_name": batch_doc["model"],
+                "raw_response": result["text"],
+                "batch_id": batch_doc["batch_id"]
+            }
+
+        parsed = extract_json_from_response(result["text"])
+        return {
+            "test_answer_result_id": custom_id,
+            "overall_score": parsed.get("overall_score", None) if isinstance(parsed, dict) else None,
+            "batch_id": batch_doc["batch_id"]
+        }
+
+    async def _ingest_offline_batch(self, batch_doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Waits for a submitted batch, writes its results to the kind's test_* collection
+        with one insert_many and marks the batch as ingested.
+        """
+        batch_client = get_batch_client(batch_doc["provider"])
+        results = await batch_client.collect(batch_doc["batch_id"], batch_doc["model"])
+
+        docs_to_insert = []
+        failed = 0
+        for custom_id in batch_doc["custom_ids"]:
+            result = results.get(custom_id)
+            if result is None or "error" in result:
+                failed += 1
+                logger.error("Offline request %s of batch %s failed: %s", custom_id, batch_doc["batch_id"],
+                             result["error"] if result else "no result")
+                continue
+            docs_to_insert.append(self._offline_result_doc(batch_doc, custom_id, result))
+
+        if docs_to_insert:
+            await self.db[OFFLINE_BATCH_COLLECTIONS[batch_doc["kind"]]].insert_many(docs_to_insert)
+
+        await self.db["test_offline_batches"].update_one(
+            {"_id": batch_doc["_id"]},
+            {"$set": {"state": "ingested", "ingested": len(docs_to_insert), "failed": failed,
+                      "ingested_at": datetime.utcnow()}}
+        )
+        logger.info("Ingested %d results of offline batch %s into %s (%d failed)", len(docs_to_insert),
+                    batch_doc["batch_id"], OFFLINE_BATCH_COLLECTIONS[batch_doc["kind"]], failed)
+
+        for doc in docs_to_insert:
+            doc["_id"] = str(doc["_id"])
+        return docs_to_insert
+
+    async def ingest_offline_batches(self) -> List[Dict[str, Any]]:
+        """
+        Collects every offline batch that was submitted but not ingested yet,
+        e.g. because the run that submitted it was interrupted. A batch that cannot be
+        collected is logged and skipped; it stays submitted for the next call.
+        """
+        cursor = self.db["test_offline_batches"].find({"state": "submitted"})
+        pending_batches = await cursor.to_list(None)
+
+        ingested = []
+        for batch_doc in pending_batches:
+            try:
+                ingested.extend(await self._ingest_offline_batch(batch_doc))
+            except Exception as e:
+                logger.error("Could not ingest offline batch %s: %s", batch_doc["batch_id"], e)
+        return ingested
+
     async def fetch_test_answers(
         self,
         shuffle: bool = True
@@ -37,6 +37,20 @@ async def main():
     )
     print("=== AUTOMATIC EVALUATIONS RESULTS ===", generate_res)
 
+    # Offline mode: the same runs as one provider batch job each (cheaper, results within 24h).
+    # generate_res = await service.generate_results(
+    #     user_text="Write a haiku about the sea.",
+    #     num_versions=20,
+    #     provider="openai",
+    #     selected_model="gpt-4o-mini",
+    #     offline=True
+    # )
+    # print("=== OFFLINE ANSWERS RESULTS ===", generate_res)
+
+    # Collect offline batches left over from an interrupted run.
+    # generate_res = await service.ingest_offline_batches()
+    # print("=== INGESTED OFFLINE RESULTS ===", generate_res)
+
     # generate_res = await service.single_person_evaluation(
     #     shuffle=False
     # )
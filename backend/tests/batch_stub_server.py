@@ -0,0 +1,250 @@
+import json
+import time
+import uuid
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from typing import Dict, Any, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from backend.utils.http_error_handler import handle_http_exception
+
+logger = logging.getLogger(__name__)
+
+# A local stand-in for the OpenAI Batch API and the Anthropic Message Batches API, for
+# trying the offline mode of AIQualityTestService without API keys or cost. Point
+# 'offline_batches.base_urls' at it (openai: "http://127.0.0.1:8090/v1",
+# claude: "http://127.0.0.1:8090"). Batches finish 'completion_delay_seconds' after
+# they are submitted, and every request is answered with a canned completion.
+
+app = FastAPI(title="Batch API stand-in")
+
+settings = {"completion_delay_seconds": 5.0}
+_files: Dict[str, bytes] = {}
+_openai_batches: Dict[str, Dict[str, Any]] = {}
+_anthropic_batches: Dict[str, Dict[str, Any]] = {}
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def _prompt_text(params: Dict[str, Any]) -> str:
+    """
+    All text of a chat request, including Anthropic's separate system blocks.
+    """
+    parts = [block.get("text", "") for block in params.get("system") or [] if isinstance(block, dict)]
+    for message in params.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+        else:
+            parts.append(str(content or ""))
+    return "\n".join(parts)
+
+def _canned_completion(custom_id: str, prompt: str) -> str:
+    """
+    A deterministic answer: a JSON score for evaluation prompts, otherwise a short text.
+    """
+    digest = int(hashlib.sha256(f"{custom_id}:{prompt}".encode("utf-8")).hexdigest(), 16)
+    if "overall_score" in prompt:
+        return json.dumps({"overall_score": 1 + digest % 10})
+    return f"Stand-in answer {digest % 1000} to: {prompt[:80]}"
+
+def _is_finished(batch: Dict[str, Any]) -> bool:
+    return time.time() >= batch["finishes_at"]
+
+def _base_url(request: Request) -> str:
+    return str(request.base_url).rstrip("/")
+
+# ---- OpenAI Batch API ----
+
+@app.post("/v1/files")
+async def upload_file(request: Request) -> Dict[str, Any]:
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+
+    data, purpose, filename = b"", "batch", "batch.jsonl"
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name == "file":
+            data = part.get_payload(decode=True) or b""
+            filename = part.get_filename() or filename
+        elif name == "purpose":
+            purpose = part.get_content().strip()
+
+    file_id = f"file-{uuid.uuid4().hex[:24]}"
+    _files[file_id] = data
+    return {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed"}
+
+@app.get("/v1/files/{file_id}/content")
+async def file_content(file_id: str) -> PlainTextResponse:
+    if file_id not in _files:
+        handle_http_exception(404, "File not found.")
+    return PlainTextResponse(_files[file_id].decode("utf-8"))
+
+def _openai_output_line(line: Dict[str, Any]) -> Dict[str, Any]:
+    body = line["body"]
+    prompt = _prompt_text(body)
+    text = _canned_completion(line["custom_id"], prompt)
+    prompt_tokens, completion_tokens = _estimate_tokens(prompt), _estimate_tokens(text)
+    return {
+        "id": f"batch_req_{uuid.uuid4().hex[:24]}",
+        "custom_id": line["custom_id"],
+        "response": {
+            "status_code": 200,
+            "request_id": uuid.uuid4().hex,
+            "body": {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens,
+                          "prompt_tokens_details": {"cached_tokens": 0}}
+            }
+        },
+        "error": None
+    }
+
+def _openai_batch_view(batch: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completes the batch once its delay has passed, writing its output file.
+    """
+    if batch["status"] == "in_progress" and _is_finished(batch):
+        output = [_openai_output_line(line) for line in batch.pop("requests")]
+        output_file_id = f"file-{uuid.uuid4().hex[:24]}"
+        _files[output_file_id] = "".join(json.dumps(line) + "\n" for line in output).encode("utf-8")
+        batch.update(status="completed", output_file_id=output_file_id, completed_at=int(time.time()),
+                     request_counts={"total": len(output), "completed": len(output), "failed": 0})
+    return {key: value for key, value in batch.items() if key not in ("requests", "finishes_at")}
+
+@app.post("/v1/batches")
+async def create_openai_batch(request: Request) -> Dict[str, Any]:
+    payload = await request.json()
+    if payload.get("input_file_id") not in _files:
+        handle_http_exception(400, "Input file not found.")
+
+    requests = [json.loads(line) for line in _files[payload["input_file_id"]].decode("utf-8").splitlines()
+                if line.strip()]
+    batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+    _openai_batches[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": payload.get("endpoint"),
+        "completion_window": payload.get("completion_window", "24h"),
+        "input_file_id": payload["input_file_id"],
+        "status": "in_progress",
+        "output_file_id": None,
+        "error_file_id": None,
+        "created_at": int(time.time()),
+        "completed_at": None,
+        "request_counts": {"total": len(requests), "completed": 0, "failed": 0},
+        "requests": requests,
+        "finishes_at": time.time() + settings["completion_delay_seconds"]
+    }
+    logger.info("OpenAI batch %s accepted with %d requests.", batch_id, len(requests))
+    return _openai_batch_view(_openai_batches[batch_id])
+
+@app.get("/v1/batches/{batch_id}")
+async def retrieve_openai_batch(batch_id: str) -> Dict[str, Any]:
+    if batch_id not in _openai_batches:
+        handle_http_exception(404, "Batch not found.")
+    return _openai_batch_view(_openai_batches[batch_id])
+
+# ---- Anthropic Message Batches API ----
+
+def _anthropic_result(entry: Dict[str, Any]) -> Dict[str, Any]:
+    params = entry["params"]
+    prompt = _prompt_text(params)
+    text = _canned_completion(entry["custom_id"], prompt)
+    return {
+        "custom_id": entry["custom_id"],
+        "result": {
+            "type": "succeeded",
+            "message": {
+                "id": f"msg_{uuid.uuid4().hex[:24]}",
+                "type": "message",
+                "role": "assistant",
+                "model": params.get("model"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": _estimate_tokens(prompt), "output_tokens": _estimate_tokens(text),
+                          "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+            }
+        }
+    }
+
+def _anthropic_batch_view(batch: Dict[str, Any], request: Request) -> Dict[str, Any]:
+    """
+    Ends the batch once its delay has passed and exposes its results URL.
+    """
+    if batch["processing_status"] == "in_progress" and _is_finished(batch):
+        batch["results"] = [_anthropic_result(entry) for entry in batch.pop("requests")]
+        batch.update(processing_status="ended", ended_at=datetime.now(timezone.utc).isoformat(),
+                     request_counts={"processing": 0, "succeeded": len(batch["results"]), "errored": 0,
+                                     "canceled": 0, "expired": 0})
+    view = {key: value for key, value in batch.items() if key not in ("requests", "results", "finishes_at")}
+    if batch["processing_status"] == "ended":
+        view["results_url"] = f"{_base_url(request)}/v1/messages/batches/{batch['id']}/results"
+    return view
+
+@app.post("/v1/messages/batches")
+async def create_anthropic_batch(request: Request) -> Dict[str, Any]:
+    payload = await request.json()
+    requests: List[Dict[str, Any]] = payload.get("requests", [])
+    now = datetime.now(timezone.utc)
+    batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+    _anthropic_batches[batch_id] = {
+        "id": batch_id,
+        "type": "message_batch",
+        "processing_status": "in_progress",
+        "request_counts": {"processing": len(requests), "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0},
+        "created_at": now.isoformat(),
+        "expires_at": (now + timedelta(hours=24)).isoformat(),
+        "ended_at": None,
+        "cancel_initiated_at": None,
+        "archived_at": None,
+        "results_url": None,
+        "requests": requests,
+        "finishes_at": time.time() + settings["completion_delay_seconds"]
+    }
+    logger.info("Anthropic message batch %s accepted with %d requests.", batch_id, len(requests))
+    return _anthropic_batch_view(_anthropic_batches[batch_id], request)
+
+@app.get("/v1/messages/batches/{batch_id}")
+async def retrieve_anthropic_batch(batch_id: str, request: Request) -> Dict[str, Any]:
+    if batch_id not in _anthropic_batches:
+        handle_http_exception(404, "Batch not found.")
+    return _anthropic_batch_view(_anthropic_batches[batch_id], request)
+
+@app.get("/v1/messages/batches/{batch_id}/results")
+async def anthropic_batch_results(batch_id: str) -> PlainTextResponse:
+    batch = _anthropic_batches.get(batch_id)
+    if batch is None or batch["processing_status"] != "ended":
+        return JSONResponse(status_code=404, content={"type": "error", "error": {
+            "type": "not_found_error", "message": "Batch results are not available yet."}})
+    return PlainTextResponse("".join(json.dumps(result) + "\n" for result in batch["results"]),
+                             media_type="application/x-jsonl")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI and Anthropic batch APIs.")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=settings["completion_delay_seconds"],
+                        help="Seconds until a submitted batch is finished.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings["completion_delay_seconds"] = args.delay
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
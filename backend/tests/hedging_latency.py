@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from backend.llm_clients.hedging import HedgePolicy, HedgingAIClient
+
+# Checks which latencies HedgingAIClient feeds into the hedge delay percentile: every
+# call of the primary model must add exactly one sample, including a primary that is
+# cancelled because the hedge won, and a failed primary must add none.
+
+HEDGE_DELAY_SECONDS = 0.1
+
+
+class StubClient:
+    """
+    Answers after the delay configured for the model, or raises if the delay is an exception.
+    """
+
+    def __init__(self, delays):
+        self.delays = delays
+
+    async def acall_chat_completion(self, model, messages, bypass_cache=False):
+        delay = self.delays[model]
+        if isinstance(delay, Exception):
+            raise delay
+        await asyncio.sleep(delay)
+        return {"text": model, "usage": {}}
+
+
+def _hedged_call(primary_delay, hedge_delay):
+    policy = HedgePolicy(
+        {"models": ["primary"], "fallback_models": {"primary": "hedge"}, "max_hedge_rate": 1.0},
+        {"openai": {"primary": "primary", "hedge": "hedge"}}
+    )
+    # A fixed delay instead of a warmed-up latency window, so the window starts empty.
+    policy.hedge_delay = lambda model: HEDGE_DELAY_SECONDS
+    client = HedgingAIClient(StubClient({"primary": primary_delay, "hedge": hedge_delay}), "openai", policy)
+
+    async def call():
+        try:
+            return (await client.acall_chat_completion("primary", []))["text"]
+        except Exception:
+            return None
+        finally:
+            # Let the cancelled call unwind before the window is inspected.
+            await asyncio.sleep(0.05)
+
+    winner = asyncio.run(call())
+    return winner, policy, list(policy._latencies.get("primary", []))
+
+
+def test_primary_wins_before_the_delay():
+    winner, policy, samples = _hedged_call(0.02, 0.02)
+    assert winner == "primary"
+    assert policy.hedges == 0
+    assert len(samples) == 1
+    assert samples[0] < HEDGE_DELAY_SECONDS
+
+
+def test_primary_wins_after_the_hedge_is_sent():
+    winner, policy, samples = _hedged_call(0.15, 1.0)
+    assert winner == "primary"
+    assert policy.hedges == 1
+    assert len(samples) == 1
+    assert samples[0] >= 0.15
+    assert "hedge" not in policy._latencies
+
+
+def test_hedge_wins():
+    winner, policy, samples = _hedged_call(1.0, 0.05)
+    assert winner == "hedge"
+    assert policy.hedge_wins == 1
+    assert len(samples) == 1
+    # Lower bound of the cancelled primary: the hedge delay plus the hedge's latency.
+    assert samples[0] == pytest.approx(HEDGE_DELAY_SECONDS + 0.05, abs=0.05)
+
+
+def test_failed_primary_adds_no_sample():
+    winner, policy, samples = _hedged_call(RuntimeError("upstream error"), 0.05)
+    assert winner is None
+    assert samples == []
@@ -0,0 +1,157 @@
+import time
+import uuid
+import logging
+import socket
+import asyncio
+import threading
+
+import pytest
+import uvicorn
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from backend.db.settings import MONGO_URI, DB_NAME, MONGO_CLIENT_OPTIONS
+from backend.llm_clients.batch_clients import OpenAIBatchClient, AnthropicBatchClient
+from backend.llm_clients.clients import OpenAIClient, AnthropicClient
+from backend.tests import AiQualityTestService as quality_service
+from backend.tests import batch_stub_server
+
+# Runs the offline mode of AIQualityTestService end to end against batch_stub_server:
+# for each provider a small batch of answers is submitted, collected and ingested, then
+# evaluated as a second batch, and left-over batches are collected with
+# ingest_offline_batches(). Needs the MongoDB from config.yaml; every test works in a
+# throwaway database that is dropped afterwards.
+
+PROVIDERS = {
+    "openai": {"model": "gpt-4o-mini", "path": "/v1",
+               "client": OpenAIClient, "batch_client": OpenAIBatchClient},
+    "claude": {"model": "claude-3-5-haiku-latest", "path": "",
+               "client": AnthropicClient, "batch_client": AnthropicBatchClient},
+}
+NUM_ANSWERS = 3
+
+
+@pytest.fixture(scope="module")
+def stub_server_url():
+    """
+    Starts the batch API stand-in on a free port, with batches finishing right away.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    batch_stub_server.settings["completion_delay_seconds"] = 0.0
+    server = uvicorn.Server(uvicorn.Config(batch_stub_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "The batch stub server did not start."
+        time.sleep(0.05)
+
+    yield f"http://127.0.0.1:{port}"
+
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+@pytest.fixture
+def offline_service(stub_server_url, monkeypatch):
+    """
+    Points the offline batch clients at the stub server and returns a runner that calls
+    a test coroutine with an AIQualityTestService on a fresh database.
+    """
+    batch_clients = {
+        provider: settings["batch_client"](
+            settings["client"]("stub-key", base_url=stub_server_url + settings["path"]),
+            provider,
+            {"poll_interval_seconds": 0.05, "timeout_seconds": 10}
+        )
+        for provider, settings in PROVIDERS.items()
+    }
+    monkeypatch.setattr(quality_service, "get_batch_client", lambda provider: batch_clients[provider])
+
+    def run(test):
+        async def main():
+            client = AsyncIOMotorClient(MONGO_URI, **MONGO_CLIENT_OPTIONS)
+            db = client[f"{DB_NAME}_offline_test_{uuid.uuid4().hex[:8]}"]
+            monkeypatch.setattr(quality_service, "get_database", lambda: db)
+            try:
+                await test(quality_service.AIQualityTestService(), batch_clients)
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+
+        asyncio.run(main())
+
+    return run
+
+
+def test_offline_answers_and_evaluation(offline_service):
+    async def test(service, batch_clients):
+        for provider, settings in PROVIDERS.items():
+            model = settings["model"]
+            user_text = f"Write a haiku about {provider} batch jobs"
+
+            answers = await service.generate_results(user_text, NUM_ANSWERS, provider, model, offline=True)
+            answer_rows = await service.db["test_answer_results"].find({"user_query": user_text}).to_list(None)
+            assert len(answers) == NUM_ANSWERS
+            assert len(answer_rows) == NUM_ANSWERS
+            for row in answer_rows:
+                assert row["model_name"] == model
+                assert row["raw_response"].startswith("Stand-in answer")
+                assert row["tokens_spent"] > 0
+                assert row["batch_id"] == answer_rows[0]["batch_id"]
+
+            # Only this provider's answers are in the collection, so they are the ones selected.
+            evaluations = await service.automatic_evaluation(provider, model, limit=NUM_ANSWERS, offline=True)
+            answer_ids = {str(row["_id"]) for row in answer_rows}
+            evaluation_rows = await service.db["automatic_answer_evaluation"].find(
+                {"test_answer_result_id": {"$in": list(answer_ids)}}).to_list(None)
+            assert len(evaluations) == NUM_ANSWERS
+            assert {row["test_answer_result_id"] for row in evaluation_rows} == answer_ids
+            for row in evaluation_rows:
+                assert 1 <= row["overall_score"] <= 10
+
+            batch_rows = await service.db["test_offline_batches"].find({"provider": provider}).to_list(None)
+            assert sorted(row["kind"] for row in batch_rows) == ["answers", "automatic_evaluation"]
+            for row in batch_rows:
+                assert row["state"] == "ingested"
+                assert row["ingested"] == NUM_ANSWERS
+                assert row["failed"] == 0
+
+            # The next provider starts from an empty collection again.
+            await service.db["test_answer_results"].delete_many({})
+
+    offline_service(test)
+
+
+def test_ingest_offline_batches_skips_failing_batch(offline_service, caplog):
+    async def test(service, batch_clients):
+        for provider, settings in PROVIDERS.items():
+            user_text = f"Left over {provider} batch"
+            requests = {f"answer-{index}": [{"role": "user", "content": user_text}] for index in range(NUM_ANSWERS)}
+            # As left behind by a run that was interrupted after submitting.
+            batch_id = await batch_clients[provider].submit(settings["model"], requests)
+            await service.db["test_offline_batches"].insert_many([
+                {"kind": "answers", "provider": provider, "model": settings["model"], "batch_id": batch_id,
+                 "custom_ids": list(requests), "context": {"user_query": user_text}, "state": "submitted"},
+                {"kind": "answers", "provider": provider, "model": settings["model"],
+                 "batch_id": f"unknown-{provider}-batch", "custom_ids": ["answer-0"],
+                 "context": {"user_query": user_text}, "state": "submitted"}
+            ])
+
+        with caplog.at_level(logging.ERROR, logger=quality_service.logger.name):
+            ingested = await service.ingest_offline_batches()
+
+        assert len(ingested) == NUM_ANSWERS * len(PROVIDERS)
+        for provider in PROVIDERS:
+            rows = await service.db["test_answer_results"].find(
+                {"user_query": f"Left over {provider} batch"}).to_list(None)
+            assert len(rows) == NUM_ANSWERS
+            unknown = await service.db["test_offline_batches"].find_one({"batch_id": f"unknown-{provider}-batch"})
+            assert unknown["state"] == "submitted"
+            assert f"Could not ingest offline batch unknown-{provider}-batch" in caplog.text
+        assert await service.db["test_offline_batches"].count_documents({"state": "ingested"}) == len(PROVIDERS)
+
+    offline_service(test)
@@ -1,14 +1,20 @@
+import hashlib
 import logging
+from typing import Any, Dict
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import jwt
 from datetime import datetime
 
 from backend.config.config import load_config
+from backend.db.service.user_service import get_user_by_id
 from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.lru_cache import LRUCache
 from backend.utils.path_utils import resolve_path
+from backend.utils.request_context import current_user_id
 
 config = load_config(resolve_path("config.yaml"))
+auth_cache_config = config.get("auth_cache", {})
 
 SECRET_KEY = config.get("auth_secret_key")
 ALGORITHM = "HS256"
@@ -17,12 +23,28 @@ logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+# Verified tokens (by SHA-256 of the token) -> user_id, each entry expiring with its token.
+_token_cache = LRUCache(max_entries=auth_cache_config.get("max_tokens", 10000))
+# Resolved user documents, kept briefly so profile changes show up soon.
+_user_cache = LRUCache(
+    max_entries=auth_cache_config.get("max_users", 10000),
+    ttl_seconds=auth_cache_config.get("user_ttl_seconds", 60)
+)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """
     Extract and validate the JWT from Authorization header: Bearer <token>.
-    Returns the user_id (str) if valid.
+    Returns the user_id (str) if valid. Verified tokens are cached until they expire.
+    The user_id is also published in the request context (e.g. for fair LLM rate limiting).
     """
     token = credentials.credentials
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    user_id = _token_cache.get(token_hash)
+    if user_id is not None:
+        current_user_id.set(user_id)
+        return user_id
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
@@ -32,8 +54,22 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         # Check token expiry
         if datetime.utcnow().timestamp() > exp:
             handle_http_exception(status_code=401, detail="Token has expired.")
+        _token_cache.set(token_hash, user_id, expires_at=exp)
+        current_user_id.set(user_id)
         return user_id
     except jwt.ExpiredSignatureError:
         handle_http_exception(status_code=401, detail="Token has expired.")
     except jwt.PyJWTError:
         handle_http_exception(status_code=401, detail="Token is invalid.")
+
+async def get_current_user_doc(user_id: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    Resolves the authenticated user's document (without the password hash),
+    served from a short-lived cache to skip the MongoDB lookup on hot endpoints.
+    """
+    user_doc = _user_cache.get(user_id)
+    if user_doc is None:
+        user_doc = await get_user_by_id(user_id)
+        user_doc.pop("password", None)
+        _user_cache.set(user_id, user_doc)
+    return dict(user_doc)
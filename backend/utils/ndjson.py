@@ -0,0 +1,82 @@
+import json
+import tempfile
+from typing import IO, Any, AsyncIterator, Tuple, Union
+
+from backend.utils.http_error_handler import handle_http_exception
+
+# Uploads up to this size are spooled in memory, larger ones in a temporary file.
+SPOOL_MEMORY_BYTES = 8 << 20
+READ_CHUNK_BYTES = 64 << 10
+
+
+def format_ndjson(data: Any) -> str:
+    """
+    Formats one newline-delimited JSON record.
+    """
+    return json.dumps(data, ensure_ascii=False, default=str) + "\n"
+
+
+async def spool_body(chunks: AsyncIterator[bytes], max_bytes: int) -> IO[bytes]:
+    """
+    Reads a whole request body into a spooled temporary file before any response is
+    streamed, so the body is never read concurrently with the server's disconnect
+    listener. Bodies larger than 'max_bytes' are rejected with HTTP 413.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            spool.close()
+            handle_http_exception(413, f"The upload is larger than {max_bytes} bytes.")
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+async def iter_spooled(spool: IO[bytes]) -> AsyncIterator[bytes]:
+    """
+    Yields a spooled body in chunks and closes it afterwards.
+    """
+    try:
+        while True:
+            chunk = spool.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes],
+                      max_line_bytes: int = 1 << 20) -> AsyncIterator[Tuple[int, Union[Any, ValueError]]]:
+    """
+    Parses an NDJSON (JSON Lines) body as it arrives and yields (line_number, record)
+    for every non-empty line, numbered from 1. A line that is not valid JSON, or is
+    longer than 'max_line_bytes', is yielded as a ValueError so the caller can report
+    it and carry on with the next line.
+    """
+    buffer = b""
+    line_number = 0
+
+    def parse(line: bytes) -> Union[Any, ValueError]:
+        if len(line) > max_line_bytes:
+            return ValueError(f"Line is longer than {max_line_bytes} bytes.")
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return ValueError(f"Invalid JSON: {e}")
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, parse(line)
+        if len(buffer) > max_line_bytes:
+            # Keep only the head of an oversized line; it is reported once the line ends.
+            buffer = buffer[:max_line_bytes + 1]
+
+    if buffer.strip():
+        yield line_number + 1, parse(buffer)
@@ -0,0 +1,84 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from backend.utils.http_error_handler import handle_http_exception
+
+MAX_PAGE_SIZE = 100
+SORT_ORDERS = {"asc": 1, "desc": -1}
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """
+    Builds an opaque cursor pointing right after the given document.
+    """
+    payload = {"created_at": doc["created_at"].isoformat(), "id": str(doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Returns the (created_at, _id) position stored in a cursor.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(payload["created_at"]), ObjectId(payload["id"])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError, InvalidId):
+        handle_http_exception(400, "Invalid pagination cursor.")
+
+
+def build_projection(fields: Optional[str], summary_fields: List[str]) -> Optional[Dict[str, int]]:
+    """
+    Turns a comma-separated 'fields' parameter into a projection.
+    None selects the summary fields, "all" returns whole documents.
+    """
+    if fields == "all":
+        return None
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else summary_fields
+    projection = {field: 1 for field in selected}
+    # Needed to build the next cursor.
+    projection["created_at"] = 1
+    return projection
+
+
+async def paginate(
+        collection: AsyncIOMotorCollection,
+        query: Dict[str, Any],
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order: str = "desc",
+        projection: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Keyset pagination on (created_at, _id). Returns the page of documents
+    and the cursor of the next page (None on the last page).
+    """
+    if order not in SORT_ORDERS:
+        handle_http_exception(400, f"Invalid sort order '{order}'. Available: {list(SORT_ORDERS)}")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        handle_http_exception(400, f"'limit' must be between 1 and {MAX_PAGE_SIZE}.")
+
+    direction = SORT_ORDERS[order]
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        op = "$gt" if direction == 1 else "$lt"
+        query = {**query, "$or": [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, "_id": {op: last_id}}
+        ]}
+
+    # One extra document tells whether another page exists.
+    docs = await collection.find(query, projection) \
+        .sort([("created_at", direction), ("_id", direction)]) \
+        .limit(limit + 1) \
+        .to_list(length=limit + 1)
+
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
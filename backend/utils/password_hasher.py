@@ -0,0 +1,146 @@
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from backend.config.config import load_config
+from backend.utils.http_error_handler import handle_http_exception
+from backend.utils.path_utils import resolve_path
+
+logger = logging.getLogger(__name__)
+
+_hasher: Optional["PasswordHasher"] = None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool so password work
+    never blocks the event loop. Requests beyond 'max_concurrency' wait in a queue;
+    when 'max_queue_depth' requests are already waiting, new ones are rejected with 503.
+
+    Attributes:
+        rounds (int): bcrypt cost factor used for new hashes.
+        min_rounds (int): Hashes with a lower cost factor are rehashed on login.
+        max_rounds (int): Hashes with a higher cost factor are rehashed on login.
+        max_concurrency (int): Number of hashing threads.
+        max_queue_depth (int): Maximum number of requests waiting for a free thread.
+    """
+
+    def __init__(self, rounds: int = 12, min_rounds: Optional[int] = None, max_rounds: Optional[int] = None,
+                 max_concurrency: int = 4, max_queue_depth: int = 100):
+        self.rounds = rounds
+        self.min_rounds = min_rounds or rounds
+        self.max_rounds = max_rounds or rounds
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=self.rounds,
+            bcrypt__min_rounds=self.min_rounds,
+            bcrypt__max_rounds=self.max_rounds
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="password-hasher")
+        # Created on first use so it binds to the running event loop.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.queued = 0
+        self.in_flight = 0
+        self.peak_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_wait_seconds = 0.0
+
+    async def _run(self, func, *args) -> Any:
+        if self.queued >= self.max_queue_depth:
+            self.rejected += 1
+            logger.warning("Password hashing queue is full (%d waiting).", self.queued)
+            handle_http_exception(503, "Too many authentication requests, please retry shortly.")
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        enqueued_at = time.perf_counter()
+        self.queued += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queued)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        self.total_wait_seconds += time.perf_counter() - enqueued_at
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """
+        Returns a bcrypt hash of the password using the configured cost factor.
+        """
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifies the password. Returns (valid, new_hash) where new_hash is set when the
+        stored hash was made with a cost factor outside the configured range and should
+        replace the stored one.
+        """
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "peak_queue_depth": self.peak_queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_wait_seconds": self.total_wait_seconds / self.completed if self.completed else 0.0
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Returns the shared password hasher, building it from the 'password_hashing' config section on first use.
+    """
+    global _hasher
+    if _hasher is None:
+        hashing_config = load_config(resolve_path("config.yaml")).get("password_hashing", {})
+        _hasher = PasswordHasher(
+            rounds=hashing_config.get("rounds", 12),
+            min_rounds=hashing_config.get("min_rounds"),
+            max_rounds=hashing_config.get("max_rounds"),
+            max_concurrency=hashing_config.get("max_concurrency", 4),
+            max_queue_depth=hashing_config.get("max_queue_depth", 100)
+        )
+        logger.info("Password hasher ready (bcrypt rounds: %d, threads: %d).", _hasher.rounds, _hasher.max_concurrency)
+    return _hasher
+
+
+def close_password_hasher() -> None:
+    """
+    Stops the hashing threads.
+    This function should be called on application shutdown.
+    """
+    global _hasher
+    if _hasher is not None:
+        _hasher.shutdown()
+        _hasher = None
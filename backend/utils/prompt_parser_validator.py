@@ -29,4 +29,53 @@ def extract_json_from_response(content: str) -> dict:
             cleaned = clean_json(json_str)
             return json.loads(cleaned)
         except json.JSONDecodeError:
-            return {"error": "JSON parsing failed after cleaned", "raw_response": content}
\ No newline at end of file
+            return {"error": "JSON parsing failed after cleaned", "raw_response": content}
+
+class StreamingFieldParser:
+    """
+    Incrementally scans a streamed JSON response and returns the value of a
+    top-level string field (e.g. "Final_Optimized_Query") as soon as its closing
+    quote has arrived, without waiting for the rest of the document.
+    """
+
+    def __init__(self, field_name: str = "Final_Optimized_Query"):
+        self.field_pattern = re.compile(r'"' + re.escape(field_name) + r'"\s*:\s*"')
+        self.buffer = ""
+        self.value_start = None
+        self.scan_position = 0
+        self.value = None
+
+    def feed(self, text: str):
+        """
+        Adds a streamed chunk. Returns the field value the first time it is complete, otherwise None.
+        """
+        if self.value is not None:
+            return None
+        self.buffer += text
+
+        if self.value_start is None:
+            match = self.field_pattern.search(self.buffer)
+            if not match:
+                return None
+            self.value_start = match.end()
+            self.scan_position = self.value_start
+
+        position = self.scan_position
+        while position < len(self.buffer):
+            char = self.buffer[position]
+            if char == "\\":
+                if position + 1 >= len(self.buffer):
+                    break
+                position += 2
+                continue
+            if char == '"':
+                raw_value = self.buffer[self.value_start:position]
+                try:
+                    self.value = json.loads('"' + raw_value + '"')
+                except json.JSONDecodeError:
+                    self.value = raw_value
+                return self.value
+            position += 1
+
+        self.scan_position = position
+        return None
@@ -1,11 +1,94 @@
 import os
 import logging
-from jinja2 import Template
-from typing import Dict, Any
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache, Template, TemplateNotFound
+from typing import Dict, Any, Optional, Tuple
+from backend.config.config import load_config
 from backend.utils.path_utils import resolve_path
 
 logger = logging.getLogger(__name__)
 
+# Shared template environment; templates are compiled once and kept in memory.
+_environment: Optional[Environment] = None
+
+# Line separating a template's static instructions from its variable input (user query, model response).
+# Everything above it is sent as a system prefix that stays byte-identical across requests,
+# so provider-side prompt caches can reuse it.
+PROMPT_SPLIT_MARKER = "---8<---"
+
+
+class PromptFileLoader(BaseLoader):
+    """
+    Loads prompt templates by their config path (relative to backend/),
+    stripping surrounding whitespace the same way load_prompt does.
+    """
+
+    def get_source(self, environment: Environment, template: str):
+        absolute_path = resolve_path(template)
+
+        if not os.path.exists(absolute_path):
+            raise TemplateNotFound(template)
+
+        with open(absolute_path, "r", encoding="utf-8") as f:
+            source = f.read().strip()
+
+        mtime = os.path.getmtime(absolute_path)
+        return source, absolute_path, lambda: os.path.exists(absolute_path) and os.path.getmtime(absolute_path) == mtime
+
+
+def init_prompt_templates(config: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Builds the shared template environment and compiles every template listed in
+    the 'prompts' config section. Fails if any referenced file is missing.
+    This function should be called on application startup.
+    """
+    global _environment
+    config = config or load_config(resolve_path("config.yaml"))
+    templates_config = config.get("prompt_templates", {})
+
+    bytecode_cache = None
+    cache_dir = templates_config.get("bytecode_cache_dir")
+    if cache_dir:
+        cache_dir = resolve_path(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    hot_reload = templates_config.get("hot_reload", False)
+    environment = Environment(
+        loader=PromptFileLoader(),
+        bytecode_cache=bytecode_cache,
+        auto_reload=hot_reload,
+        cache_size=-1
+    )
+
+    missing = []
+    for name, prompt_path in config.get("prompts", {}).items():
+        try:
+            environment.get_template(prompt_path)
+        except TemplateNotFound:
+            missing.append(f"{name}: {resolve_path(prompt_path)}")
+
+    if missing:
+        logger.error("Prompt files not found: %s", missing)
+        raise FileNotFoundError(f"Prompt files not found: {', '.join(missing)}")
+
+    _environment = environment
+    logger.info("Compiled %d prompt templates (hot reload: %s).", len(config.get("prompts", {})), hot_reload)
+
+
+def get_prompt_template(prompt_path: str) -> Template:
+    """
+    Returns the compiled template for a prompt path, initializing the registry on first use.
+    """
+    if _environment is None:
+        init_prompt_templates()
+
+    try:
+        return _environment.get_template(prompt_path)
+    except TemplateNotFound:
+        logger.error("Prompt file not found: %s", resolve_path(prompt_path))
+        raise FileNotFoundError(f"Prompt file not found: {resolve_path(prompt_path)}")
+
+
 def load_prompt(prompt_path: str) -> str:
     """
     Load a prompt from a file.
@@ -28,15 +111,37 @@ def render_prompt(prompt_text: str, context: Dict[str, Any] = None) -> str:
         return template.render(**context)
     return prompt_text
 
+def split_prompt(rendered_prompt: str) -> Tuple[str, str]:
+    """
+    Splits a rendered prompt at PROMPT_SPLIT_MARKER into (static prefix, variable tail).
+    A prompt without the marker is all tail.
+    """
+    prefix, marker, tail = rendered_prompt.partition(f"\n{PROMPT_SPLIT_MARKER}\n")
+    if not marker:
+        return "", rendered_prompt
+    return prefix.strip(), tail.strip()
+
 def load_and_render_prompt(prompt_path: str, context: Dict[str, Any] = None) -> str:
     """
-    Load and render a prompt from a file.
+    Render a prompt from the template registry as one text, input after the instructions.
+    """
+    rendered_prompt = get_prompt_template(prompt_path).render(**context) if context else load_prompt(prompt_path)
+    prefix, tail = split_prompt(rendered_prompt)
+    return f"{prefix}\n\n{tail}" if prefix else tail
+
+def build_prompt_messages(prompt_path: str, context: Dict[str, Any] = None) -> list:
+    """
+    Renders a prompt as a system message with the template's static instructions
+    followed by a user message with the variable input.
     """
-    prompt_text = load_prompt(prompt_path)
-    return render_prompt(prompt_text, context)
+    rendered_prompt = get_prompt_template(prompt_path).render(**(context or {}))
+    prefix, tail = split_prompt(rendered_prompt)
+    if not prefix:
+        return build_user_message(tail)
+    return [{"role": "system", "content": prefix}, {"role": "user", "content": tail}]
 
 def build_user_message(rendered_prompt: str) -> list:
     """
     Wraps the rendered prompt in a standardized message format.
     """
-    return [{"role": "user", "content": rendered_prompt}]
\ No newline at end of file
+    return [{"role": "user", "content": rendered_prompt}]
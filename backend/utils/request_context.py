@@ -0,0 +1,11 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# User on whose behalf the current request (or background job) runs; None for anonymous calls.
+current_user_id: ContextVar[Optional[str]] = ContextVar("current_user_id", default=None)
+
+# Optimization technique (or evaluation step) the current LLM calls belong to; used to attribute usage.
+current_technique: ContextVar[Optional[str]] = ContextVar("current_technique", default=None)
+
+# Monotonic time at which the current LLM call left the local rate limiter queue and was sent upstream.
+upstream_started_at: ContextVar[Optional[float]] = ContextVar("upstream_started_at", default=None)
@@ -0,0 +1,65 @@
+import json
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+_STREAM_END = object()
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Formats one server-sent event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def merge_streams(streams: Dict[Any, AsyncIterator[Any]],
+                        timeout: Optional[float] = None) -> AsyncIterator[Tuple[Any, Any]]:
+    """
+    Consumes several async iterators concurrently and yields (name, item) pairs
+    in arrival order. An exception raised by one stream is yielded as its item
+    so the other streams keep running. With 'timeout', a stream that has not
+    finished after that many seconds is cancelled and yields asyncio.TimeoutError.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    timed_out = set()
+
+    async def pump(name: Any, stream: AsyncIterator[Any]) -> None:
+        try:
+            async for item in stream:
+                queue.put_nowait((name, item))
+        except asyncio.CancelledError:
+            if name not in timed_out:
+                raise
+            queue.put_nowait((name, asyncio.TimeoutError()))
+        except Exception as e:
+            queue.put_nowait((name, e))
+        finally:
+            queue.put_nowait((name, _STREAM_END))
+
+    def expire(name: Any, task: asyncio.Task) -> None:
+        if not task.done():
+            timed_out.add(name)
+            task.cancel()
+
+    loop = asyncio.get_running_loop()
+    tasks = []
+    timers = []
+    for name, stream in streams.items():
+        task = asyncio.create_task(pump(name, stream))
+        tasks.append(task)
+        if timeout is not None:
+            timers.append(loop.call_later(timeout, expire, name, task))
+
+    remaining = len(tasks)
+    try:
+        while remaining:
+            name, item = await queue.get()
+            if item is _STREAM_END:
+                remaining -= 1
+                continue
+            yield name, item
+    finally:
+        for timer in timers:
+            timer.cancel()
+        for task in tasks:
+            task.cancel()
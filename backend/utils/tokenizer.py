@@ -0,0 +1,81 @@
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Fallback when no tokenizer is available: English text averages about 4 characters per token.
+CHARS_PER_TOKEN = 4
+# Role and separator tokens the chat format adds around every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Encoding used for models tiktoken does not know (e.g. Claude); close enough for pre-flight estimates.
+DEFAULT_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=32)
+def _get_encoding(model: Optional[str]):
+    """
+    Returns the tiktoken encoding of the model, or None when tiktoken or its
+    encoding files are unavailable (tiktoken downloads them once, then works offline).
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(DEFAULT_ENCODING)
+    except KeyError:
+        pass
+    except Exception as e:
+        logger.warning("Could not load tokenizer for model '%s': %s", model, e)
+        return None
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning("Could not load tokenizer '%s': %s", DEFAULT_ENCODING, e)
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Number of tokens in 'text' for the model, estimated from its length when no tokenizer is available.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Cuts 'text' down to at most 'max_tokens' tokens (keeping the beginning).
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def content_text(content: Any) -> str:
+    """
+    Text of a message content, which is either a string or a list of content blocks.
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return str(content or "")
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+    """
+    Number of prompt tokens of a list of chat messages, including the per-message overhead.
+    """
+    return sum(count_tokens(content_text(message.get("content")), model) + MESSAGE_OVERHEAD_TOKENS
+               for message in messages)
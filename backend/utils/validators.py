@@ -1,10 +1,15 @@
-from typing import Dict, Any
+import logging
+from typing import Dict, Any, Optional
 
 from backend.config.config import load_config
 from backend.utils.http_error_handler import handle_http_exception
 from backend.utils.path_utils import resolve_path
+from backend.utils.tokenizer import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
 
 config = load_config(resolve_path("config.yaml"))
+token_budget_config = config.get("token_budget", {})
 
 def validate_required_fields(data: Dict[str, Any], required_fields: list):
     """
@@ -27,3 +32,22 @@ def validate_provider_and_model(provider: str, model: str):
 
     if model not in available_models:
         handle_http_exception(400, f"Invalid model '{model}' for provider '{provider}'. Available: {list(available_models)}")
+
+def validate_text_size(data: Dict[str, Any], field: str, model: Optional[str] = None):
+    """
+    Keeps user-supplied text within 'token_budget.max_input_tokens' before it is rendered
+    into a prompt: oversized text is rejected with 400, or cut down when 'on_oversized' is 'truncate'.
+    """
+    max_tokens = token_budget_config.get("max_input_tokens")
+    if not max_tokens or not isinstance(data.get(field), str):
+        return
+
+    tokens = count_tokens(data[field], model)
+    if tokens <= max_tokens:
+        return
+
+    if token_budget_config.get("on_oversized", "reject") == "truncate":
+        logger.warning("Truncating '%s' from ~%d to %d tokens.", field, tokens, max_tokens)
+        data[field] = truncate_to_tokens(data[field], max_tokens, model)
+    else:
+        handle_http_exception(400, f"'{field}' is too long: about {tokens} tokens, the limit is {max_tokens}.")
@@ -1,6 +1,24 @@
 const BASE_URL = 'http://localhost:8000';
+const JOB_POLL_INTERVAL_MS = 1500;
+
+function sleep(ms) {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+// Fetches the state of an optimization job (GET)
+export async function getOptimizationJob(jobId) {
+  const token = localStorage.getItem('token');
+  const response = await fetch(`${BASE_URL}/optimizations/jobs/${jobId}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!response.ok) {
+    throw new Error('Failed to fetch optimization job');
+  }
+  return await response.json();
+}
 
 // Creates a new optimized prompt (POST)
+// The backend runs the optimization as a background job, so we poll until it finishes.
 export async function createOptimizedPrompt(promptData) {
   const token = localStorage.getItem('token');
   const response = await fetch(`${BASE_URL}/optimizations/`, {
@@ -14,7 +32,15 @@ export async function createOptimizedPrompt(promptData) {
   if (!response.ok) {
     throw new Error('Failed to create optimized prompt');
   }
-  return await response.json();
+  let job = await response.json();
+  while (job.state === 'queued' || job.state === 'running') {
+    await sleep(JOB_POLL_INTERVAL_MS);
+    job = await getOptimizationJob(job._id);
+  }
+  if (job.state !== 'succeeded') {
+    throw new Error(job.error || 'Failed to create optimized prompt');
+  }
+  return { ...job.result, _id: job.result_id };
 }
 
 // Updates an existing optimized prompt (PUT)
@@ -14,4 +14,13 @@ export async function fetchUserById(userId) {
   });
   if (!res.ok) throw new Error('Failed to fetch user info');
   return await res.json();
+}
+
+export async function fetchCurrentUser() {
+  const jwt = localStorage.getItem('token');
+  const res = await fetch(`${BASE_URL}/users/me`, {
+    headers: { Authorization: `Bearer ${jwt}` }
+  });
+  if (!res.ok) throw new Error('Failed to fetch user info');
+  return await res.json();
 }
\ No newline at end of file
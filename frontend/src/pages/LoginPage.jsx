@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { loginUser } from '../api/authApi';
-import { getUserIdFromToken, fetchUserById } from '../api/userApi';
+import { fetchCurrentUser } from '../api/userApi';
 import { InputText } from 'primereact/inputtext';
 import { Button } from 'primereact/button';
 import background_img from '../backgrounds/cool-background.png';
@@ -20,13 +20,10 @@ function LoginPage() {
       // 2) Store token in localStorage
       localStorage.setItem('token', data.access_token);
 
-      // 3) Decode token to get user ID
-      const userId = getUserIdFromToken(data.access_token);
+      // 3) Fetch the logged-in user's doc to get full_name
+      const userDoc = await fetchCurrentUser();
 
-      // 4) Fetch user doc to get full_name
-      const userDoc = await fetchUserById(userId);
-
-      // 5) Store the full_name in localStorage for other pages
+      // 4) Store the full_name in localStorage for other pages
       localStorage.setItem('fullName', userDoc.full_name);
 
       navigate('/optimize');